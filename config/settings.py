@@ -109,6 +109,19 @@ DATABASES = {
 #you don't want to use. Remember, info in one database is NOT stored or transfered to another
 
 
+# Cache
+# Per-process structures (fuzzy search vocabulary, ...) compare a catalog
+# version stamp kept in this cache. With several gunicorn workers point it at
+# a shared backend, e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# and CACHE_LOCATION=ptc_cache (then run `python manage.py createcachetable`).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'ptc-default'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -162,6 +175,14 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded images are named by content hash and stored once (core/storage.py).
+# STORAGES replaces STATICFILES_STORAGE, which Django 5.1+ no longer reads, so
+# static files keep the plain storage they have been served with.
+STORAGES = {
+    "default": {"BACKEND": "core.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
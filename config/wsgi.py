@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory search suggestion index as each worker boots
+from core.suggest import warm_index  # noqa: E402
+
+warm_index()
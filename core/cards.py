@@ -0,0 +1,56 @@
+# core/cards.py
+
+from django.db.models import F
+from django.db.models.functions import Substr
+
+from core.models import Product
+
+# Enough of the description for the "truncatewords" teaser on a card
+SUMMARY_CHARS = 300
+
+_image_storage = Product._meta.get_field('image').storage
+
+
+class ProductCard:
+    """What a grid tile needs from a product, and nothing else.
+
+    Built straight from a values_list() row: no model instance, no
+    description/specifications TextFields, and the image URL is resolved
+    once here rather than through a FieldFile on every template lookup.
+    `image` keeps the storage name for {% responsive_image %}.
+    """
+
+    __slots__ = (
+        'pid', 'title', 'price', 'image', 'image_url', 'summary', 'date', 'product_status', 'vendor', 'search_snippet',
+    )
+
+    def __init__(self, pid, title, price, image, summary, date, product_status, vendor=None):
+        self.pid = pid
+        self.title = title
+        self.price = price
+        self.image = image
+        self.image_url = _image_storage.url(image) if image else None
+        self.summary = summary
+        self.date = date
+        self.product_status = product_status
+        self.vendor = vendor
+        self.search_snippet = None
+
+    def __repr__(self):
+        return f"<ProductCard {self.pid}: {self.title}>"
+
+
+CARD_COLUMNS = ('pid', 'title', 'price', 'image', 'card_summary', 'date', 'product_status')
+
+
+def product_cards(queryset, with_vendor=False):
+    """Evaluate a Product queryset (sliced or not) into a list of ProductCards.
+
+    with_vendor also fetches the owner's username, for admin listings.
+    """
+    columns = CARD_COLUMNS + ('card_vendor',) if with_vendor else CARD_COLUMNS
+    annotations = {'card_summary': Substr('description', 1, SUMMARY_CHARS)}
+    if with_vendor:
+        annotations['card_vendor'] = F('user__username')
+    rows = queryset.annotate(**annotations).values_list(*columns)
+    return [ProductCard(*row) for row in rows]
@@ -0,0 +1,431 @@
+# core/cart.py
+
+import json
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from core.images import thumbnail_url
+from core.models import CartOrder, CartOrderItems, Product
+
+# Items in a user's open cart, shown in the header of every page. Kept per
+# user (not per session) so every device sees the same number; the views
+# that change a cart write the new count, the TTL bounds anything missed.
+CART_COUNT_KEY = "cart:count:{}"
+CART_COUNT_TTL = 60 * 60
+
+
+def count_cart_items(user_id):
+    """Total quantity in the user's unpaid cart: one aggregate, no cart row created."""
+    total = CartOrderItems.objects.filter(
+        order__user_id=user_id, order__paid_status=False,
+    ).aggregate(total_qty=Sum('qty'))['total_qty']
+    return total or 0
+
+
+def get_cart_count(user_id):
+    count = cache.get(CART_COUNT_KEY.format(user_id))
+    if count is None:
+        count = count_cart_items(user_id)
+        cache.set(CART_COUNT_KEY.format(user_id), count, CART_COUNT_TTL)
+    return count
+
+
+def set_cart_count(user_id, count):
+    cache.set(CART_COUNT_KEY.format(user_id), count, CART_COUNT_TTL)
+
+
+def forget_cart_count(user_id):
+    cache.delete(CART_COUNT_KEY.format(user_id))
+
+
+def lazy_cart_count(request):
+    """The header count, looked up only if a template actually renders it."""
+    def load():
+        user = request.user
+        return get_cart_count(user.pk) if user.is_authenticated else sum(read_guest_cart(request).values())
+    return SimpleLazyObject(load)
+
+
+############################ Open carts ################################
+# A user has at most one unpaid CartOrder (the one_open_cart_per_user
+# partial unique index). Carts left alone longer than ABANDONED_CART_DAYS
+# are removed by the expire_abandoned_carts command.
+
+ABANDONED_CART_DAYS = getattr(settings, 'ABANDONED_CART_DAYS', 30)
+# How stale CartOrder.updated may get before activity writes it again
+CART_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def get_open_cart(user, create=False):
+    """The user's unpaid cart, or None. With create=True one is made if
+    needed and an existing one is marked active. Only views that put
+    something in the cart should create one; reading never does."""
+    order = CartOrder.objects.filter(user=user, paid_status=False).first()
+    if order is None:
+        if create:
+            # get_or_create retries the get if a concurrent request won the unique index
+            order, _ = CartOrder.objects.get_or_create(user=user, paid_status=False)
+        return order
+    if create and order.updated < timezone.now() - CART_TOUCH_INTERVAL:
+        touch_open_cart(user.pk)
+    return order
+
+
+############################ Batched updates ################################
+
+# Most operations one request may carry, and the largest quantity per line
+MAX_CART_OPERATIONS = 100
+MAX_LINE_QTY = 999
+_DELTAS = {'increase': 1, 'decrease': -1}
+
+
+def _line_total(qty):
+    return ExpressionWrapper(F('price') * qty, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def open_cart_items(user_id):
+    return CartOrderItems.objects.filter(order__user_id=user_id, order__paid_status=False)
+
+
+def touch_open_cart(user_id):
+    """Mark the user's open cart as active; expire_abandoned_carts goes by this.
+    Writes at most once per CART_TOUCH_INTERVAL."""
+    now = timezone.now()
+    CartOrder.objects.filter(
+        user_id=user_id, paid_status=False, updated__lt=now - CART_TOUCH_INTERVAL,
+    ).update(updated=now)
+
+
+def coalesce_operations(operations, key=int):
+    """Fold a list of {item_id, action|qty} operations into one change per item:
+    {item_id: ('set', qty)} or {item_id: ('add', delta)}. Raises ValueError.
+    `key` converts item ids: int for cart lines, str for guest cart pids."""
+    if not isinstance(operations, list) or len(operations) > MAX_CART_OPERATIONS:
+        raise ValueError(f"Send a list of at most {MAX_CART_OPERATIONS} operations.")
+    changes = {}
+    for op in operations:
+        try:
+            item_id = key(op['item_id'])
+        except (TypeError, KeyError, ValueError):
+            raise ValueError("Every operation needs an item_id.")
+        if 'qty' in op:
+            qty = op['qty']
+            if not isinstance(qty, int) or isinstance(qty, bool) or not 0 <= qty <= MAX_LINE_QTY:
+                raise ValueError(f"qty must be a whole number from 0 to {MAX_LINE_QTY}.")
+            changes[item_id] = ('set', qty)
+        elif op.get('action') == 'remove':
+            changes[item_id] = ('set', 0)
+        elif op.get('action') in _DELTAS:
+            kind, value = changes.get(item_id, ('add', 0))
+            delta = _DELTAS[op['action']]
+            changes[item_id] = (kind, max(0, min(value + delta, MAX_LINE_QTY)) if kind == 'set' else value + delta)
+        else:
+            raise ValueError("action must be increase, decrease or remove.")
+    return changes
+
+
+def apply_cart_operations(user_id, operations):
+    """Apply a batch of cart changes in one transaction and report the result.
+
+    Items are grouped by the change they get, so a batch costs one UPDATE
+    per distinct quantity or delta rather than one round trip per click;
+    F() keeps concurrent batches from overwriting each other. Lines stop at
+    MAX_LINE_QTY and are deleted when they reach 0. Only lines in the user's unpaid cart can change.
+    Returns {'items': {id: (qty, total)}, 'removed': [ids], 'missing': [ids
+    not in the cart], 'cart_total', 'cart_count'}.
+    """
+    changes = coalesce_operations(operations)
+    by_change = {}
+    for item_id, change in changes.items():
+        by_change.setdefault(change, []).append(item_id)
+
+    items = open_cart_items(user_id)
+    with transaction.atomic():
+        found = set(items.filter(id__in=list(changes)).values_list('id', flat=True))
+        for (kind, value), ids in by_change.items():
+            lines = items.filter(id__in=[i for i in ids if i in found])
+            if kind == 'set':
+                lines.update(qty=value, total=_line_total(Value(value)))
+            elif value:
+                new_qty = Least(F('qty') + value, Value(MAX_LINE_QTY))
+                lines.update(qty=new_qty, total=_line_total(new_qty))
+        items.filter(id__in=found, qty__lte=0).delete()
+
+        remaining = {
+            item_id: (qty, total)
+            for item_id, qty, total in items.filter(id__in=found).values_list('id', 'qty', 'total')
+        }
+        totals = items.aggregate(cart_total=Sum('total'), cart_count=Sum('qty'))
+        if found:
+            touch_open_cart(user_id)
+
+    cart_count = totals['cart_count'] or 0
+    set_cart_count(user_id, cart_count)
+    return {
+        'items': remaining,
+        'removed': [item_id for item_id in found if item_id not in remaining],
+        'missing': [item_id for item_id in changes if item_id not in found],
+        'cart_total': totals['cart_total'] or 0,
+        'cart_count': cart_count,
+    }
+
+
+############################ Adding to the cart ################################
+
+# Backends that understand INSERT ... ON CONFLICT ... RETURNING (SQLite 3.35+)
+UPSERT_VENDORS = ('postgresql', 'sqlite')
+
+
+def _upsert_sql(rows, returning=False):
+    qn = connection.ops.quote_name
+    line, product = qn(CartOrderItems._meta.db_table), qn(Product._meta.db_table)
+    # (pid, qty) pairs are joined to the products, so the INSERT reads
+    # titles and prices itself and unknown pids insert nothing. VALUES
+    # columns are column1, column2 on both backends; the join goes in WHERE
+    # because SQLite can't tell a JOIN's ON from ON CONFLICT here. Lines
+    # stop at MAX_LINE_QTY (CASE: SQLite has no LEAST, PostgreSQL no
+    # two-argument MIN); _upsert_params caps the quantities added.
+    added = f"{line}.qty + excluded.qty"
+    new_qty = f"CASE WHEN {added} > {MAX_LINE_QTY} THEN {MAX_LINE_QTY} ELSE {added} END"
+    sql = f"""
+        INSERT INTO {line} (order_id, product_id, invoice_no, product_status, item, image, price, qty, total)
+        SELECT %s, p.pid, %s || p.pid, 'processing', p.title,
+               CASE WHEN p.image IS NULL OR p.image = '' THEN '' ELSE %s || p.image END,
+               p.price, v.column2, p.price * v.column2
+        FROM {product} p, (VALUES {", ".join(["(%s, %s)"] * rows)}) v
+        WHERE p.pid = v.column1
+        ON CONFLICT (order_id, product_id) DO UPDATE
+        SET qty = {new_qty}, total = {line}.price * ({new_qty})
+    """
+    if returning:
+        # this line's new qty plus the other lines, which the statement leaves untouched
+        sql += f"""
+        RETURNING item, (
+            SELECT COALESCE(SUM(o.qty), 0) FROM {line} o
+            WHERE o.order_id = {line}.order_id AND o.id <> {line}.id
+        ) + qty
+        """
+    return sql
+
+
+def _upsert_params(order, quantities):
+    params = [order.pk, f'INV{order.pk}', settings.MEDIA_URL]
+    for pid, qty in quantities.items():
+        params += [pid, min(qty, MAX_LINE_QTY)]
+    return params
+
+
+def add_to_cart(order, pid, qty):
+    """Add qty of a product to an open cart in one statement.
+
+    The line is keyed on the product (unique_cart_line), so concurrent adds
+    of the same product add up instead of racing to create two lines.
+    Returns (product title, new cart count), or None if there is no such
+    product.
+    """
+    if connection.vendor in UPSERT_VENDORS:
+        with connection.cursor() as cursor:
+            cursor.execute(_upsert_sql(1, returning=True), _upsert_params(order, {pid: qty}))
+            row = cursor.fetchone()
+        return (row[0], int(row[1])) if row else None
+
+    product = Product.objects.filter(pid=pid).first()
+    if product is None:
+        return None
+    qty = min(qty, MAX_LINE_QTY)
+    new_qty = Least(F('qty') + qty, Value(MAX_LINE_QTY))
+    lines = CartOrderItems.objects.filter(order=order, product=product)
+    with transaction.atomic():
+        if not lines.update(qty=new_qty, total=_line_total(new_qty)):
+            try:
+                with transaction.atomic():
+                    CartOrderItems.objects.create(
+                        order=order, product=product, invoice_no=f'INV{order.pk}{product.pid}',
+                        item=product.title, image=product.image.url if product.image else '',
+                        price=product.price, qty=qty, total=product.price * qty, product_status='processing',
+                    )
+            except IntegrityError:
+                # a concurrent request created the line first
+                lines.update(qty=new_qty, total=_line_total(new_qty))
+        count = CartOrderItems.objects.filter(order=order).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
+    return product.title, count
+
+
+def add_many_to_cart(order, quantities):
+    """Add {pid: qty} to an open cart with a single multi-row upsert."""
+    if not quantities:
+        return
+    if connection.vendor not in UPSERT_VENDORS:
+        for pid, qty in quantities.items():
+            add_to_cart(order, pid, qty)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(len(quantities)), _upsert_params(order, quantities))
+
+
+############################ Guest carts ################################
+# A logged-out visitor's cart is a compact {pid: qty} map in a signed
+# cookie: adding to it writes nothing to the database, and it moves into a
+# real CartOrder when the visitor logs in or registers.
+
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_SALT = 'core.cart.guest'
+GUEST_CART_MAX_AGE = 60 * 60 * 24 * 30
+# Keeps the cookie well under the 4KB browsers accept
+MAX_GUEST_LINES = 50
+
+GuestLine = namedtuple('GuestLine', 'id product_id item image qty price total')
+
+
+def has_guest_cart(request):
+    return not request.user.is_authenticated and GUEST_CART_COOKIE in request.COOKIES
+
+
+def read_guest_cart(request):
+    """The visitor's {pid: qty}; empty if there is no cookie or it was tampered with or expired."""
+    cart = getattr(request, '_guest_cart', None)
+    if cart is None:
+        cart = {}
+        value = request.COOKIES.get(GUEST_CART_COOKIE)
+        if value:
+            try:
+                data = signing.loads(value, salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE)
+            except signing.BadSignature:
+                data = {}
+            if isinstance(data, dict):
+                cart = {
+                    str(pid): qty for pid, qty in list(data.items())[:MAX_GUEST_LINES]
+                    if isinstance(qty, int) and 0 < qty <= MAX_LINE_QTY
+                }
+        request._guest_cart = cart
+    return cart
+
+
+def write_guest_cart(request, response, cart):
+    request._guest_cart = cart
+    if not cart:
+        response.delete_cookie(GUEST_CART_COOKIE, samesite='Lax')
+        return
+    response.set_cookie(
+        GUEST_CART_COOKIE, signing.dumps(cart, salt=GUEST_CART_SALT, compress=True),
+        max_age=GUEST_CART_MAX_AGE, httponly=True, samesite='Lax', secure=request.is_secure(),
+    )
+
+
+def add_to_guest_cart(cart, pid, qty):
+    """A copy of the cart with qty more of pid. Raises ValueError when it is full."""
+    if pid not in cart and len(cart) >= MAX_GUEST_LINES:
+        raise ValueError(f"A cart holds at most {MAX_GUEST_LINES} different products; log in to add more.")
+    cart = dict(cart)
+    cart[pid] = min(cart.get(pid, 0) + qty, MAX_LINE_QTY)
+    return cart
+
+
+def guest_cart_lines(cart):
+    """Lines to render for a guest cart, from one product query. Products
+    deleted since they were added are left out."""
+    products = Product.objects.filter(pid__in=list(cart)).only('pid', 'title', 'price', 'image')
+    by_pid = {p.pid: p for p in products}
+    return [
+        GuestLine(pid, pid, by_pid[pid].title, thumbnail_url(by_pid[pid].image), qty,
+                  by_pid[pid].price, by_pid[pid].price * qty)
+        for pid, qty in cart.items() if pid in by_pid
+    ]
+
+
+def apply_guest_operations(cart, operations):
+    """apply_cart_operations for a guest cart, keyed on pid.
+    Returns (new cart, result in the same shape)."""
+    changes = coalesce_operations(operations, key=str)
+    cart = dict(cart)
+    touched = [pid for pid in changes if pid in cart]
+    for pid in touched:
+        kind, value = changes[pid]
+        qty = max(0, min(value if kind == 'set' else cart[pid] + value, MAX_LINE_QTY))
+        if qty:
+            cart[pid] = qty
+        else:
+            del cart[pid]
+
+    lines = {line.id: line for line in guest_cart_lines(cart)}
+    return cart, {
+        'items': {pid: (lines[pid].qty, lines[pid].total) for pid in touched if pid in lines},
+        'removed': [pid for pid in touched if pid not in lines],
+        'missing': [pid for pid in changes if pid not in touched],
+        'cart_total': sum(line.total for line in lines.values()),
+        'cart_count': sum(line.qty for line in lines.values()),
+    }
+
+
+def merge_guest_cart(request, user):
+    """Move the guest cart into the user's open cart with one bulk upsert;
+    quantities add to lines already there. Returns how many products were
+    merged. The caller clears the cookie on its response."""
+    cart = read_guest_cart(request)
+    if not cart:
+        return 0
+    order = get_open_cart(user, create=True)
+    add_many_to_cart(order, cart)
+    forget_cart_count(user.pk)
+    return len(cart)
+
+
+############################ Abandoned carts ################################
+
+def _archive_entry(order, lines):
+    return {
+        'id': order.pk, 'user_id': order.user_id,
+        'order_date': order.order_date.isoformat(), 'updated': order.updated.isoformat(),
+        'lines': [
+            {'product_id': line.product_id, 'item': line.item, 'qty': line.qty, 'price': str(line.price)}
+            for line in lines
+        ],
+    }
+
+
+def expire_abandoned_carts(days=ABANDONED_CART_DAYS, batch_size=500, archive=None, dry_run=False, on_batch=None):
+    """Delete unpaid carts (and their lines) untouched for `days`.
+
+    Works through the carts in primary key order, one transaction per
+    batch of `batch_size`, so it never holds many locks, can be stopped at
+    any point and simply picks up the rest when run again. A cart touched
+    after its batch was picked is left alone. With `archive` (an open text
+    file) each cart is written as a JSON line before it is deleted; a run
+    killed mid-batch may archive that batch again on the next run.
+    `on_batch(carts, lines)` is called after every batch. Returns
+    {'carts', 'lines'}.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    stale = CartOrder.objects.filter(paid_status=False, updated__lt=cutoff)
+    stats = {'carts': 0, 'lines': 0}
+    last_pk = 0
+    while True:
+        ids = list(stale.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return stats
+        last_pk = ids[-1]
+        with transaction.atomic():
+            orders = list(stale.select_for_update().filter(pk__in=ids).order_by('pk'))
+            lines = {}
+            for line in CartOrderItems.objects.filter(order__in=orders).order_by('pk'):
+                lines.setdefault(line.order_id, []).append(line)
+            if archive is not None and not dry_run:
+                for order in orders:
+                    archive.write(json.dumps(_archive_entry(order, lines.get(order.pk, []))) + "\n")
+                archive.flush()
+            line_count = sum(len(order_lines) for order_lines in lines.values())
+            if not dry_run:
+                CartOrder.objects.filter(pk__in=[order.pk for order in orders]).delete()
+        stats['carts'] += len(orders)
+        stats['lines'] += line_count
+        if on_batch:
+            on_batch(len(orders), line_count)
@@ -0,0 +1,208 @@
+# core/catalog.py
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from core.cards import product_cards
+from core.facets import FacetSelection, facet_counts
+from core.models import Category, Product, Tags
+
+# Shared stamp that changes whenever products, tags or categories change.
+# Per-process structures built from the catalog (fuzzy vocabulary, suggest
+# index, ...) remember the version they were built at and refresh when it
+# moves.
+VERSION_KEY = "catalog:version"
+
+# Every bump that concerns a single row also leaves a journal entry
+# "catalog:change:<version>" -> (model label, pk), so a worker that is a few
+# versions behind can re-read just those rows instead of rebuilding.
+CHANGE_KEY = "catalog:change:{}"
+CHANGE_TTL = 60 * 60
+# A worker further behind than this rebuilds from scratch
+MAX_REPLAY = 500
+
+
+def _initial_version():
+    # Seed from the clock so a cache flush never hands out a version
+    # number a worker has already seen.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _incr(change=None):
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        # Stamp was evicted; a fresh seed makes every worker rebuild
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        return
+    if change is not None:
+        cache.set(CHANGE_KEY.format(version), change, CHANGE_TTL)
+
+
+def bump_catalog_version(model=None, pk=None):
+    """Mark the catalog as changed, optionally naming the changed row.
+
+    Bumped right away so this process sees its own write, and again once the
+    surrounding transaction commits so other workers can't rebuild from the
+    pre-commit state and then sit on a stale copy.
+    """
+    change = (model._meta.label_lower, pk) if model is not None else None
+    _incr(change)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr(change))
+
+
+def changes_since(version, current):
+    """Return the (model label, pk) changes between two versions, or None if
+    the journal can't cover the gap and the caller has to rebuild."""
+    if current < version or current - version > MAX_REPLAY:
+        return None
+    keys = [CHANGE_KEY.format(v) for v in range(version + 1, current + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return [found[k] for k in keys]
+
+
+############################ Cached catalog lists ################################
+# Tag cloud, category list, featured products and the storefront's
+# unfiltered facet counts change rarely but were
+# rebuilt on every page. Each list is cached under a generation number that
+# the signals in core/signals.py bump; a small per-process LRU sits in front
+# of the Django cache so a hit costs one cache read for the generation.
+
+FEATURED_LIMIT = 8
+LIST_TTL = 60 * 60 * 24
+GENERATION_KEY = "catalog:gen:{}"
+
+TagEntry = namedtuple('TagEntry', 'pk name slug num_products')
+
+
+class CategoryEntry(namedtuple('CategoryEntry', 'cid title')):
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.cid
+
+
+class LRUCache:
+    """Tiny thread-safe LRU used as the per-process layer."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LRUCache()
+
+
+def get_generation(name):
+    gen = cache.get(GENERATION_KEY.format(name))
+    if gen is None:
+        cache.add(GENERATION_KEY.format(name), _initial_version(), timeout=None)
+        gen = cache.get(GENERATION_KEY.format(name))
+    return gen
+
+
+def _bump_generations(names):
+    for name in names:
+        try:
+            cache.incr(GENERATION_KEY.format(name))
+        except ValueError:
+            cache.add(GENERATION_KEY.format(name), _initial_version(), timeout=None)
+
+
+def invalidate_catalog_lists(*names):
+    """Invalidate the named lists ("tags", "categories", "featured", "facets",
+    or the anonymous page cache, "pages"), now and again after commit, like
+    bump_catalog_version."""
+    _bump_generations(names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump_generations(names))
+
+
+def _cached_list(name, build):
+    gen = get_generation(name)
+    key = f"catalog:list:{name}:{gen}"
+    value = _local.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is None:
+            value = build()
+            cache.set(key, value, LIST_TTL)
+        _local.set(key, value)
+    return value
+
+
+def _build_tag_cloud():
+    published = Q(product__status=True, product__product_status="published")
+    tags = Tags.objects.annotate(num_products=Count('product', filter=published)).order_by('name')
+    return [TagEntry(*row) for row in tags.values_list('pk', 'name', 'slug', 'num_products')]
+
+
+def _build_categories():
+    return [CategoryEntry(*row) for row in Category.objects.order_by('title').values_list('cid', 'title')]
+
+
+def _build_featured():
+    featured = Product.objects.filter(status=True, product_status="published", featured=True)
+    return product_cards(featured.order_by('-date')[:FEATURED_LIMIT])
+
+
+def _build_facet_counts():
+    published = Product.objects.filter(status=True, product_status="published")
+    return facet_counts(published, FacetSelection(), get_tag_cloud(), get_categories())
+
+
+def get_tag_cloud():
+    """All tags, alphabetical, with their number of published products."""
+    return _cached_list("tags", _build_tag_cloud)
+
+
+def get_categories():
+    """All categories as (cid, title), alphabetical."""
+    return _cached_list("categories", _build_categories)
+
+
+def get_featured_products():
+    """Newest published featured products."""
+    return _cached_list("featured", _build_featured)
+
+
+def get_facet_counts():
+    """Facet counts over the whole published catalog, i.e. with no filter
+    selected; pages with a selection count their own results."""
+    return _cached_list("facets", _build_facet_counts)
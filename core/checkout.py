@@ -0,0 +1,78 @@
+# core/checkout.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from core.cart import set_cart_count
+from core.models import CartOrder, CartOrderItems, PTCCurrency, PTCCurrencyTransaction
+from core.recommendations import record_order
+from core.utils import notify_vendors_of_order
+
+
+def pay_with_ptc_bucks(buyer, order):
+    """Pay for the buyer's open cart with PTC Bucks, all or nothing.
+
+    One transaction with a fixed number of queries plus one UPDATE per
+    vendor: the cart row is locked first, so a double-submitted checkout
+    waits and then finds it paid; every wallet involved is locked in
+    primary key order (no deadlock between two buyers who sell to each
+    other); balances move with F() updates and the ledger rows go in with
+    one bulk_create. Vendor emails and recommendation updates run once the
+    payment has committed. Returns the buyer's new balance; raises
+    ValueError, changing nothing, if the cart is empty or already paid or
+    the balance doesn't cover it.
+    """
+    with transaction.atomic():
+        order = CartOrder.objects.select_for_update().filter(pk=order.pk, user=buyer, paid_status=False).first()
+        if order is None:
+            raise ValueError("Your cart is empty.")
+        lines = list(CartOrderItems.objects.filter(order=order).values_list('item', 'total', 'product__user_id'))
+        if not lines:
+            raise ValueError("Your cart is empty.")
+        total = sum((line_total for _, line_total, _ in lines), Decimal('0'))
+
+        # what each vendor is owed; lines whose product was deleted credit no one
+        credits = defaultdict(Decimal)
+        for _, line_total, seller_id in lines:
+            if seller_id is not None:
+                credits[seller_id] += line_total
+
+        user_ids = {buyer.pk, *credits}
+        PTCCurrency.objects.bulk_create([PTCCurrency(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+        wallets = {
+            w.user_id: w
+            for w in PTCCurrency.objects.select_for_update().filter(user_id__in=user_ids).order_by('pk')
+        }
+        if wallets[buyer.pk].balance < total:
+            raise ValueError("Insufficient PTC Bucks balance.")
+
+        # net change per wallet: a buyer may also be selling one of the items
+        changes = defaultdict(Decimal, credits)
+        changes[buyer.pk] -= total
+        for user_id, amount in changes.items():
+            if amount:
+                PTCCurrency.objects.filter(pk=wallets[user_id].pk).update(balance=F('balance') + amount)
+
+        ledger = [PTCCurrencyTransaction(
+            user=buyer, amount=total, transaction_type='debit', description="Checkout payment",
+        )]
+        ledger += [
+            PTCCurrencyTransaction(
+                user_id=seller_id, amount=line_total, transaction_type='credit',
+                description=f"Sale of {item} to {buyer.username}",
+            )
+            for item, line_total, seller_id in lines if seller_id is not None
+        ]
+        PTCCurrencyTransaction.objects.bulk_create(ledger)
+
+        order.paid_status = True
+        order.price = total
+        order.save(update_fields=['paid_status', 'price', 'updated'])
+
+        transaction.on_commit(lambda: set_cart_count(buyer.pk, 0))
+        transaction.on_commit(lambda: notify_vendors_of_order(order))
+        transaction.on_commit(lambda: record_order(order))
+    return wallets[buyer.pk].balance - total
@@ -1,12 +1,5 @@
-from core.models import Category, Tags, Vendor, Product, ProductImages, CartOrder, CartOrderItems, ProductReview, Wishlist, Address
-from userauths import models
-from .models import CartOrder, CartOrderItems
-from django.db.models import Sum
-from useradmin.decorators import custom_admin_required
+from core.cart import lazy_cart_count
 
 def cart_count(request):
-    if request.user.is_authenticated:
-        order, created = CartOrder.objects.get_or_create(user=request.user, paid_status=False)
-        total_qty = CartOrderItems.objects.filter(order=order).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
-        return {'cart_count': total_qty}
-    return {'cart_count': 0}
\ No newline at end of file
+    # lazy: pages that don't show the cart link never touch the cache or DB
+    return {'cart_count': lazy_cart_count(request)}
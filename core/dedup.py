@@ -0,0 +1,238 @@
+# core/dedup.py
+
+import re
+import zlib
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from PIL import Image
+
+from core.images import is_staged
+from core.models import LSHBucket, ListingFingerprint, Product
+
+Duplicate = namedtuple('Duplicate', 'pid title product_status reason score')
+
+############################ Text: MinHash ################################
+# Two listings' MinHash signatures agree in a fraction of positions equal
+# (in expectation) to the Jaccard similarity of their shingle sets. Cutting
+# the signature into BANDS bands of ROWS values and bucketing on each band
+# makes listings above roughly (1/BANDS) ** (1/ROWS) ~ 0.5 similarity very
+# likely to share a bucket, so candidates come from an index lookup instead
+# of a comparison against every product.
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity from which a listing is reported
+TEXT_THRESHOLD = 0.7
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be comparable across processes and deploys
+_rng = np.random.RandomState(20240513)
+_A = _rng.randint(1, 1 << 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+
+_NON_WORD = re.compile(r"[\W_]+")
+# Model defaults ("No description provided") say nothing about the listing
+_PLACEHOLDERS = {Product._meta.get_field('description').default}
+
+
+def shingles(text):
+    """Character SHINGLE_SIZE-grams of the normalized text."""
+    text = _NON_WORD.sub(" ", text.lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def listing_text(title, description):
+    if description in _PLACEHOLDERS:
+        description = ""
+    return f"{title or ''} {description or ''}"
+
+
+def minhash(shingle_set):
+    """NUM_PERM-value MinHash signature (uint64 array) of a shingle set,
+    or None for empty text."""
+    if not shingle_set:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    # (a*x + b) mod p for every (shingle, permutation); x < 2**32 and a < 2**31 keep it inside uint64
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def text_similarity(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def text_buckets(signature):
+    return [
+        f"t{band:02d}:{zlib.crc32(signature[band * ROWS:(band + 1) * ROWS].tobytes()):08x}"
+        for band in range(BANDS)
+    ]
+
+
+############################ Images: dHash ################################
+# A 64-bit difference hash survives re-encoding, resizing and small edits.
+# It is split into IMAGE_BANDS 16-bit bands: any two hashes within 3 bits
+# share at least one band exactly, and most within IMAGE_THRESHOLD do.
+
+IMAGE_BANDS = 4
+IMAGE_THRESHOLD = 5
+# Uploads still in staging are hashed during the request only if this cheap
+# (so the seller can be warned right away); bigger ones once processed
+STAGED_HASH_PIXELS = 1_000_000
+
+_DEFAULT_IMAGE = Product._meta.get_field('image').default
+
+
+def dhash(field_file, max_pixels=None):
+    """64-bit difference hash of an image file, or None if it can't be read
+    (or, with max_pixels, would take decoding more pixels than that)."""
+    try:
+        field_file.open('rb')
+        try:
+            with Image.open(field_file) as img:
+                # JPEGs can be decoded at 1/2-1/8 scale for nearly free
+                img.draft('L', (1024, 1024))
+                if max_pixels is not None and img.width * img.height > max_pixels:
+                    return None
+                small = img.convert('L').resize((9, 8), Image.LANCZOS)
+        finally:
+            field_file.close()
+    except (OSError, ValueError):
+        return None
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def _to_signed(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def image_buckets(image_hash):
+    value = _to_unsigned(image_hash)
+    return [f"i{band}:{(value >> (16 * band)) & 0xFFFF:04x}" for band in range(IMAGE_BANDS)]
+
+
+def hamming(a, b):
+    return bin(_to_unsigned(a) ^ _to_unsigned(b)).count("1")
+
+
+############################ Index ################################
+
+def fingerprint_product(product):
+    """(Re)compute a product's fingerprint and LSH buckets.
+
+    The image is only re-hashed when its file changed; the shared default
+    image is never hashed (every listing without a photo would match). An
+    upload still in staging is hashed only when small; it is hashed again
+    once processed, under its final name.
+    """
+    signature = minhash(shingles(listing_text(product.title, product.description)))
+    signature_bytes = signature.tobytes() if signature is not None else b""
+    image_name = product.image.name if product.image else ""
+
+    existing = ListingFingerprint.objects.filter(product_id=product.pk).first()
+    if existing is not None and existing.image_name == image_name:
+        if bytes(existing.minhash) == signature_bytes:
+            return  # nothing the fingerprint covers has changed
+        image_hash = existing.image_hash
+    elif image_name and image_name != _DEFAULT_IMAGE:
+        value = dhash(product.image, max_pixels=STAGED_HASH_PIXELS if is_staged(image_name) else None)
+        image_hash = _to_signed(value) if value is not None else None
+    else:
+        image_hash = None
+
+    ListingFingerprint.objects.update_or_create(
+        product_id=product.pk,
+        defaults={
+            'minhash': signature_bytes,
+            'image_hash': image_hash, 'image_name': image_name,
+        },
+    )
+    keys = text_buckets(signature) if signature is not None else []
+    if image_hash is not None:
+        keys += image_buckets(image_hash)
+    LSHBucket.objects.filter(product_id=product.pk).delete()
+    LSHBucket.objects.bulk_create(LSHBucket(key=key, product_id=product.pk) for key in keys)
+
+
+def rebuild_fingerprints(chunk_size=500):
+    """Fingerprint every product. Returns the number processed."""
+    count = 0
+    for product in Product.objects.only('pid', 'title', 'description', 'image').iterator(chunk_size=chunk_size):
+        fingerprint_product(product)
+        count += 1
+    return count
+
+
+def _signature(fingerprint):
+    raw = bytes(fingerprint.minhash)
+    return np.frombuffer(raw, dtype=np.uint64) if raw else None
+
+
+def duplicates_for(products):
+    """Likely duplicates of each product: {pid: [Duplicate, ...]}, best first.
+
+    A fixed handful of queries for any number of products: their bucket
+    keys, the other products in those buckets, and those candidates'
+    fingerprints, which are checked exactly before being reported.
+    """
+    pids = [p.pk for p in products]
+    result = {pid: [] for pid in pids}
+    if not pids:
+        return result
+
+    own_keys = defaultdict(set)
+    for pid, key in LSHBucket.objects.filter(product_id__in=pids).values_list('product_id', 'key'):
+        own_keys[key].add(pid)
+    if not own_keys:
+        return result
+
+    candidates = defaultdict(set)
+    for key, other in LSHBucket.objects.filter(key__in=list(own_keys)).values_list('key', 'product_id'):
+        for pid in own_keys[key]:
+            if other != pid:
+                candidates[pid].add(other)
+
+    wanted = set(pids).union(*candidates.values())
+    prints = {
+        f.product_id: f for f in ListingFingerprint.objects.filter(product_id__in=wanted).select_related('product')
+    }
+    for pid, others in candidates.items():
+        mine = prints.get(pid)
+        if mine is None:
+            continue
+        my_sig = _signature(mine)
+        for other in others:
+            theirs = prints.get(other)
+            if theirs is None:
+                continue
+            if mine.image_hash is not None and theirs.image_hash is not None:
+                distance = hamming(mine.image_hash, theirs.image_hash)
+                if distance <= IMAGE_THRESHOLD:
+                    result[pid].append(Duplicate(
+                        other, theirs.product.title, theirs.product.product_status, 'image', 1 - distance / 64,
+                    ))
+                    continue
+            their_sig = _signature(theirs)
+            if my_sig is None or their_sig is None:
+                continue
+            score = text_similarity(my_sig, their_sig)
+            if score >= TEXT_THRESHOLD:
+                result[pid].append(Duplicate(
+                    other, theirs.product.title, theirs.product.product_status, 'text', score,
+                ))
+        result[pid].sort(key=lambda d: -d.score)
+    return result
+
+
+def find_duplicates(product):
+    return duplicates_for([product])[product.pk]
@@ -0,0 +1,131 @@
+# core/facets.py
+
+from collections import namedtuple
+
+from django.db.models import Count, Q
+
+from core.models import Product
+
+# (key, label, low inclusive, high exclusive)
+PRICE_BUCKETS = (
+    ('under-100', 'Under $100', None, 100),
+    ('100-500', '$100 – $500', 100, 500),
+    ('500-1000', '$500 – $1,000', 500, 1000),
+    ('1000-up', '$1,000 and up', 1000, None),
+)
+
+FacetValue = namedtuple('FacetValue', 'value label count selected')
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+class FacetSelection:
+    """Facet filters chosen in the query string:
+
+    ?tag=a&tag=b&tag_mode=all   products carrying every tag (default: any)
+    ?category=<cid>             one or more categories
+    ?price=100-500              one or more PRICE_BUCKETS keys
+    ?in_stock=1, ?featured=1
+    """
+
+    def __init__(self, tags=(), tag_mode='any', categories=(), prices=(), in_stock=False, featured=False):
+        self.tags = list(tags)
+        self.tag_mode = tag_mode
+        self.categories = list(categories)
+        self.prices = list(prices)
+        self.in_stock = in_stock
+        self.featured = featured
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.GET
+        bucket_keys = {b[0] for b in PRICE_BUCKETS}
+        return cls(
+            tags=[t for t in params.getlist('tag') if t],
+            tag_mode='all' if params.get('tag_mode') == 'all' else 'any',
+            categories=[c for c in params.getlist('category') if c],
+            prices=[p for p in params.getlist('price') if p in bucket_keys],
+            in_stock=params.get('in_stock') == '1',
+            featured=params.get('featured') == '1',
+        )
+
+    @property
+    def is_active(self):
+        return bool(self.tags or self.categories or self.prices or self.in_stock or self.featured)
+
+    def apply(self, queryset):
+        # Tag filters go through a subquery on the m2m table rather than a
+        # join, so the result never holds duplicate product rows.
+        through = Product.tags.through.objects
+        if self.tags:
+            if self.tag_mode == 'all':
+                for slug in self.tags:
+                    queryset = queryset.filter(pid__in=through.filter(tags__slug=slug).values('product_id'))
+            else:
+                queryset = queryset.filter(pid__in=through.filter(tags__slug__in=self.tags).values('product_id'))
+        if self.categories:
+            queryset = queryset.filter(category_id__in=self.categories)
+        if self.prices:
+            price_q = Q()
+            for key, _, low, high in PRICE_BUCKETS:
+                if key in self.prices:
+                    price_q |= _price_q(low, high)
+            queryset = queryset.filter(price_q)
+        if self.in_stock:
+            queryset = queryset.filter(in_stock=True)
+        if self.featured:
+            queryset = queryset.filter(featured=True)
+        return queryset
+
+
+def facet_counts(queryset, selection, tags, categories):
+    """Count the results of `queryset` per facet value in a single query.
+
+    Every value becomes one COUNT(DISTINCT pid) FILTER (...) column of the
+    same aggregate; the tags join is a LEFT OUTER JOIN so untagged products
+    still count towards the other facets. Values with no results are left
+    out unless selected.
+    """
+    tags = list(tags)
+    categories = list(categories)
+
+    aggregates = {'total': Count('pk', distinct=True)}
+    for i, tag in enumerate(tags):
+        aggregates[f'tag_{i}'] = Count('pk', distinct=True, filter=Q(tags=tag.pk))
+    for i, category in enumerate(categories):
+        aggregates[f'category_{i}'] = Count('pk', distinct=True, filter=Q(category_id=category.pk))
+    for i, (_, _, low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{i}'] = Count('pk', distinct=True, filter=_price_q(low, high))
+    aggregates['in_stock'] = Count('pk', distinct=True, filter=Q(in_stock=True))
+    aggregates['featured'] = Count('pk', distinct=True, filter=Q(featured=True))
+
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    def values(items):
+        return [v for v in items if v.count or v.selected]
+
+    return {
+        'total': counts['total'],
+        'tags': values(
+            FacetValue(tag.slug, tag.name, counts[f'tag_{i}'], tag.slug in selection.tags)
+            for i, tag in enumerate(tags)
+        ),
+        'categories': values(
+            FacetValue(category.pk, category.title, counts[f'category_{i}'], category.pk in selection.categories)
+            for i, category in enumerate(categories)
+        ),
+        'prices': values(
+            FacetValue(key, label, counts[f'price_{i}'], key in selection.prices)
+            for i, (key, label, _, _) in enumerate(PRICE_BUCKETS)
+        ),
+        'in_stock': FacetValue('1', 'In stock', counts['in_stock'], selection.in_stock),
+        'featured': FacetValue('1', 'Featured', counts['featured'], selection.featured),
+        'tag_mode': selection.tag_mode,
+    }
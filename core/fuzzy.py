@@ -0,0 +1,197 @@
+# core/fuzzy.py
+
+import re
+import threading
+from collections import Counter, defaultdict
+
+from rapidfuzz import fuzz, process
+
+from core.catalog import changes_since, get_catalog_version
+from core.models import Product, Tags
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Tokens shorter than this are never corrected ("i5", "pc", ...)
+MIN_TERM_LENGTH = 3
+# Most terms re-scored with RapidFuzz per query token
+MAX_CANDIDATES = 40
+# Minimum fuzz.ratio for a correction to be offered
+MIN_SCORE = 75
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(term):
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class VocabularyIndex:
+    """Typo-tolerant lookup over the words of the published catalog.
+
+    Candidates come from a trigram inverted index: a misspelling still
+    shares most of its trigrams with the intended word, so only the few
+    dozen terms with the largest overlap (and a similar length) are ever
+    scored by RapidFuzz, never the whole vocabulary.
+
+    Words are counted per source (a product title or a tag name), so a
+    catalog edit swaps the words of the rows that changed. A term whose
+    count drops to zero keeps its postings and is skipped until it comes
+    back; the next full build drops it.
+    """
+
+    def __init__(self):
+        self.frequencies = Counter()
+        self.terms = []
+        self.term_ids = {}
+        self.postings = defaultdict(list)
+        self._sources = {}
+
+    def __contains__(self, term):
+        return term in self.frequencies
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def set_source(self, key, text):
+        """Count the words of `text` for `key`, replacing what it had (None removes it)."""
+        for term in self._sources.pop(key, ()):
+            self.frequencies[term] -= 1
+            if self.frequencies[term] <= 0:
+                del self.frequencies[term]
+        if not text:
+            return
+        words = tuple(tokenize(text))
+        self._sources[key] = words
+        for term in words:
+            if term not in self.term_ids:
+                self.term_ids[term] = term_id = len(self.terms)
+                self.terms.append(term)
+                for gram in trigrams(term):
+                    self.postings[gram].append(term_id)
+            self.frequencies[term] += 1
+
+    def candidates(self, token):
+        grams = trigrams(token)
+        overlap = Counter()
+        for gram in grams:
+            overlap.update(self.postings.get(gram, ()))
+
+        # Need a reasonable share of trigrams in common and a similar length
+        min_shared = max(1, len(grams) // 3)
+        cands = []
+        for term_id, shared in overlap.most_common():
+            if shared < min_shared or len(cands) >= MAX_CANDIDATES:
+                break
+            term = self.terms[term_id]
+            if term in self.frequencies and abs(len(term) - len(token)) <= 2:
+                cands.append(term)
+        return cands
+
+    def correct(self, token):
+        """Return the best vocabulary term for `token`, or None."""
+        if token in self.frequencies:
+            return token
+        cands = self.candidates(token)
+        if not cands:
+            return None
+        matches = process.extract(token, cands, scorer=fuzz.ratio, score_cutoff=MIN_SCORE, limit=5)
+        if not matches:
+            return None
+        # Prefer the closest spelling, then the more common word
+        best = max(matches, key=lambda m: (m[1], self.frequencies[m[0]]))
+        return best[0]
+
+    def suggest(self, query):
+        """Return a corrected version of `query`, or None if nothing changed."""
+        changed = False
+        corrected = []
+        for token in tokenize(query):
+            if len(token) < MIN_TERM_LENGTH or token.isdigit() or token in self.frequencies:
+                corrected.append(token)
+                continue
+            replacement = self.correct(token)
+            if replacement and replacement != token:
+                corrected.append(replacement)
+                changed = True
+            else:
+                corrected.append(token)
+        return " ".join(corrected) if changed else None
+
+
+def _published_titles(pks=None):
+    products = Product.objects.filter(status=True, product_status="published")
+    if pks is not None:
+        products = products.filter(pk__in=pks)
+    return products.values_list('pk', 'title').iterator(chunk_size=2000)
+
+
+def _tag_names(pks=None):
+    tags = Tags.objects.all() if pks is None else Tags.objects.filter(pk__in=pks)
+    return tags.values_list('pk', 'name')
+
+
+# Journaled models whose rows carry vocabulary; rows that no longer qualify
+# (deleted, unpublished) aren't returned and their words are dropped.
+_SOURCES = {
+    'core.product': ('product', _published_titles),
+    'core.tags': ('tag', _tag_names),
+}
+
+
+def build_vocabulary():
+    """Count every word in published product titles and tag names."""
+    index = VocabularyIndex()
+    for kind, load in _SOURCES.values():
+        for pk, text in load():
+            index.set_source((kind, pk), text)
+    return index
+
+
+def apply_changes(index, changes):
+    by_model = {}
+    for label, pk in changes:
+        if label in _SOURCES:
+            by_model.setdefault(label, set()).add(pk)
+    for label, pks in by_model.items():
+        kind, load = _SOURCES[label]
+        texts = dict(load(pks))
+        for pk in pks:
+            index.set_source((kind, pk), texts.get(pk))
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_vocabulary():
+    """Per-process VocabularyIndex kept current with the catalog version stamp.
+
+    Like core.suggest.get_index: when the stamp moves only the journaled
+    rows are re-read; a full build happens on first use or when the journal
+    can't cover the gap.
+    """
+    global _index, _index_version
+    version = get_catalog_version()
+    if _index is not None and _index_version == version:
+        return _index
+    with _lock:
+        if _index is None:
+            _index = build_vocabulary()
+        elif _index_version != version:
+            changes = changes_since(_index_version, version)
+            if changes is None:
+                _index = build_vocabulary()
+            else:
+                apply_changes(_index, changes)
+        _index_version = version
+    return _index
+
+
+def did_you_mean(query):
+    if not query:
+        return None
+    return get_vocabulary().suggest(query)
@@ -0,0 +1,33 @@
+# core/http_cache.py
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+
+
+def make_etag(*parts):
+    """Opaque validator built from the values a response depends on."""
+    return hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def cache_policy(policy):
+    """Set Cache-Control from `policy(request, *args, **kwargs)` on a view.
+
+    The policy returns patch_cache_control() keyword arguments (or None to
+    leave the response alone) and is evaluated before the view runs. Put the
+    decorator above django's condition() so 304s carry the same policy as
+    the full responses. A response that sets cookies is never made public.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            directives = policy(request, *args, **kwargs)
+            response = view_func(request, *args, **kwargs)
+            if directives and response.status_code in (200, 304) and not response.has_header('Cache-Control'):
+                if directives.get('public') and response.cookies:
+                    directives = {'private': True, 'no_cache': True}
+                patch_cache_control(response, **directives)
+            return response
+        return wrapper
+    return decorator
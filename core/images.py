@@ -0,0 +1,130 @@
+# core/images.py
+
+import io
+import logging
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Widths rendered for every uploaded image. Grids show images at 40-400px,
+# so with srcset the browser never needs more than the 640 for a 2x screen.
+RENDITION_WIDTHS = (80, 160, 320, 640)
+# WebP for browsers that take it, JPEG for the rest
+FORMATS = (('webp', 'WEBP', 'image/webp'), ('jpg', 'JPEG', 'image/jpeg'))
+QUALITY = 80
+RENDITION_ROOT = 'renditions'
+# Raw uploads wait here until core/uploads.py has processed them
+STAGING_ROOT = 'staging'
+# Shown in place of an image that is still being processed
+PLACEHOLDER_SRC = (
+    "data:image/svg+xml;charset=utf-8,"
+    "%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 4 3'%3E"
+    "%3Crect width='4' height='3' fill='%23e5e7eb'/%3E%3C/svg%3E"
+)
+
+# Whether an image's renditions exist is remembered here so templates never
+# touch the storage while rendering
+READY_KEY = "rendition:ready:{}"
+READY_TTL = 60 * 60 * 24
+MISSING_TTL = 60 * 5
+
+
+def rendition_name(name, width, ext):
+    """Deterministic storage path of one rendition:
+    product_images/foo.png -> renditions/product_images/foo/320.webp"""
+    stem = posixpath.splitext(name)[0]
+    return f"{RENDITION_ROOT}/{stem}/{width}.{ext}"
+
+
+def is_staged(name):
+    return bool(name) and name.startswith(STAGING_ROOT + '/')
+
+
+def _flatten(img):
+    """RGB copy for JPEG; transparent areas become white."""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def generate_renditions(name, storage=None, overwrite=False):
+    """Write every width x format rendition of the image stored at `name`.
+
+    Images narrower than a width are not upscaled; that rendition is the
+    original size, so the set of files is always the same. Returns the
+    number of files written.
+    """
+    storage = storage or default_storage
+    if not name or name.startswith(RENDITION_ROOT + '/') or is_staged(name):
+        return 0
+    try:
+        with storage.open(name, 'rb') as f:
+            img = Image.open(f)
+            # let the JPEG decoder downscale while decoding
+            img.draft('RGB', (max(RENDITION_WIDTHS), max(RENDITION_WIDTHS)))
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (OSError, ValueError) as exc:
+        logger.warning("Cannot render %s: %s", name, exc)
+        return 0
+
+    written = 0
+    for width in RENDITION_WIDTHS:
+        resized = img.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for ext, pil_format, _ in FORMATS:
+            target = rendition_name(name, width, ext)
+            if storage.exists(target):
+                if not overwrite:
+                    continue
+                storage.delete(target)
+            out = io.BytesIO()
+            frame = _flatten(resized) if pil_format == 'JPEG' else resized
+            if frame.mode not in ('RGB', 'RGBA'):
+                frame = frame.convert('RGBA')
+            frame.save(out, pil_format, quality=QUALITY, optimize=pil_format == 'JPEG')
+            storage.save(target, ContentFile(out.getvalue()))
+            written += 1
+    cache.set(READY_KEY.format(name), True, READY_TTL)
+    return written
+
+
+def renditions_ready(name, storage=None):
+    if not name or is_staged(name):
+        return False
+    ready = cache.get(READY_KEY.format(name))
+    if ready is None:
+        storage = storage or default_storage
+        ready = storage.exists(rendition_name(name, RENDITION_WIDTHS[-1], FORMATS[-1][0]))
+        cache.set(READY_KEY.format(name), ready, READY_TTL if ready else MISSING_TTL)
+    return ready
+
+
+def ensure_renditions(field_file):
+    """Render an image field's file unless that was done already (upload hook)."""
+    if field_file and field_file.name and not renditions_ready(field_file.name):
+        generate_renditions(field_file.name, storage=field_file.storage)
+
+
+def srcset(name, ext, storage=None):
+    storage = storage or default_storage
+    return ", ".join(f"{storage.url(rendition_name(name, w, ext))} {w}w" for w in RENDITION_WIDTHS)
+
+
+def thumbnail_url(field_file, width=RENDITION_WIDTHS[0]):
+    """URL of a small JPEG rendition, or of the original if there is none yet."""
+    if not field_file or not field_file.name:
+        return ""
+    if is_staged(field_file.name):
+        return PLACEHOLDER_SRC
+    if renditions_ready(field_file.name, field_file.storage):
+        return field_file.storage.url(rendition_name(field_file.name, width, 'jpg'))
+    return field_file.url
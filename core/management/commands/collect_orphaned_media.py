@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.media import ORPHAN_GRACE_SECONDS, collect_orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete or quarantine media files that no image field (or order history) refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be removed')
+        parser.add_argument('--quarantine', metavar='DIR', help='Move orphans under DIR instead of deleting them')
+        parser.add_argument('--grace', type=int, default=ORPHAN_GRACE_SECONDS,
+                            help='Leave files modified in the last GRACE seconds alone')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def report(name, size):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name} ({size} bytes)')
+
+        stats = collect_orphans(
+            dry_run=options['dry_run'], quarantine=options['quarantine'], grace=options['grace'],
+            batch_size=options['batch_size'], on_orphan=report,
+        )
+        verb = 'Would remove' if options['dry_run'] else ('Quarantined' if options['quarantine'] else 'Removed')
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['orphans']} of {stats['scanned']} files ({stats['bytes'] / 1024 / 1024:.1f} MB)"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.media import convert_to_blobs
+
+
+class Command(BaseCommand):
+    help = 'Store existing product, category and vendor images by content hash and recount references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-originals', action='store_true', help='Leave the old flat files in place')
+
+    def handle(self, *args, **options):
+        files, blobs = convert_to_blobs(delete_originals=not options['keep_originals'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Converted {files} files into {blobs} blobs; run generate_renditions to render them'
+        ))
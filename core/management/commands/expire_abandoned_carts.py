@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.cart import ABANDONED_CART_DAYS, expire_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete (optionally archiving first) unpaid carts nobody has touched for a while'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ABANDONED_CART_DAYS,
+                            help='Expire carts untouched for this many days')
+        parser.add_argument('--batch-size', type=int, default=500, help='Carts per transaction')
+        parser.add_argument('--archive', metavar='FILE',
+                            help='Append each cart and its lines to FILE as JSON lines before deleting it')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be expired')
+
+    def handle(self, *args, **options):
+        def report(carts, lines):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{carts} carts, {lines} lines')
+
+        archive = open(options['archive'], 'a', encoding='utf-8') if options['archive'] else None
+        try:
+            stats = expire_abandoned_carts(
+                days=options['days'], batch_size=options['batch_size'], archive=archive,
+                dry_run=options['dry_run'], on_batch=report,
+            )
+        finally:
+            if archive:
+                archive.close()
+        verb = 'Would expire' if options['dry_run'] else 'Expired'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['carts']} carts with {stats['lines']} lines older than {options['days']} days"
+        ))
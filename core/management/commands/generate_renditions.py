@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from core.images import generate_renditions
+from core.media import IMAGE_FIELDS
+
+
+def _setup_worker():
+    # spawned workers (Windows/macOS) start without Django configured
+    django.setup()
+
+
+def _render(args):
+    name, overwrite = args
+    return generate_renditions(name, overwrite=overwrite)
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG renditions for existing product, category and vendor images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 0 renders in this process')
+        parser.add_argument('--overwrite', action='store_true', help='Re-render renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in IMAGE_FIELDS:
+            names.update(
+                model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list(field, flat=True).distinct()
+            )
+        jobs = [(name, options['overwrite']) for name in sorted(names)]
+
+        if options['workers'] > 0:
+            # decoding and resizing is CPU-bound; each image is independent
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_setup_worker) as pool:
+                written = sum(pool.map(_render, jobs, chunksize=16))
+        else:
+            written = sum(map(_render, jobs))
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} renditions for {len(jobs)} images'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Product
+from core.uploads import PROCESSING, process_product_image
+
+
+class Command(BaseCommand):
+    help = 'Process product uploads left in staging (e.g. when the server restarted mid-job)'
+
+    def handle(self, *args, **options):
+        pids = list(Product.objects.filter(image_status=PROCESSING).values_list('pid', flat=True))
+        for pid in pids:
+            process_product_image(pid)
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(pids)} staged uploads'))
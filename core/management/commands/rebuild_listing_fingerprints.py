@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.dedup import rebuild_fingerprints
+
+
+class Command(BaseCommand):
+    help = 'Recompute duplicate-detection fingerprints and LSH buckets for every product'
+
+    def handle(self, *args, **options):
+        count = rebuild_fingerprints()
+        self.stdout.write(self.style.SUCCESS(f'Fingerprinted {count} products'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.recommendations import rebuild_copurchase
+
+
+class Command(BaseCommand):
+    help = 'Recompute "customers also bought" neighbours from all paid orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per INSERT')
+
+    def handle(self, *args, **options):
+        count = rebuild_copurchase(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Stored co-purchase neighbours for {count} products'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed "more from this seller / in this category" groups'
+
+    def handle(self, *args, **options):
+        count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} related-item groups'))
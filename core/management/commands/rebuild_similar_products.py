@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.similarity import BATCH_SIZE, rebuild_similar
+
+
+class Command(BaseCommand):
+    help = 'Re-vectorize published products and recompute their "similar products"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Products scored per matrix multiplication')
+
+    def handle(self, *args, **options):
+        count = rebuild_similar(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Vectorized {count} products'))
@@ -0,0 +1,244 @@
+# core/media.py
+
+import os
+import posixpath
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+from core.images import RENDITION_ROOT
+from core.models import CartOrderItems, Category, MediaBlob, Product, ProductImages, Vendor
+from core.storage import is_blob
+
+# (model, image field) pairs whose files are content-addressed and counted
+IMAGE_FIELDS = ((Product, 'image'), (ProductImages, 'images'), (Category, 'image'), (Vendor, 'image'))
+
+
+def acquire(name):
+    """Count one more reference to a stored blob."""
+    if not is_blob(name):
+        return
+    if MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, refcount=1)
+    except IntegrityError:
+        # created by a concurrent save in the meantime
+        MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+
+
+def release(name):
+    """Count one reference less. Blobs left at 0 stay on disk until the orphan
+    sweep removes them, so a concurrent upload of the same content that found
+    the file already stored never loses it."""
+    if is_blob(name):
+        MediaBlob.objects.filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1)
+
+
+def referenced_names():
+    """Every image file name the four image fields point at, with its count."""
+    counts = Counter()
+    for model, field in IMAGE_FIELDS:
+        rows = model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+        counts.update(rows.values_list(field, flat=True).iterator(chunk_size=2000))
+    return counts
+
+
+@transaction.atomic
+def rebuild_counts():
+    """Recount every blob's references from scratch (after bulk updates,
+    migrations or a crash between a save and its signal). Returns the number
+    of blobs referenced."""
+    counts = {name: n for name, n in referenced_names().items() if is_blob(name)}
+    MediaBlob.objects.exclude(name__in=list(counts)).update(refcount=0)
+    existing = set(MediaBlob.objects.filter(name__in=list(counts)).values_list('name', flat=True))
+    MediaBlob.objects.bulk_update(
+        [MediaBlob(name=name, refcount=counts[name]) for name in existing], ['refcount'], batch_size=1000,
+    )
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, refcount=n) for name, n in counts.items() if name not in existing], batch_size=1000,
+    )
+    return len(counts)
+
+
+def convert_to_blobs(storage=None, delete_originals=True):
+    """Move images saved before content addressing (product_images/foo_bqPJEtr.png)
+    into blobs, repoint every row, and recount. Identical copies collapse
+    into one blob. Returns (files converted, blobs they became)."""
+    storage = storage or default_storage
+    mapping = {}
+    for name in referenced_names():
+        if is_blob(name) or not storage.is_content_addressed(name) or not storage.exists(name):
+            continue
+        with storage.open(name, 'rb') as f:
+            mapping[name] = storage.save(name, f)
+
+    with transaction.atomic():
+        for model, field in IMAGE_FIELDS:
+            for old, new in mapping.items():
+                # queryset.update: the signals would count what rebuild_counts recounts anyway
+                model.objects.filter(**{field: old}).update(**{field: new})
+        rebuild_counts()
+
+    if delete_originals:
+        for old in mapping:
+            storage.delete(old)
+    return len(mapping), len(set(mapping.values()))
+
+
+############################ Orphan sweep ################################
+# Files nothing points at: replaced or deleted images, superseded uploads,
+# blobs whose count dropped to 0, renditions of any of those. The set of
+# referenced names is streamed into a throwaway on-disk SQLite table and the
+# media tree is checked against it in batches, so memory stays flat however
+# many files and rows there are.
+
+# Files younger than this are never touched: an upload is written before
+# the row that references it is committed
+ORPHAN_GRACE_SECONDS = 60 * 60
+
+
+def _file_fields():
+    """(model, field) for every FileField/ImageField of every installed model."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def _order_item_images(chunk_size):
+    # order history keeps a copy of the product image URL; those files must survive the product
+    prefix = settings.MEDIA_URL
+    for url in CartOrderItems.objects.exclude(image='').values_list('image', flat=True).iterator(chunk_size=chunk_size):
+        yield unquote(url[len(prefix):] if url.startswith(prefix) else url.lstrip('/'))
+
+
+def iter_referenced_names(chunk_size=2000):
+    """Stream every media name the database refers to (duplicates included)."""
+    for model, field in _file_fields():
+        if field.default and isinstance(field.default, str):
+            yield field.default  # new rows get it without anyone uploading it
+        rows = model._base_manager.exclude(**{f'{field.attname}__isnull': True}).exclude(**{field.attname: ''})
+        yield from rows.values_list(field.attname, flat=True).iterator(chunk_size=chunk_size)
+    yield from _order_item_images(chunk_size)
+
+
+def iter_media_files(root, skip=()):
+    """Yield (name, entry) for every file under root, names relative with '/'.
+    An explicit stack of os.scandir iterators: no recursion, no full listing."""
+    root = os.path.abspath(root)
+    skip = {os.path.abspath(path) for path in skip}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in skip:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield os.path.relpath(entry.path, root).replace(os.sep, '/'), entry
+        except FileNotFoundError:
+            continue
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ReferenceSet:
+    """Referenced names (and their rendition directories) in a temp SQLite file."""
+
+    def __init__(self, names, batch_size):
+        self._dir = tempfile.TemporaryDirectory(prefix='media-refs-')
+        self.db = sqlite3.connect(os.path.join(self._dir.name, 'refs.sqlite3'))
+        self.db.execute("CREATE TABLE refs (name TEXT PRIMARY KEY) WITHOUT ROWID")
+        for batch in _batches(names, batch_size):
+            self.db.executemany("INSERT OR IGNORE INTO refs VALUES (?)", ((n,) for n in batch))
+            # renditions/<stem>/<width>.<ext> belong to <stem>.<ext>
+            self.db.executemany(
+                "INSERT OR IGNORE INTO refs VALUES (?)",
+                ((f"{RENDITION_ROOT}/{posixpath.splitext(n)[0]}/",) for n in batch),
+            )
+        self.db.commit()
+
+    def referenced(self, names):
+        keys = {name: _rendition_owner(name) or name for name in names}
+        wanted = list(set(keys.values()))
+        found = set()
+        for chunk in _batches(wanted, 500):
+            placeholders = ",".join("?" * len(chunk))
+            found.update(r[0] for r in self.db.execute(f"SELECT name FROM refs WHERE name IN ({placeholders})", chunk))
+        return {name for name, key in keys.items() if key in found}
+
+    def close(self):
+        self.db.close()
+        self._dir.cleanup()
+
+
+def _rendition_owner(name):
+    """renditions/images/ab/cd/<hash>/320.webp -> renditions/images/ab/cd/<hash>/"""
+    if name.startswith(RENDITION_ROOT + '/'):
+        return posixpath.dirname(name) + '/'
+    return None
+
+
+def collect_orphans(storage=None, dry_run=False, quarantine=None, grace=ORPHAN_GRACE_SECONDS,
+                    batch_size=1000, on_orphan=None):
+    """Delete (or move under `quarantine`) media files nothing references.
+
+    Returns {'scanned', 'orphans', 'bytes'}. `on_orphan(name, size)` is
+    called for each one found, also in dry-run mode.
+    """
+    storage = storage or default_storage
+    root = storage.location
+    cutoff = time.time() - grace
+    stats = {'scanned': 0, 'orphans': 0, 'bytes': 0}
+
+    refs = _ReferenceSet(iter_referenced_names(batch_size), batch_size)
+    try:
+        files = iter_media_files(root, skip=[quarantine] if quarantine else ())
+        for batch in _batches(files, batch_size):
+            stats['scanned'] += len(batch)
+            candidates = {}
+            for name, entry in batch:
+                st = entry.stat(follow_symlinks=False)
+                if st.st_mtime < cutoff:
+                    candidates[name] = st.st_size
+            referenced = refs.referenced(candidates)
+            orphans = [name for name in candidates if name not in referenced]
+            for name in orphans:
+                stats['orphans'] += 1
+                stats['bytes'] += candidates[name]
+                if on_orphan:
+                    on_orphan(name, candidates[name])
+            if dry_run or not orphans:
+                continue
+            for name in orphans:
+                if quarantine:
+                    target = os.path.join(quarantine, *name.split('/'))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(storage.path(name), target)
+                else:
+                    storage.delete(name)
+            MediaBlob.objects.filter(name__in=[n for n in orphans if is_blob(n)]).delete()
+    finally:
+        refs.close()
+    return stats
@@ -0,0 +1,166 @@
+# core/media_serving.py
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from core.images import RENDITION_ROOT
+from core.storage import BLOB_ROOT, is_blob
+
+# Content-addressed blobs and their renditions never change under the same
+# URL, so browsers and CDNs may keep them for a year without revalidating
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Everything else (the default image, files from before content addressing)
+MEDIA_MAX_AGE = getattr(settings, 'MEDIA_MAX_AGE', 60 * 60)
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_BLOB_RENDITION = re.compile(rf"^{RENDITION_ROOT}/({BLOB_ROOT}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}})/[^/]+$")
+
+
+def is_immutable(name):
+    return is_blob(name) or _BLOB_RENDITION.match(name) is not None
+
+
+def media_etag(name, stat):
+    """The content hash for blobs, size + mtime for anything else."""
+    if is_blob(name):
+        return '"%s"' % posixpath.splitext(posixpath.basename(name))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single "bytes=" range, None to send the
+    whole file (no or multi-part Range), or ValueError when unsatisfiable."""
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _FileSlice:
+    """Read-only view of bytes [start, start+length) of an open file.
+
+    fileno() stays available, so a WSGI server's file_wrapper can still
+    sendfile() it (gunicorn limits the copy to Content-Length); read() is
+    the bounded fallback for servers that iterate.
+    """
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self._f = f
+        self._remaining = length
+        self.name = f.name
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._f.fileno()
+
+    def close(self):
+        self._f.close()
+
+
+def _range_applies(request, etag, mtime):
+    # If-Range: only honour the Range when the client's copy is still current
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT in production.
+
+    Sends ETag/Last-Modified and answers conditional requests with 304,
+    supports single byte ranges (206/416), and streams through FileResponse
+    so the WSGI server can use sendfile. With settings.MEDIA_ACCEL_REDIRECT
+    set, the body is left to the proxy via X-Accel-Redirect.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith('.') or '/.' in name:
+        raise Http404("Not found")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        # SuspiciousFileOperation (a ValueError) for paths outside MEDIA_ROOT
+        raise Http404("Not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Not found")
+
+    etag = media_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        if is_immutable(name):
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=MEDIA_MAX_AGE)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return finish(not_modified)
+
+    # MEDIA_ACCEL_REDIRECT = "/protected-media/" hands the transfer to nginx (an
+    # `internal` location aliased to MEDIA_ROOT), Range requests included
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(name)
+        return finish(response)
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+    if byte_range is not None and not _range_applies(request, etag, stat.st_mtime):
+        byte_range = None
+
+    f = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(_FileSlice(f, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return finish(response)
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE core_productsearchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX core_productsearch_vector_gin ON core_productsearchdocument USING gin (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS core_productsearch_vector_gin",
+    "ALTER TABLE core_productsearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 table: the text is stored once in
+# core_productsearchdocument and the triggers keep the index in step with it.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_productsearch_fts USING fts5(
+        title, tags, body,
+        content='core_productsearchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER core_productsearch_ai AFTER INSERT ON core_productsearchdocument BEGIN
+        INSERT INTO core_productsearch_fts(rowid, title, tags, body) VALUES (new.id, new.title, new.tags, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_productsearch_ad AFTER DELETE ON core_productsearchdocument BEGIN
+        INSERT INTO core_productsearch_fts(core_productsearch_fts, rowid, title, tags, body) VALUES ('delete', old.id, old.title, old.tags, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_productsearch_au AFTER UPDATE ON core_productsearchdocument BEGIN
+        INSERT INTO core_productsearch_fts(core_productsearch_fts, rowid, title, tags, body) VALUES ('delete', old.id, old.title, old.tags, old.body);
+        INSERT INTO core_productsearch_fts(rowid, title, tags, body) VALUES (new.id, new.title, new.tags, new.body);
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS core_productsearch_au",
+    "DROP TRIGGER IF EXISTS core_productsearch_ad",
+    "DROP TRIGGER IF EXISTS core_productsearch_ai",
+    "DROP TABLE IF EXISTS core_productsearch_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+    # other backends fall back to core.search.SimpleSearchBackend
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+def backfill_documents(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductSearchDocument = apps.get_model('core', 'ProductSearchDocument')
+
+    docs = []
+    published = Product.objects.filter(status=True, product_status='published').prefetch_related('tags')
+    for p in published.iterator(chunk_size=500):
+        docs.append(ProductSearchDocument(
+            product_id=p.pk,
+            title=p.title,
+            tags=" ".join(t.name for t in p.tags.all()),
+            body="\n".join(filter(None, [p.description, p.specifications])),
+        ))
+    ProductSearchDocument.objects.bulk_create(docs, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_product_listing_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('tags', models.TextField(blank=True, default='')),
+                ('body', models.TextField(blank=True, default='')),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='core.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product Search Documents',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Mirrors core.related.GROUP_SIZE at the time of writing
+GROUP_SIZE = 7
+
+
+def backfill_related_items(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    RelatedItem = apps.get_model('core', 'RelatedItem')
+    published = Product.objects.filter(status=True, product_status='published')
+    slots = []
+    for kind, field in (('seller', 'user_id'), ('category', 'category_id')):
+        for group_key in published.order_by().values_list(field, flat=True).distinct():
+            newest = published.filter(**{field: group_key}).order_by('-date', '-pid').values_list('pid', flat=True)
+            slots.extend(
+                RelatedItem(kind=kind, group_key=str(group_key), position=i, product_id=pid)
+                for i, pid in enumerate(newest[:GROUP_SIZE])
+            )
+    RelatedItem.objects.bulk_create(slots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_productsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('seller', 'More from this seller'), ('category', 'More in this category')], max_length=20)),
+                ('group_key', models.CharField(max_length=64)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_slots', to='core.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Related Items',
+                'ordering': ['kind', 'group_key', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'group_key', 'position'), name='unique_related_slot')],
+            },
+        ),
+        migrations.RunPython(backfill_related_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_relateditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('copurchase', 'Customers also bought')], max_length=20)),
+                ('score', models.FloatField(default=0)),
+                ('rank', models.PositiveSmallIntegerField(default=0)),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='core.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product Neighbours',
+                'indexes': [models.Index(fields=['product', 'kind', 'rank'], name='neighbour_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'neighbour', 'kind'), name='unique_product_neighbour')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_productneighbour'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productneighbour',
+            name='kind',
+            field=models.CharField(choices=[('copurchase', 'Customers also bought'), ('similar', 'Similar products')], max_length=20),
+        ),
+    ]
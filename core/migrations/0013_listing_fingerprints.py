@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_productneighbour_similar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingFingerprint',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='core.product')),
+                ('minhash', models.BinaryField()),
+                ('image_hash', models.BigIntegerField(blank=True, null=True)),
+                ('image_name', models.CharField(blank=True, default='', max_length=255)),
+            ],
+            options={
+                'verbose_name_plural': 'Listing Fingerprints',
+            },
+        ),
+        migrations.CreateModel(
+            name='LSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=40)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='core.product')),
+            ],
+            options={
+                'verbose_name_plural': 'LSH Buckets',
+            },
+        ),
+    ]
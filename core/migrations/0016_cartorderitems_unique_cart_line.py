@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:11
+
+from django.db import migrations, models
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    # carts filled by title could hold the same product twice; fold each
+    # extra line into the oldest one so the constraint can be added
+    CartOrderItems = apps.get_model('core', 'CartOrderItems')
+    duplicates = (
+        CartOrderItems.objects.filter(product__isnull=False)
+        .values('order_id', 'product_id')
+        .annotate(lines=models.Count('id'))
+        .filter(lines__gt=1)
+    )
+    for dup in duplicates.iterator():
+        lines = list(CartOrderItems.objects.filter(
+            order_id=dup['order_id'], product_id=dup['product_id'],
+        ).order_by('id'))
+        keep = lines[0]
+        keep.qty = sum(line.qty for line in lines)
+        keep.total = keep.price * keep.qty
+        keep.save(update_fields=['qty', 'total'])
+        CartOrderItems.objects.filter(id__in=[line.id for line in lines[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_mediablob'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartorderitems',
+            constraint=models.UniqueConstraint(fields=('order', 'product'), name='unique_cart_line'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_and_merge_open_carts(apps, schema_editor):
+    CartOrder = apps.get_model('core', 'CartOrder')
+    CartOrderItems = apps.get_model('core', 'CartOrderItems')
+    CartOrder.objects.update(updated=models.F('order_date'))
+
+    # get_or_create could leave a user with several unpaid carts; keep the
+    # newest and move the others' lines into it, adding up repeated products
+    users = (
+        CartOrder.objects.filter(paid_status=False)
+        .values('user_id').annotate(carts=models.Count('id')).filter(carts__gt=1)
+    )
+    for row in users.iterator():
+        carts = list(CartOrder.objects.filter(user_id=row['user_id'], paid_status=False).order_by('-id'))
+        keep, extra = carts[0], carts[1:]
+        kept = {line.product_id: line for line in CartOrderItems.objects.filter(order=keep) if line.product_id}
+        for line in CartOrderItems.objects.filter(order__in=extra).order_by('id'):
+            existing = kept.get(line.product_id)
+            if existing is not None:
+                existing.qty += line.qty
+                existing.total = existing.price * existing.qty
+                existing.save(update_fields=['qty', 'total'])
+                line.delete()
+            else:
+                line.order = keep
+                line.save(update_fields=['order'])
+                if line.product_id:
+                    kept[line.product_id] = line
+        CartOrder.objects.filter(id__in=[cart.id for cart in extra]).delete()
+        CartOrder.objects.filter(id=keep.id).update(updated=max(cart.order_date for cart in carts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_cartorderitems_unique_cart_line'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_and_merge_open_carts, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # a separate migration (and transaction) from the merge: PostgreSQL won't
+    # build an index on a table with row changes still pending FK checks
+    dependencies = [
+        ('core', '0017_cartorder_updated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cartorder',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('paid_status', False)), fields=('user',), name='one_open_cart_per_user',
+            ),
+        ),
+    ]
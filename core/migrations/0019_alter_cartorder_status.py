@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_cartorder_one_open_cart_per_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cartorder',
+            name='status',
+            field=models.CharField(default='pending', max_length=50),
+        ),
+    ]
@@ -4,6 +4,7 @@ from shortuuid.django_fields import ShortUUIDField  # pip install shortuuid
 from django.utils.html import mark_safe
 from django.contrib.auth.models import User
 from django.utils.text import slugify
+from core.images import thumbnail_url
 
 #NOTE: remember to pip install Pillow !!!
 
@@ -19,6 +20,11 @@ STATUS = (
     ("in_review", "In Review"),
     ("published", "Published"),
 )
+IMAGE_STATUS = (
+    ("processing", "Processing"),
+    ("ready", "Ready"),
+    ("failed", "Failed"),
+)
 RATING = (
     (1, "★☆☆☆☆"),
     (2, "★★☆☆☆"),
@@ -42,7 +48,7 @@ class Category(models.Model):
     def category_image(self):
         # Safely return an <img> tag only if an image file is present
         if self.image and getattr(self.image, 'url', None):
-            return mark_safe(f'<img src="{self.image.url}" width="50" height="50" />')
+            return mark_safe(f'<img src="{thumbnail_url(self.image)}" width="50" height="50" />')
         return ""
         
     def __str__(self):
@@ -94,7 +100,7 @@ class Vendor(models.Model):
     def vendor_image(self):
         # Safely return an <img> tag only if an image file is present
         if self.image and getattr(self.image, 'url', None):
-            return mark_safe(f'<img src="{self.image.url}" width="50" height="50" />')
+            return mark_safe(f'<img src="{thumbnail_url(self.image)}" width="50" height="50" />')
         return ""
         
     def __str__(self):
@@ -105,6 +111,8 @@ class Product(models.Model):
 
     title = models.CharField(max_length=200)
     image = models.ImageField(upload_to='product_images/', blank=True, null=True, default='product.jpg')
+    # uploads sit in staging/ as "processing" until core/uploads.py has checked and resized them
+    image_status = models.CharField(max_length=20, choices=IMAGE_STATUS, default="ready")
     description = models.TextField(null=True, blank=True, default="No description provided")
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -129,11 +137,15 @@ class Product(models.Model):
 
     class Meta:
         verbose_name_plural = "Products"
+        indexes = [
+            # storefront listing: published products, newest first (keyset on date, pid)
+            models.Index(fields=['product_status', 'status', '-date', '-pid'], name='product_listing_idx'),
+        ]
 
     def product_image(self):
         # Safely return an <img> tag only if an image file is present
         if self.image and getattr(self.image, 'url', None):
-            return mark_safe(f'<img src="{self.image.url}" width="50" height="50" />')
+            return mark_safe(f'<img src="{thumbnail_url(self.image)}" width="50" height="50" />')
         return ""
         
     def __str__(self):
@@ -152,6 +164,119 @@ class ProductImages(models.Model):
         verbose_name_plural = "Product Images"
 
 
+class MediaBlob(models.Model):
+    """One content-addressed image file (core/storage.py) and how many
+    Product, ProductImages, Category and Vendor rows point at it."""
+    name = models.CharField(max_length=255, primary_key=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Media Blobs"
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
+
+
+class ProductSearchDocument(models.Model):
+    """Denormalized text of a published product, kept in sync by core.signals.
+    The full-text index itself lives next to this table: a generated tsvector
+    column + GIN index on PostgreSQL, an FTS5 virtual table on SQLite
+    (see migration 0009 and core/search.py).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='search_document')
+    title = models.CharField(max_length=200)
+    tags = models.TextField(blank=True, default="")
+    body = models.TextField(blank=True, default="")
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Product Search Documents"
+
+    def __str__(self):
+        return self.title
+
+
+class RelatedItem(models.Model):
+    """Precomputed "more from this seller" / "more in this category" slots.
+
+    Each (kind, group_key) group holds the newest published products of one
+    seller or category, so a product page reads its related blocks with a
+    single indexed query. Groups are rebuilt by core.related when a product
+    enters or leaves them.
+    """
+    KIND_SELLER = 'seller'
+    KIND_CATEGORY = 'category'
+    KIND_CHOICES = (
+        (KIND_SELLER, 'More from this seller'),
+        (KIND_CATEGORY, 'More in this category'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    group_key = models.CharField(max_length=64)
+    position = models.PositiveSmallIntegerField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_slots')
+
+    class Meta:
+        verbose_name_plural = "Related Items"
+        ordering = ['kind', 'group_key', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'group_key', 'position'], name='unique_related_slot'),
+        ]
+
+
+class ProductNeighbour(models.Model):
+    """Top-N recommendations of a product, precomputed offline.
+
+    `kind` tells the recommenders apart (core/recommendations.py); each
+    product's list is read in `rank` order through neighbour_lookup_idx.
+    """
+    KIND_COPURCHASE = 'copurchase'
+    KIND_SIMILAR = 'similar'
+    KIND_CHOICES = (
+        (KIND_COPURCHASE, 'Customers also bought'),
+        (KIND_SIMILAR, 'Similar products'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Product Neighbours"
+        indexes = [
+            models.Index(fields=['product', 'kind', 'rank'], name='neighbour_lookup_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'neighbour', 'kind'], name='unique_product_neighbour'),
+        ]
+
+
+class ListingFingerprint(models.Model):
+    """MinHash signature of a listing's text and perceptual hash of its image,
+    used to spot re-uploaded listings (core/dedup.py)."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    minhash = models.BinaryField()
+    # 64-bit dHash stored as a signed bigint; null when there is no own image
+    image_hash = models.BigIntegerField(null=True, blank=True)
+    image_name = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        verbose_name_plural = "Listing Fingerprints"
+
+
+class LSHBucket(models.Model):
+    """One locality-sensitive-hashing band of a listing's fingerprint.
+    Listings sharing any bucket key are duplicate candidates."""
+    key = models.CharField(max_length=40, db_index=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='lsh_buckets')
+
+    class Meta:
+        verbose_name_plural = "LSH Buckets"
+
+
 ####################### CART MODELS #########################
 
 class CartOrder(models.Model):
@@ -161,9 +286,16 @@ class CartOrder(models.Model):
     order_date = models.DateTimeField(auto_now_add=True)
     product_status = models.CharField(max_length=20, choices=STATUS_CHOICE, default="processing")
     status = models.CharField(max_length=50, default='pending')
+    # last cart activity, see core.cart.touch_open_cart
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Cart Order"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(paid_status=False), name='one_open_cart_per_user',
+            ),
+        ]
 
 class CartOrderItems(models.Model):
     order = models.ForeignKey(CartOrder, on_delete=models.CASCADE)
@@ -178,6 +310,10 @@ class CartOrderItems(models.Model):
 
     class Meta:
         verbose_name_plural = "Cart Order Items"
+        # one line per product per cart; add_to_cart upserts against it
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='unique_cart_line'),
+        ]
 
     def order_image(self):
         return mark_safe(f'<img src="/media/%s" width="50" height="50" />' % (self.image))
@@ -0,0 +1,122 @@
+# core/page_cache.py
+
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from core.cart import has_guest_cart
+from core.catalog import get_generation
+
+# Seconds a cached page is served as fresh
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+# How long past that a stale copy may still be served while one worker rebuilds
+PAGE_CACHE_STALE = getattr(settings, 'PAGE_CACHE_STALE', 300)
+# Upper bound on a rebuild; the lock expires on its own if a worker dies
+REBUILD_LOCK_TIMEOUT = 30
+
+# Query parameters that never change the page
+IGNORED_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid'}
+
+
+def normalized_query(request):
+    """Sorted, de-noised query string so ?b=2&a=1 and ?a=1&b=2&utm_source=x share a key."""
+    pairs = sorted(
+        (k, v) for k in request.GET for v in request.GET.getlist(k)
+        if v != '' and k not in IGNORED_PARAMS
+    )
+    return urlencode(pairs)
+
+
+def page_cache_key(request):
+    raw = f"{request.path}?{normalized_query(request)}"
+    return "page:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # the header would show someone else's cart count
+    if has_guest_cart(request):
+        return False
+    # a page rendered now would carry (and consume) someone's flash messages
+    if len(messages.get_messages(request)):
+        return False
+    return True
+
+
+def is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # the page embeds a CSRF token tied to this visitor's cookie
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _from_entry(entry, state):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _render_and_store(view_func, request, args, kwargs, key, generation):
+    response = view_func(request, *args, **kwargs)
+    if is_cacheable_response(request, response):
+        entry = {
+            'generation': generation,
+            'fresh_until': time.time() + PAGE_CACHE_TIMEOUT,
+            'content': response.content,
+            'content_type': response['Content-Type'],
+        }
+        cache.set(key, entry, PAGE_CACHE_TIMEOUT + PAGE_CACHE_STALE)
+        response['X-Page-Cache'] = 'MISS'
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cache_anonymous_page(view_func):
+    """Serve logged-out GETs of a view from the cache.
+
+    Pages are keyed on path + normalized query string and expire either by
+    age or when the "pages" generation moves (product, tag and category
+    signals call invalidate_catalog_lists("pages")). An expired page is rebuilt by
+    whichever worker wins the rebuild lock; the others keep serving the stale
+    copy meanwhile instead of all rendering it at once.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        generation = get_generation("pages")
+        entry = cache.get(key)
+
+        if entry is not None and entry['generation'] == generation and entry['fresh_until'] > time.time():
+            return _from_entry(entry, 'HIT')
+
+        lock_key = key + ":lock"
+        if cache.add(lock_key, 1, REBUILD_LOCK_TIMEOUT):
+            try:
+                return _render_and_store(view_func, request, args, kwargs, key, generation)
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            return _from_entry(entry, 'STALE')
+        # Nothing cached yet and another worker is rendering: render too
+        # rather than make this visitor wait.
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,79 @@
+# core/pagination.py
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+# Number of products rendered per storefront page / "load more" fragment
+PAGE_SIZE = 24
+
+
+def encode_cursor(date, pid):
+    """Encode the (date, pid) of the last row on a page into an opaque token."""
+    raw = f"{date.isoformat()}|{pid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor.
+    Returns (date, pid), or None if the token is missing or malformed so a
+    bad/stale cursor simply falls back to the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, pid = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(date_str), pid
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_paginate(queryset, cursor=None, page_size=PAGE_SIZE, load=list):
+    """Return the page of `queryset` that follows `cursor`, newest first.
+
+    Rows are ordered on (date, pid) descending and the next page starts
+    strictly after the last (date, pid) seen, so every page costs one
+    index range scan of page_size + 1 rows no matter how deep it is
+    (unlike OFFSET, which has to walk and discard all earlier rows).
+    `load` turns the sliced queryset into the page's items (e.g. product_cards);
+    they only need `date` and `pid`.
+    """
+    queryset = queryset.order_by('-date', '-pid')
+
+    position = decode_cursor(cursor)
+    if position:
+        date, pid = position
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, pid__lt=pid))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = load(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.date, last.pid)
+
+    return KeysetPage(rows, next_cursor)
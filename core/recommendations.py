@@ -0,0 +1,162 @@
+# core/recommendations.py
+
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby, permutations
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from core.cards import ProductCard
+from core.models import CartOrderItems, ProductNeighbour
+
+# Neighbours kept per product
+TOP_N = 12
+# Shown on the product and cart pages
+DISPLAY_LIMIT = 6
+# Baskets with more distinct products than this are bulk/wholesale orders
+# and say little about what goes together; they are skipped
+MAX_BASKET = 50
+
+COPURCHASE = ProductNeighbour.KIND_COPURCHASE
+SIMILAR = ProductNeighbour.KIND_SIMILAR
+
+_CARD_COLUMNS = (
+    'neighbour__pid', 'neighbour__title', 'neighbour__price', 'neighbour__image',
+    'neighbour__date', 'neighbour__product_status',
+)
+
+
+def _published_neighbours(queryset):
+    return queryset.filter(neighbour__status=True, neighbour__product_status="published")
+
+
+def _cards(rows):
+    return [ProductCard(pid, title, price, image, None, date, status) for pid, title, price, image, date, status in rows]
+
+
+############################ Offline build ################################
+
+def paid_baskets(chunk_size=2000):
+    """Stream the distinct products of every paid order, one set per order."""
+    rows = (
+        CartOrderItems.objects
+        .filter(order__paid_status=True, product__isnull=False)
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, items in groupby(rows, key=itemgetter(0)):
+        basket = {product_id for _, product_id in items}
+        if 1 < len(basket) <= MAX_BASKET:
+            yield basket
+
+
+def co_occurrence(baskets):
+    """Sparse co-purchase matrix: {product: Counter({neighbour: orders with both})}."""
+    matrix = defaultdict(Counter)
+    for basket in baskets:
+        for a, b in permutations(basket, 2):
+            matrix[a][b] += 1
+    return matrix
+
+
+def top_neighbours(row, n=TOP_N):
+    """Highest counts first; ties go to the smaller id so rebuilds are stable."""
+    return heapq.nsmallest(n, row.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def rebuild_copurchase(batch_size=1000):
+    """Recompute every product's co-purchase neighbours from paid orders.
+    Returns the number of products that got neighbours."""
+    matrix = co_occurrence(paid_baskets())
+    rows = (
+        ProductNeighbour(product_id=pid, neighbour_id=other, kind=COPURCHASE, score=count, rank=rank)
+        for pid, row in matrix.items()
+        for rank, (other, count) in enumerate(top_neighbours(row))
+    )
+    with transaction.atomic():
+        ProductNeighbour.objects.filter(kind=COPURCHASE).delete()
+        ProductNeighbour.objects.bulk_create(rows, batch_size=batch_size)
+    return len(matrix)
+
+
+############################ Incremental update ################################
+
+def rerank(product_ids, kind):
+    """Re-number the neighbours of `product_ids` by score and drop the tail past TOP_N."""
+    rows = defaultdict(list)
+    for row in ProductNeighbour.objects.filter(product_id__in=product_ids, kind=kind):
+        rows[row.product_id].append(row)
+    changed, dropped = [], []
+    for product_rows in rows.values():
+        # existing rows win ties (new pairs arrive with rank TOP_N)
+        product_rows.sort(key=lambda r: (-r.score, r.rank, r.neighbour_id))
+        for rank, row in enumerate(product_rows):
+            if rank >= TOP_N:
+                dropped.append(row.pk)
+            elif row.rank != rank:
+                row.rank = rank
+                changed.append(row)
+    ProductNeighbour.objects.filter(pk__in=dropped).delete()
+    ProductNeighbour.objects.bulk_update(changed, ['rank'])
+
+
+def record_order(order):
+    """Fold one newly paid order into the stored neighbours.
+
+    Pairs already stored get +1. New pairs enter with a count of 1 even if
+    they were seen before and fell out of someone's top N, so between
+    rebuilds the scores are a close lower bound; rebuild_copurchase (the
+    rebuild_recommendations command) restores exact counts.
+    """
+    basket = set(
+        CartOrderItems.objects.filter(order=order, product__isnull=False).values_list('product_id', flat=True)
+    )
+    if not 1 < len(basket) <= MAX_BASKET:
+        return
+    with transaction.atomic():
+        stored = ProductNeighbour.objects.filter(kind=COPURCHASE, product_id__in=basket, neighbour_id__in=basket)
+        known = set(stored.values_list('product_id', 'neighbour_id'))
+        stored.update(score=F('score') + 1)
+        # an order committing at the same time may insert the same new pair
+        # first; its row then just keeps a score of 1 (lower bound, as above)
+        ProductNeighbour.objects.bulk_create(
+            (
+                ProductNeighbour(product_id=a, neighbour_id=b, kind=COPURCHASE, score=1, rank=TOP_N)
+                for a, b in permutations(basket, 2) if (a, b) not in known
+            ),
+            update_conflicts=True, unique_fields=['product', 'neighbour', 'kind'], update_fields=['score'],
+        )
+        rerank(basket, COPURCHASE)
+
+
+############################ Reading ################################
+
+def product_neighbours(product, kinds=(COPURCHASE, SIMILAR), limit=DISPLAY_LIMIT):
+    """Every recommendation block of a product page in one indexed read:
+    {kind: [ProductCard, ...]} in rank order."""
+    rows = _published_neighbours(
+        ProductNeighbour.objects.filter(product_id=product.pk, kind__in=kinds)
+    ).order_by('kind', 'rank').values_list('kind', *_CARD_COLUMNS)
+    neighbours = {kind: [] for kind in kinds}
+    for kind, *card in rows:
+        if len(neighbours[kind]) < limit:
+            neighbours[kind].extend(_cards([card]))
+    return neighbours
+
+
+def also_bought_for_cart(product_ids, limit=DISPLAY_LIMIT):
+    """Neighbours of everything in a cart, summed over the cart, minus what's in it."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    rows = (
+        _published_neighbours(ProductNeighbour.objects.filter(product_id__in=product_ids, kind=COPURCHASE))
+        .exclude(neighbour_id__in=product_ids)
+        .values(*_CARD_COLUMNS)
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'neighbour__pid')[:limit]
+    )
+    return _cards(tuple(row[c] for c in _CARD_COLUMNS) for row in rows)
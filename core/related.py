@@ -0,0 +1,132 @@
+# core/related.py
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.cards import ProductCard
+from core.models import Product, RelatedItem
+
+# Products shown per related block on the detail page
+RELATED_LIMIT = 6
+# Stored per group: one spare so the block stays full when the product being
+# viewed is itself one of the group's newest
+GROUP_SIZE = RELATED_LIMIT + 1
+
+_GROUP_FIELD = {
+    RelatedItem.KIND_SELLER: 'user_id',
+    RelatedItem.KIND_CATEGORY: 'category_id',
+}
+# The row each group hangs off; locking it serializes rebuilds of the group
+_GROUP_OWNER = {
+    RelatedItem.KIND_SELLER: Product.user.field.related_model,
+    RelatedItem.KIND_CATEGORY: Product.category.field.related_model,
+}
+# Everything that decides which groups a product is in and where it sorts
+GROUP_STATE_FIELDS = ('user_id', 'category_id', 'status', 'product_status', 'date')
+
+
+def _published():
+    return Product.objects.filter(status=True, product_status="published")
+
+
+def _qualifies(product):
+    return product.status and product.product_status == "published"
+
+
+def groups_for(product):
+    """The (kind, group_key) groups a product belongs to."""
+    return {(kind, str(getattr(product, field))) for kind, field in _GROUP_FIELD.items()}
+
+
+def group_state(product):
+    """The product's GROUP_STATE_FIELDS as loaded, or None if any is deferred."""
+    # read __dict__ so a deferred field isn't loaded just to be compared
+    values = product.__dict__
+    if not all(field in values for field in GROUP_STATE_FIELDS):
+        return None
+    return tuple(values[field] for field in GROUP_STATE_FIELDS)
+
+
+def rebuild_group(kind, group_key):
+    """Refill one group with its newest published products.
+
+    Two approvals for the same seller or category at once would each
+    delete the group and insert their own slots; the owner row is locked
+    first so the second waits, then reads the newest products including
+    the first one's. Slots are upserted all the same, so a writer that
+    slips past the lock (the owner was just deleted, or the database
+    ignores FOR UPDATE) overwrites a slot instead of failing the save.
+    """
+    with transaction.atomic():
+        list(_GROUP_OWNER[kind].objects.select_for_update().filter(pk=group_key).values_list('pk', flat=True))
+        newest = list(
+            _published().filter(**{_GROUP_FIELD[kind]: group_key})
+            .order_by('-date', '-pid').values_list('pid', flat=True)[:GROUP_SIZE]
+        )
+        RelatedItem.objects.filter(kind=kind, group_key=group_key).delete()
+        RelatedItem.objects.bulk_create(
+            [RelatedItem(kind=kind, group_key=group_key, position=i, product_id=pid)
+             for i, pid in enumerate(newest)],
+            update_conflicts=True, unique_fields=['kind', 'group_key', 'position'], update_fields=['product'],
+        )
+
+
+def refresh_for_product(product, created=False):
+    """Rebuild the groups a saved product is in, entered or left.
+
+    Only the seller, category, status, product_status and date decide
+    membership and order; a save that changed none of them (as remembered
+    by the post_init snapshot, see group_state) costs nothing. Titles and
+    prices are read through the join at display time.
+    """
+    before, after = getattr(product, '_related_state', None), group_state(product)
+    product._related_state = after
+    if not created and before is not None and before == after:
+        return
+    current = set(RelatedItem.objects.filter(product_id=product.pk).values_list('kind', 'group_key'))
+    wanted = groups_for(product) if _qualifies(product) else set()
+    for kind, group_key in current | wanted:
+        rebuild_group(kind, group_key)
+
+
+def refresh_after_delete(product):
+    # The product's slots are gone with it; refill its groups from the rest
+    for kind, group_key in groups_for(product):
+        rebuild_group(kind, group_key)
+
+
+def rebuild_all():
+    """Rebuild every group from scratch. Returns the number of groups."""
+    RelatedItem.objects.all().delete()
+    count = 0
+    for kind, field in _GROUP_FIELD.items():
+        for group_key in _published().order_by().values_list(field, flat=True).distinct():
+            rebuild_group(kind, str(group_key))
+            count += 1
+    return count
+
+
+def related_for(product, limit=RELATED_LIMIT):
+    """Both related blocks of a product page in one query.
+
+    Returns {'seller': [ProductCard, ...], 'category': [...]} excluding the
+    product itself.
+    """
+    rows = (
+        RelatedItem.objects
+        .filter(
+            Q(kind=RelatedItem.KIND_SELLER, group_key=str(product.user_id))
+            | Q(kind=RelatedItem.KIND_CATEGORY, group_key=str(product.category_id))
+        )
+        .exclude(product_id=product.pk)
+        .order_by('kind', 'position')
+        .values_list(
+            'kind', 'product__pid', 'product__title', 'product__price', 'product__image',
+            'product__date', 'product__product_status',
+        )
+    )
+    related = {kind: [] for kind in _GROUP_FIELD}
+    for kind, pid, title, price, image, date, status in rows:
+        if len(related[kind]) < limit:
+            related[kind].append(ProductCard(pid, title, price, image, None, date, status))
+    return related
@@ -0,0 +1,186 @@
+# core/search.py
+
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core.models import Product, ProductSearchDocument
+
+# Maximum number of ranked hits returned for a single query
+SEARCH_RESULT_LIMIT = 200
+
+# Highlight delimiters requested from the database; they are swapped for
+# <mark> tags only after the snippet text has been HTML-escaped.
+HIGHLIGHT_START = "⟦"
+HIGHLIGHT_STOP = "⟧"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    pid: str
+    rank: float
+    snippet: str = ""
+
+
+def render_snippet(raw):
+    """Escape a highlighted snippet and turn the delimiters into <mark> tags."""
+    if not raw:
+        return ""
+    html = escape(raw).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+    return mark_safe(html)
+
+
+class PostgresSearchBackend:
+    """tsvector/GIN backend: websearch syntax, ts_rank_cd ranking, ts_headline snippets."""
+
+    sql = """
+        SELECT d.product_id,
+               ts_rank_cd(d.search_vector, q.query) AS rank,
+               ts_headline('english', coalesce(nullif(d.body, ''), d.title), q.query,
+                           %s) AS snippet
+        FROM core_productsearchdocument d,
+             websearch_to_tsquery('english', %s) AS q(query)
+        WHERE d.search_vector @@ q.query
+        ORDER BY rank DESC, d.product_id
+        LIMIT %s
+    """
+    headline_options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=24, MinWords=10, MaxFragments=2"
+
+    def search(self, query, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql, [self.headline_options, query, limit])
+            return [SearchHit(pid, rank, snippet) for pid, rank, snippet in cursor.fetchall()]
+
+
+class SQLiteSearchBackend:
+    """FTS5 backend for local runs: prefix-matched terms, bm25 ranking, snippet()."""
+
+    # bm25() weights follow the column order: title, tags, body. Lower is better.
+    sql = """
+        SELECT d.product_id,
+               bm25(core_productsearch_fts, 10.0, 5.0, 1.0) AS score,
+               snippet(core_productsearch_fts, -1, %s, %s, '…', 16) AS snippet
+        FROM core_productsearch_fts
+        JOIN core_productsearchdocument d ON d.id = core_productsearch_fts.rowid
+        WHERE core_productsearch_fts MATCH %s
+        ORDER BY score
+        LIMIT %s
+    """
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every token so user input can never be parsed as FTS5 syntax,
+        # and prefix-match it so "geforc" still finds "GeForce".
+        tokens = TOKEN_RE.findall(query.lower())
+        return " ".join(f'"{t}"*' for t in tokens)
+
+    def search(self, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql, [HIGHLIGHT_START, HIGHLIGHT_STOP, expression, limit])
+            return [SearchHit(pid, -score, snippet) for pid, score, snippet in cursor.fetchall()]
+
+
+class SimpleSearchBackend:
+    """Fallback for databases without a full-text engine: every term must
+    appear somewhere in the document, title matches rank first."""
+
+    def search(self, query, limit):
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        docs = ProductSearchDocument.objects.all()
+        for t in tokens:
+            docs = docs.filter(Q(title__icontains=t) | Q(tags__icontains=t) | Q(body__icontains=t))
+        title_hits = Q()
+        for t in tokens:
+            title_hits |= Q(title__icontains=t)
+        docs = docs.annotate(
+            rank=Case(When(title_hits, then=2), default=1, output_field=IntegerField())
+        ).order_by('-rank', '-updated')
+        return [SearchHit(pid, rank) for pid, rank in docs.values_list('product_id', 'rank')[:limit]]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteSearchBackend()
+        else:
+            _backend = SimpleSearchBackend()
+    return _backend
+
+
+def search_products(query, limit=SEARCH_RESULT_LIMIT):
+    """Return SearchHits for published products matching `query`, best first."""
+    if not query or not query.strip():
+        return []
+    return get_backend().search(query.strip(), limit)
+
+
+def ranked_queryset(queryset, hits):
+    """Restrict `queryset` to the hit pids, ordered by rank."""
+    pids = [h.pid for h in hits]
+    if not pids:
+        return queryset.none()
+    order = Case(*[When(pid=pid, then=pos) for pos, pid in enumerate(pids)], output_field=IntegerField())
+    return queryset.filter(pid__in=pids).order_by(order)
+
+
+############################ Indexing ################################
+
+def is_searchable(product):
+    return product.status and product.product_status == "published"
+
+
+def index_product(product):
+    """Create, refresh or drop the search document for one product.
+    Only active, published products are kept in the index.
+    """
+    if not is_searchable(product):
+        ProductSearchDocument.objects.filter(product_id=product.pk).delete()
+        return
+
+    tag_names = product.tags.values_list('name', flat=True)
+    ProductSearchDocument.objects.update_or_create(
+        product_id=product.pk,
+        defaults={
+            'title': product.title,
+            'tags': " ".join(tag_names),
+            'body': "\n".join(filter(None, [product.description, product.specifications])),
+        },
+    )
+
+
+def rebuild_index(batch_size=500):
+    """Drop every search document and rebuild them from published products."""
+    ProductSearchDocument.objects.all().delete()
+    published = Product.objects.filter(status=True, product_status="published").prefetch_related('tags')
+    batch = []
+    count = 0
+    for p in published.iterator(chunk_size=batch_size):
+        batch.append(ProductSearchDocument(
+            product_id=p.pk,
+            title=p.title,
+            tags=" ".join(t.name for t in p.tags.all()),
+            body="\n".join(filter(None, [p.description, p.specifications])),
+        ))
+        if len(batch) >= batch_size:
+            ProductSearchDocument.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    ProductSearchDocument.objects.bulk_create(batch)
+    return count + len(batch)
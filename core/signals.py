@@ -1,11 +1,188 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
+from django.db import transaction
 from django.conf import settings
 from userauths.models import User
-from core.models import PTCCurrency
+from core.models import PTCCurrency, Product, Tags, Category, ProductImages, Vendor
+from core import search, related, dedup, media
+from core.images import ensure_renditions
+from core.uploads import run_in_background
+from core.catalog import bump_catalog_version, invalidate_catalog_lists
 from useradmin.decorators import custom_admin_required
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_currency(sender, instance, created, **kwargs):
     if created:
-        PTCCurrency.objects.create(user=instance, balance=100.0)  # Give 100 starting bucks
\ No newline at end of file
+        PTCCurrency.objects.create(user=instance, balance=100.0)  # Give 100 starting bucks
+
+
+# Keep the full-text search documents in step with the catalog. Deletes need
+# no handler: the document row cascades with its product.
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_product(instance)
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def index_product_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # tag.product_set.add(...) — reindex the products on the other side
+        products = Product.objects.filter(pk__in=pk_set or [])
+        for product in products:
+            search.index_product(product)
+    else:
+        search.index_product(instance)
+
+
+@receiver(post_save, sender=Tags)
+def reindex_tagged_products(sender, instance, created, raw=False, **kwargs):
+    # a renamed tag changes the text of every product carrying it
+    if created or raw:
+        return
+    for product in instance.product_set.filter(status=True, product_status="published"):
+        search.index_product(product)
+
+
+# Anything built from the catalog per process (fuzzy vocabulary, suggest
+# index, ...) keys off this version stamp; the changed row is journaled so
+# workers can refresh incrementally. Which tags a product carries is in
+# neither, so tag assignments don't bump it (an unjournaled bump would
+# force every worker into a full rebuild).
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_catalog_version(sender, instance.pk)
+
+
+# Cached tag cloud / category list / featured products (core/catalog.py) and
+# anonymous page cache (core/page_cache.py). Product changes — approval,
+# denial, edits, deletes — move tag counts, the featured list and pages.
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+def invalidate_tag_cloud(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_catalog_lists("tags", "facets", "pages")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_catalog_lists("categories", "facets", "pages")
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_lists(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_catalog_lists("tags", "featured", "facets", "pages")
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_tag_cloud_on_tags_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_catalog_lists("tags", "facets", "pages")
+
+
+# Precomputed "more from this seller / in this category" groups (core/related.py)
+@receiver(post_init, sender=Product)
+def remember_related_state(sender, instance, **kwargs):
+    instance._related_state = related.group_state(instance)
+
+
+@receiver(post_save, sender=Product)
+def refresh_related_items(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        related.refresh_for_product(instance, created=created)
+
+
+@receiver(post_delete, sender=Product)
+def refresh_related_items_on_delete(sender, instance, **kwargs):
+    related.refresh_after_delete(instance)
+
+
+# Near-duplicate listing fingerprints (core/dedup.py); buckets cascade on delete
+@receiver(post_save, sender=Product)
+def fingerprint_listing(sender, instance, raw=False, **kwargs):
+    if not raw:
+        dedup.fingerprint_product(instance)
+
+
+# Resized WebP/JPEG renditions of uploaded images (core/images.py)
+_IMAGE_FIELDS = dict(media.IMAGE_FIELDS)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImages)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Vendor)
+def render_uploaded_image(sender, instance, raw=False, **kwargs):
+    # off the save: even the "already rendered?" check may hit storage
+    field_file = getattr(instance, _IMAGE_FIELDS[sender])
+    if not raw and field_file:
+        transaction.on_commit(lambda: run_in_background(ensure_renditions, field_file))
+
+
+# Reference counts of content-addressed image files (core/media.py). The
+# name loaded from the database is remembered so a save can release it.
+_UNKNOWN = object()
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ""
+
+
+@receiver(post_init, sender=Product)
+@receiver(post_init, sender=ProductImages)
+@receiver(post_init, sender=Category)
+@receiver(post_init, sender=Vendor)
+def remember_image_name(sender, instance, **kwargs):
+    # read __dict__ so a deferred field isn't loaded for every instance
+    value = instance.__dict__.get(_IMAGE_FIELDS[sender], _UNKNOWN)
+    instance._stored_image_name = value if value is _UNKNOWN else _file_name(value)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=ProductImages)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Vendor)
+def load_stored_image_name(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or getattr(instance, '_stored_image_name', _UNKNOWN) is not _UNKNOWN:
+        return
+    field = _IMAGE_FIELDS[sender]
+    instance._stored_image_name = _file_name(
+        sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImages)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Vendor)
+def count_image_references(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    field = _IMAGE_FIELDS[sender]
+    if raw or (update_fields is not None and field not in update_fields):
+        return
+    new = _file_name(getattr(instance, field))
+    old = "" if created else getattr(instance, '_stored_image_name', "")
+    if new != old:
+        media.acquire(new)
+        media.release(old)
+    instance._stored_image_name = new
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductImages)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Vendor)
+def release_image_reference(sender, instance, **kwargs):
+    media.release(_file_name(instance.__dict__.get(_IMAGE_FIELDS[sender])))
@@ -0,0 +1,317 @@
+# core/similarity.py
+
+import fcntl
+import json
+import logging
+import math
+import os
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from core.fuzzy import tokenize
+from core.models import Product, ProductNeighbour
+from core.recommendations import TOP_N, rerank
+
+logger = logging.getLogger(__name__)
+
+# Width of the hashed feature space. Tokens are hashed into DIM buckets so
+# the vocabulary never has to be stored and a single product can be
+# vectorized on its own. A second hash bit picks the sign, so colliding
+# tokens cancel out on average instead of always adding up.
+DIM = 2048
+# Title words say more about what a product is than its spec sheet
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'description': 1.0, 'specifications': 1.0}
+# Rows scored per matrix product in rebuild_similar (BATCH_SIZE x N floats)
+BATCH_SIZE = 512
+# Pairs less similar than this are not worth recommending
+MIN_SIMILARITY = 0.1
+# Products re-ranked when one product's vector changes
+MAX_REVERSE_UPDATES = 200
+
+SIMILAR = ProductNeighbour.KIND_SIMILAR
+# "No description provided" and friends would make every unfilled listing look alike
+PLACEHOLDERS = {Product._meta.get_field(f).default for f in ('description', 'specifications')}
+LOCK_FILE = "index.lock"
+
+
+def index_dir():
+    """Where the vector matrix lives (SIMILARITY_INDEX_DIR, default var/similarity)."""
+    return Path(getattr(settings, 'SIMILARITY_INDEX_DIR', settings.BASE_DIR / 'var' / 'similarity'))
+
+
+############################ Vectorizing ################################
+
+def _bucket(token):
+    """(bucket, sign) of a token."""
+    h = zlib.crc32(token.encode())
+    return h % DIM, 1.0 if (h // DIM) & 1 else -1.0
+
+
+def term_counts(fields):
+    """Field-weighted hashed term counts of one product: {(bucket, sign): weight}."""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = fields.get(field) or ''
+        if text in PLACEHOLDERS:
+            continue
+        for token in tokenize(text):
+            if len(token) > 1:
+                counts[_bucket(token)] += weight
+    return counts
+
+
+def to_vector(counts, idf):
+    """Sublinear TF x IDF, L2-normalized, as a dense float32 row."""
+    vector = np.zeros(DIM, dtype=np.float32)
+    for (bucket, sign), tf in counts.items():
+        vector[bucket] += sign * (1.0 + math.log(tf)) * idf[bucket]
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def _documents(queryset, chunk_size=2000):
+    """Yield (pid, fields) for each product, tags joined into one field."""
+    rows = queryset.order_by('pid').values_list('pid', 'title', 'description', 'specifications')
+    through = Product.tags.through.objects
+    batch = []
+
+    def flush():
+        tags = {}
+        pairs = through.filter(product_id__in=[r[0] for r in batch]).values_list('product_id', 'tags__name')
+        for pid, name in pairs:
+            tags.setdefault(pid, []).append(name)
+        for pid, title, description, specifications in batch:
+            yield pid, {
+                'title': title, 'description': description, 'specifications': specifications,
+                'tags': " ".join(tags.get(pid, ())),
+            }
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield from flush()
+            batch = []
+    if batch:
+        yield from flush()
+
+
+############################ Vector store ################################
+# <dir>/meta.json           {"matrix": <file>, "idf": <file>, "pids": [...]}
+#                           pids[i] is the product stored in matrix row i
+# <dir>/vectors-<stamp>.f32 N x DIM float32, opened with np.memmap
+# <dir>/idf-<stamp>.npy     IDF weight per bucket, from the last full rebuild
+# A rebuild writes new matrix/idf files and then swaps meta.json in one
+# os.replace, so readers never see a half-written or mismatched index.
+
+class VectorStore:
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.meta = meta
+        self.pids = meta['pids']
+        self.rows = {pid: i for i, pid in enumerate(self.pids)}
+        self.idf = np.load(directory / meta['idf'])
+
+    @classmethod
+    def open(cls, directory=None):
+        directory = Path(directory or index_dir())
+        try:
+            return cls(directory, json.loads((directory / 'meta.json').read_text()))
+        except FileNotFoundError:
+            return None
+
+    def matrix(self, mode='r'):
+        if not self.pids:
+            return np.zeros((0, DIM), dtype=np.float32)
+        return np.memmap(self.directory / self.meta['matrix'], dtype=np.float32, mode=mode, shape=(len(self.pids), DIM))
+
+    def put(self, pid, vector):
+        """Overwrite a product's row, or append one; returns the row number."""
+        row = self.rows.get(pid)
+        if row is not None:
+            matrix = self.matrix('r+')
+            matrix[row] = vector
+            matrix.flush()
+            return row
+        with open(self.directory / self.meta['matrix'], 'ab') as f:
+            f.write(vector.astype(np.float32).tobytes())
+        self.pids.append(pid)
+        self.rows[pid] = row = len(self.pids) - 1
+        _write_json(self.directory / 'meta.json', self.meta)
+        return row
+
+
+def _write_json(path, data):
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def build_store(directory=None):
+    """Vectorize every published product into a fresh matrix file."""
+    directory = Path(directory or index_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+
+    published = Product.objects.filter(status=True, product_status="published")
+    pids, docs = [], []
+    df = np.zeros(DIM, dtype=np.int64)
+    for pid, fields in _documents(published):
+        counts = term_counts(fields)
+        pids.append(pid)
+        docs.append(counts)
+        df[list({bucket for bucket, _ in counts})] += 1
+    # a term every product has carries no information and weighs 0
+    idf = np.log((1 + len(docs)) / (1 + df)).astype(np.float32)
+
+    stamp = time.time_ns()
+    matrix_name, idf_name = f"vectors-{stamp}.f32", f"idf-{stamp}.npy"
+    np.save(directory / idf_name, idf)
+    if docs:
+        matrix = np.memmap(directory / matrix_name, dtype=np.float32, mode='w+', shape=(len(docs), DIM))
+        for i, counts in enumerate(docs):
+            matrix[i] = to_vector(counts, idf)
+        matrix.flush()
+        del matrix
+    else:
+        (directory / matrix_name).touch()
+
+    old = VectorStore.open(directory)
+    _write_json(directory / 'meta.json', {'matrix': matrix_name, 'idf': idf_name, 'pids': pids})
+    if old is not None:
+        for name in (old.meta['matrix'], old.meta['idf']):
+            try:
+                os.remove(directory / name)
+            except OSError:
+                pass
+    return VectorStore.open(directory)
+
+
+############################ Neighbours ################################
+
+def _top_k(sims, k):
+    """Indices of the k largest entries of each row, best first."""
+    k = min(k, sims.shape[1])
+    if k <= 0:
+        return np.zeros((sims.shape[0], 0), dtype=np.intp)
+    part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(sims, part, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(part, order, axis=1)
+
+
+def rebuild_similar(batch_size=BATCH_SIZE, directory=None):
+    """Re-vectorize the catalog and store every product's most similar products.
+
+    Cosine similarity is a dot product of the normalized rows, computed for
+    `batch_size` products at a time against the whole memory-mapped matrix.
+    Returns the number of products vectorized.
+    """
+    # held until the new lists are written: an update_product in between
+    # would have its rows deleted with the old lists below
+    with _index_lock(directory) as locked:
+        if not locked:
+            raise RuntimeError("Similarity index is locked by another update")
+        store = build_store(directory)
+        matrix = np.asarray(store.matrix())
+        n = len(store.pids)
+        neighbours = []
+        for start in range(0, n, batch_size):
+            stop = min(start + batch_size, n)
+            sims = matrix[start:stop] @ matrix.T
+            sims[np.arange(stop - start), np.arange(start, stop)] = -1.0
+            for offset, top in enumerate(_top_k(sims, TOP_N)):
+                pid = store.pids[start + offset]
+                rank = 0
+                for j in top:
+                    score = float(sims[offset, j])
+                    if score < MIN_SIMILARITY:
+                        break
+                    neighbours.append(ProductNeighbour(
+                        product_id=pid, neighbour_id=store.pids[j], kind=SIMILAR, score=score, rank=rank,
+                    ))
+                    rank += 1
+        with transaction.atomic():
+            ProductNeighbour.objects.filter(kind=SIMILAR).delete()
+            ProductNeighbour.objects.bulk_create(neighbours, batch_size=1000)
+    return n
+
+
+@contextmanager
+def _index_lock(directory=None, timeout=10.0):
+    """One writer at a time: appends and rebuilds both touch the matrix files.
+
+    An flock on a file in the index directory, so it holds across every
+    process (web workers, background threads, management commands) that
+    shares the directory; the kernel drops it if the holder dies. Yields
+    False if it couldn't be taken within `timeout` seconds.
+    """
+    directory = Path(directory or index_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK_FILE, 'a') as lock_file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    yield False
+                    return
+                time.sleep(0.1)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_product(pid, directory=None):
+    """Re-vectorize one product (e.g. on approval) and refresh its neighbours.
+
+    The product's row is rewritten (or appended) in the matrix with the IDF
+    of the last rebuild; its own similar list is replaced, and it is offered
+    to the MAX_REVERSE_UPDATES products it is closest to, whose lists are
+    re-ranked. Products further away pick it up at the next rebuild.
+    """
+    product = Product.objects.filter(pid=pid, status=True, product_status="published").first()
+    if product is None:
+        return
+    with _index_lock(directory) as locked:
+        if not locked:
+            logger.warning("Similarity index busy; %s will be picked up by the next rebuild", pid)
+            return
+        store = VectorStore.open(directory)
+        if store is None:
+            store = build_store(directory)
+        _, fields = next(_documents(Product.objects.filter(pid=pid)))
+        vector = to_vector(term_counts(fields), store.idf)
+        row = store.put(pid, vector)
+
+        sims = np.asarray(store.matrix()) @ vector
+        sims[row] = -1.0
+        order = np.argsort(-sims)
+        close = [j for j in order[:max(TOP_N, MAX_REVERSE_UPDATES)] if sims[j] >= MIN_SIMILARITY]
+        # rows of products deleted since the last rebuild are still in the matrix
+        alive = set(Product.objects.filter(pid__in=[store.pids[j] for j in close]).values_list('pid', flat=True))
+        close = [j for j in close if store.pids[j] in alive]
+
+        with transaction.atomic():
+            ProductNeighbour.objects.filter(product_id=pid, kind=SIMILAR).delete()
+            ProductNeighbour.objects.bulk_create(
+                ProductNeighbour(product_id=pid, neighbour_id=store.pids[j], kind=SIMILAR, score=float(sims[j]), rank=rank)
+                for rank, j in enumerate(close[:TOP_N])
+            )
+            others = {store.pids[j]: float(sims[j]) for j in close}
+            ProductNeighbour.objects.filter(product_id__in=others, neighbour_id=pid, kind=SIMILAR).delete()
+            ProductNeighbour.objects.bulk_create(
+                ProductNeighbour(product_id=other, neighbour_id=pid, kind=SIMILAR, score=score, rank=TOP_N)
+                for other, score in others.items()
+            )
+            rerank(list(others), SIMILAR)
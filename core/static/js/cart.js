@@ -1,33 +1,98 @@
-// Example for Remove or Quantity buttons
-document.querySelectorAll(".cart-item-button").forEach(button => {
-  button.addEventListener("click", function() {
-    const itemId = this.dataset.itemId;  // Make sure your buttons have data-item-id attribute
-    const action = this.dataset.action;  // e.g., "increase", "decrease", "remove"
+// Cart quantity buttons. Clicks update the row right away and are queued;
+// once the user pauses for FLUSH_DELAY ms, every queued change goes to the
+// server in one request to the batch endpoint (cart_batch_view), as the
+// target quantity per line. The server's answer then overwrites the rows.
+const FLUSH_DELAY = 400;
 
-    fetch(`/cart/update/${itemId}/`, {
+document.addEventListener("DOMContentLoaded", function() {
+  const table = document.querySelector(".cart-table");
+  if (!table) return;
+
+  const pending = new Map();  // item id -> target quantity
+  let timer = null;
+  let inFlight = false;
+
+  function row(itemId) {
+    return document.getElementById(`cart-item-${itemId}`);
+  }
+
+  function showLine(itemId, qty, itemTotal) {
+    const tr = row(itemId);
+    if (!tr) return;
+    if (qty <= 0) {
+      tr.remove();
+      return;
+    }
+    tr.querySelector(".item-qty").textContent = qty;
+    tr.querySelector(".item-total").textContent = Number(itemTotal).toFixed(2);
+  }
+
+  function showTotals(cartTotal, cartCount) {
+    document.querySelector("#cart-total").textContent = Number(cartTotal).toFixed(2);
+    const countElem = document.getElementById("cart-count");
+    if (countElem) countElem.textContent = cartCount;
+  }
+
+  function flush() {
+    timer = null;
+    if (inFlight || pending.size === 0) return;
+    // item ids are cart line ids, or product ids in a guest cart
+    const operations = Array.from(pending, ([itemId, qty]) => ({ item_id: itemId, qty: qty }));
+    pending.clear();
+    inFlight = true;
+
+    fetch(table.dataset.batchUrl, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
-        "X-CSRFToken": getCookie("csrftoken")  // CSRF token helper function
+        "X-CSRFToken": getCookie("csrftoken")
       },
-      body: JSON.stringify({ action: action })
+      body: JSON.stringify({ operations: operations }),
+      keepalive: true  // lets a batch sent while leaving the page complete
     })
     .then(response => response.json())
     .then(data => {
-      if (data.success) {
-        // Update the UI: qty, item total, cart total, etc.
-        if (data.removed) {
-          document.getElementById(`cart-item-${itemId}`).remove();
-        } else {
-          document.querySelector(`#cart-item-${itemId} .item-qty`).textContent = data.qty;
-          document.querySelector(`#cart-item-${itemId} .item-total`).textContent = data.item_total.toFixed(2);
-        }
-        document.querySelector("#cart-total").textContent = data.cart_total.toFixed(2);
-      } else {
-        console.error(data.error);
-      }
+      if (!data.success) throw new Error(data.error);
+      // lines clicked again while this request was out keep their newer value
+      data.items.forEach(item => {
+        if (!pending.has(String(item.item_id))) showLine(item.item_id, item.qty, item.item_total);
+      });
+      data.removed.concat(data.missing).forEach(itemId => showLine(itemId, 0, 0));
+      showTotals(data.cart_total, data.cart_count);
+    })
+    .catch(error => console.error("Error updating cart:", error))
+    .finally(() => {
+      inFlight = false;
+      if (pending.size) schedule();
     });
+  }
+
+  function schedule() {
+    clearTimeout(timer);
+    timer = setTimeout(flush, FLUSH_DELAY);
+  }
+
+  table.addEventListener("click", function(event) {
+    const button = event.target.closest(".cart-item-button");
+    if (!button) return;
+    const itemId = button.dataset.itemId;
+    const tr = row(itemId);
+    const current = pending.has(itemId) ? pending.get(itemId) : Number(tr.querySelector(".item-qty").textContent);
+    const target = {
+      increase: current + 1,
+      decrease: current - 1,
+      remove: 0
+    }[button.dataset.action];
+
+    pending.set(itemId, Math.max(target, 0));
+    // optimistic: show the new quantity now, the server confirms it later
+    const price = Number(tr.querySelector(".item-total").dataset.price);
+    showLine(itemId, target, price * target);
+    schedule();
   });
+
+  // don't lose the last clicks when the user navigates away
+  window.addEventListener("pagehide", flush);
 });
 
 // CSRF helper
@@ -0,0 +1,34 @@
+// "Load more" for the storefront grid: fetches the next keyset page as an
+// HTML fragment and appends it. The server sends the cursor for the page
+// after that in the X-Next-Cursor header (missing on the last page).
+document.addEventListener("DOMContentLoaded", function() {
+  const button = document.getElementById("load-more");
+  const grid = document.getElementById("product-grid");
+  if (!button || !grid) return;
+
+  button.addEventListener("click", function() {
+    const params = new URLSearchParams(window.location.search);
+    params.set("cursor", button.dataset.cursor);
+    button.disabled = true;
+
+    fetch(`${button.dataset.url}?${params.toString()}`)
+    .then(response => {
+      if (!response.ok) throw new Error("Network response was not ok");
+      const next = response.headers.get("X-Next-Cursor");
+      return response.text().then(html => ({ html, next }));
+    })
+    .then(({ html, next }) => {
+      grid.insertAdjacentHTML("beforeend", html);
+      if (next) {
+        button.dataset.cursor = next;
+        button.disabled = false;
+      } else {
+        button.remove();
+      }
+    })
+    .catch(error => {
+      console.error("Error loading more products:", error);
+      button.disabled = false;
+    });
+  });
+});
@@ -0,0 +1,50 @@
+// Type-ahead for search boxes marked with data-suggest-url. Keystrokes are
+// debounced and answered from /search/suggest/, which is served from an
+// in-memory index on the server.
+document.addEventListener("DOMContentLoaded", function() {
+  document.querySelectorAll("input[data-suggest-url]").forEach(input => {
+    const list = document.createElement("ul");
+    list.className = "absolute z-10 bg-white border rounded shadow w-64 hidden";
+    input.parentNode.style.position = "relative";
+    input.insertAdjacentElement("afterend", list);
+
+    let timer = null;
+    let lastQuery = "";
+
+    input.addEventListener("input", function() {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        const q = input.value.trim();
+        if (q === lastQuery) return;
+        lastQuery = q;
+        if (q.length < 2) {
+          list.classList.add("hidden");
+          return;
+        }
+        fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(q)}`)
+        .then(response => response.json())
+        .then(data => {
+          if (data.query.trim() !== lastQuery) return;  // stale response
+          list.innerHTML = "";
+          data.suggestions.forEach(s => {
+            const li = document.createElement("li");
+            const a = document.createElement("a");
+            a.href = s.url;
+            a.textContent = s.label;
+            a.className = "block px-3 py-1 hover:bg-gray-100";
+            const kind = document.createElement("span");
+            kind.textContent = ` ${s.kind}`;
+            kind.className = "text-xs text-gray-400";
+            a.appendChild(kind);
+            li.appendChild(a);
+            list.appendChild(li);
+          });
+          list.classList.toggle("hidden", data.suggestions.length === 0);
+        })
+        .catch(error => console.error("Error fetching suggestions:", error));
+      }, 150);
+    });
+
+    input.addEventListener("blur", () => setTimeout(() => list.classList.add("hidden"), 200));
+  });
+});
@@ -0,0 +1,84 @@
+# core/storage.py
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Every upload under these directories (the upload_to of Product, ProductImages,
+# Category and Vendor images) is stored once, by content, under BLOB_ROOT
+CONTENT_ADDRESSED_DIRS = ('product_images', 'category_images')
+BLOB_ROOT = 'images'
+BLOB_NAME = re.compile(rf"^{BLOB_ROOT}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.[a-z0-9]+)?$")
+
+
+def is_blob(name):
+    return bool(name) and BLOB_NAME.match(name) is not None
+
+
+def blob_name(digest, ext):
+    """images/ab/cd/abcd...ef.png: two levels of 256 directories keep each
+    directory small no matter how many images there are."""
+    return f"{BLOB_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names uploads by the SHA-256 of their content.
+
+    Saving a file identical to one already stored writes nothing and returns
+    the existing name, so models share one copy; core/media.py counts the
+    references. Files outside CONTENT_ADDRESSED_DIRS (renditions, staging,
+    the default image) are saved and named as usual.
+    """
+
+    def __init__(self, content_addressed_dirs=CONTENT_ADDRESSED_DIRS, **kwargs):
+        super().__init__(**kwargs)
+        self.content_addressed_dirs = tuple(content_addressed_dirs)
+
+    def is_content_addressed(self, name):
+        return name.replace('\\', '/').split('/', 1)[0] in self.content_addressed_dirs
+
+    def _save(self, name, content):
+        if not self.is_content_addressed(name):
+            return super()._save(name, content)
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        # hash while copying to a temp file, so the upload is read only once
+        tmp_dir = self.path('.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+        ext = posixpath.splitext(name)[1].lower()
+        target = blob_name(digest.hexdigest(), ext)
+        full_path = self.path(target)
+
+        if os.path.exists(full_path):
+            os.remove(tmp.name)
+            # a fresh mtime keeps a re-uploaded blob out of the orphan sweep's grace window
+            os.utime(full_path)
+            return target
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        # concurrent saves of the same content race harmlessly: both files are identical
+        file_move_safe(tmp.name, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return target
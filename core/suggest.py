@@ -0,0 +1,185 @@
+# core/suggest.py
+
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from core.catalog import changes_since, get_catalog_version
+from core.models import Category, Product, Tags
+
+logger = logging.getLogger(__name__)
+
+Suggestion = namedtuple('Suggestion', 'kind pk label url')
+
+# Display order when several kinds match equally well
+KIND_ORDER = {'category': 0, 'tag': 1, 'product': 2}
+# Matches examined per query before ranking; bounds the work per keystroke
+SCAN_LIMIT = 200
+
+
+def _word_starts(text):
+    """Yield (position, suffix) for the start of every word in `text`."""
+    text = text.lower()
+    for i, ch in enumerate(text):
+        if ch.isalnum() and (i == 0 or not text[i - 1].isalnum()):
+            yield i, text[i:]
+
+
+class PrefixIndex:
+    """Sorted array of (suffix, kind, pk) keys searched with bisect.
+
+    Every word of a label gets a key, so "rtx" finds "NVIDIA RTX 3080".
+    A lookup is a binary search plus a scan over the matching run only.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, suggestion):
+        entry_id = (suggestion.kind, suggestion.pk)
+        if entry_id in self._entries:
+            self.remove(entry_id)
+        self._entries[entry_id] = suggestion
+        for pos, suffix in _word_starts(suggestion.label):
+            insort(self._keys, (suffix, suggestion.kind, suggestion.pk, pos))
+
+    def bulk_load(self, suggestions):
+        for s in suggestions:
+            self._entries[(s.kind, s.pk)] = s
+            self._keys.extend((suffix, s.kind, s.pk, pos) for pos, suffix in _word_starts(s.label))
+        self._keys.sort()
+
+    def remove(self, entry_id):
+        suggestion = self._entries.pop(entry_id, None)
+        if suggestion is None:
+            return
+        for pos, suffix in _word_starts(suggestion.label):
+            key = (suffix, suggestion.kind, suggestion.pk, pos)
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def search(self, prefix, limit=8):
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+        best = {}
+        i = bisect_left(self._keys, (prefix,))
+        scanned = 0
+        while i < len(self._keys) and scanned < SCAN_LIMIT:
+            suffix, kind, pk, pos = self._keys[i]
+            if not suffix.startswith(prefix):
+                break
+            entry_id = (kind, pk)
+            # rank: label starts with the prefix, then kind, then shorter labels
+            rank = (pos > 0, KIND_ORDER[kind], len(self._entries[entry_id].label))
+            if entry_id not in best or rank < best[entry_id]:
+                best[entry_id] = rank
+            i += 1
+            scanned += 1
+        ranked = sorted(best, key=best.get)[:limit]
+        return [self._entries[e] for e in ranked]
+
+
+############################ Loading ################################
+
+def _search_url(**params):
+    return f"{reverse('core:search')}?{urlencode(params)}"
+
+
+def product_suggestions(queryset):
+    for pid, title in queryset.values_list('pid', 'title').iterator(chunk_size=2000):
+        yield Suggestion('product', pid, title, reverse('core:product_detail', args=[pid]))
+
+
+def tag_suggestions(queryset):
+    for pk, name, slug in queryset.values_list('pk', 'name', 'slug'):
+        yield Suggestion('tag', pk, name, _search_url(tag=slug))
+
+
+def category_suggestions(queryset):
+    for cid, title in queryset.values_list('cid', 'title'):
+        yield Suggestion('category', cid, title, _search_url(q=title))
+
+
+def published_products():
+    return Product.objects.filter(status=True, product_status="published")
+
+
+def build_index():
+    index = PrefixIndex()
+    index.bulk_load(product_suggestions(published_products()))
+    index.bulk_load(tag_suggestions(Tags.objects.all()))
+    index.bulk_load(category_suggestions(Category.objects.all()))
+    return index
+
+
+# How each journaled model is re-read; rows that no longer qualify (deleted,
+# unpublished) simply aren't returned and get dropped from the index.
+_LOADERS = {
+    'core.product': ('product', lambda pks: product_suggestions(published_products().filter(pk__in=pks))),
+    'core.tags': ('tag', lambda pks: tag_suggestions(Tags.objects.filter(pk__in=pks))),
+    'core.category': ('category', lambda pks: category_suggestions(Category.objects.filter(pk__in=pks))),
+}
+
+
+def apply_changes(index, changes):
+    by_model = {}
+    for label, pk in changes:
+        if label in _LOADERS:
+            by_model.setdefault(label, set()).add(pk)
+    for label, pks in by_model.items():
+        kind, load = _LOADERS[label]
+        for pk in pks:
+            index.remove((kind, pk))
+        for suggestion in load(pks):
+            index.add(suggestion)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_index():
+    """Per-process PrefixIndex kept current with the catalog version stamp.
+
+    Normally a keystroke costs one cache read. When the stamp has moved, only
+    the journaled rows are re-read; a full rebuild happens on first use or
+    when the journal can't cover the gap.
+    """
+    global _index, _index_version
+    version = get_catalog_version()
+    if _index is not None and _index_version == version:
+        return _index
+    with _lock:
+        if _index is None:
+            _index = build_index()
+        elif _index_version != version:
+            changes = changes_since(_index_version, version)
+            if changes is None:
+                _index = build_index()
+            else:
+                apply_changes(_index, changes)
+        _index_version = version
+    return _index
+
+
+def warm_index():
+    """Build the index at worker start so the first keystrokes are fast."""
+    try:
+        get_index()
+    except Exception:
+        logger.exception("Could not build the search suggestion index at startup")
+
+
+def suggest(prefix, limit=8):
+    return get_index().search(prefix, limit)
@@ -0,0 +1,45 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.images import PLACEHOLDER_SRC, RENDITION_WIDTHS, is_staged, renditions_ready, rendition_name, srcset
+
+register = template.Library()
+
+# Grid tiles are a quarter of the page on desktop and half on phones
+DEFAULT_SIZES = "(min-width: 768px) 25vw, 50vw"
+
+
+@register.simple_tag
+def responsive_image(image, alt="", sizes=DEFAULT_SIZES, **attrs):
+    """<picture> with WebP and JPEG srcsets of an image's renditions.
+
+    `image` is an ImageField file or a storage name (e.g. ProductCard.image).
+    Extra keyword arguments (class, style, ...) go on the <img>. Uploads still
+    being processed show a placeholder; images whose renditions haven't been
+    generated yet fall back to the original.
+
+        {% responsive_image product.image alt=product.title class="h-40 w-full" %}
+    """
+    name = getattr(image, 'name', image)
+    if not name:
+        return ""
+    storage = getattr(image, 'storage', default_storage)
+    attrs = flatatt(attrs)
+    if is_staged(name):
+        return format_html('<img src="{}" alt="{}"{} data-processing="1">', PLACEHOLDER_SRC, alt, attrs)
+    if not renditions_ready(name, storage):
+        return format_html(
+            '<img src="{}" alt="{}"{} loading="lazy" decoding="async">',
+            storage.url(name), alt, attrs,
+        )
+    fallback = storage.url(rendition_name(name, RENDITION_WIDTHS[-2], 'jpg'))
+    return format_html(
+        '<picture style="display:contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="lazy" decoding="async">'
+        '</picture>',
+        srcset(name, 'webp', storage), sizes,
+        fallback, srcset(name, 'jpg', storage), sizes, alt, attrs,
+    )
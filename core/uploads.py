@@ -0,0 +1,260 @@
+# core/uploads.py
+
+import io
+import logging
+import posixpath
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import SkipFile, StopUpload, TemporaryFileUploadHandler
+from django.db import close_old_connections, transaction
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from core import media
+from core.catalog import invalidate_catalog_lists
+from core.images import STAGING_ROOT, generate_renditions, is_staged
+from core.models import Product, ProductImages
+
+logger = logging.getLogger(__name__)
+
+# Threads that process uploads; Pillow releases the GIL while decoding and
+# resizing, so a few threads keep up without blocking request workers.
+# Similar-product index updates (core/similarity.py) run on them too.
+# 0 processes inline when the transaction commits (tests, management commands).
+IMAGE_WORKERS = getattr(settings, 'IMAGE_WORKERS', 2)
+# Longest side kept from an upload; phone photos are 4000px+
+MAX_IMAGE_DIMENSION = getattr(settings, 'MAX_IMAGE_DIMENSION', 2048)
+# Gallery upload limits, checked while the request body streams in
+MAX_UPLOAD_FILE_SIZE = 10 * 1024 * 1024
+MAX_UPLOAD_REQUEST_SIZE = 50 * 1024 * 1024
+MAX_GALLERY_FILES = 12
+ACCEPTED_CONTENT_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif'}
+# Formats written back as themselves; anything else becomes PNG
+OUTPUT_FORMATS = {'JPEG': 'jpg', 'MPO': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+PROCESSING, READY, FAILED = "processing", "ready", "failed"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='image-upload')
+        return _executor
+
+
+def looks_like_image(uploaded_file):
+    """Cheap header check for the request path; the full decode happens in the worker."""
+    try:
+        with Image.open(uploaded_file) as img:
+            ok = img.format is not None
+    except (OSError, ValueError, Image.DecompressionBombError):
+        ok = False
+    uploaded_file.seek(0)
+    return ok
+
+
+def stage_upload(uploaded_file, storage=None):
+    """Store an upload as-is under staging/ and return its storage name."""
+    storage = storage or Product._meta.get_field('image').storage
+    filename = posixpath.basename(uploaded_file.name)
+    return storage.save(f"{STAGING_ROOT}/{uuid.uuid4().hex}-{filename}", uploaded_file)
+
+
+def attach_upload(product, uploaded_file):
+    """Point a product at a staged upload; process it once the save commits.
+
+    Call before product.save(). Until the worker is done, listings show a
+    placeholder (see core.images.is_staged).
+    """
+    product.image.name = stage_upload(uploaded_file)
+    product.image_status = PROCESSING
+    transaction.on_commit(lambda: schedule(product.pk))
+
+
+def schedule(pid):
+    run_in_background(process_product_image, pid)
+
+
+def run_in_background(func, *args):
+    if getattr(settings, 'IMAGE_WORKERS', IMAGE_WORKERS) > 0:
+        _get_executor().submit(_run, func, *args)
+    else:
+        func(*args)
+
+
+def _run(func, *args):
+    # worker threads get their own DB connections; don't leave them open
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Background job %s%r failed", func.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def normalize_image(data):
+    """Fully decode an upload, apply and drop its EXIF orientation, strip all
+    metadata and cap it at MAX_IMAGE_DIMENSION. Returns (bytes, extension);
+    raises OSError/ValueError for anything that isn't a valid image."""
+    with Image.open(io.BytesIO(data)) as img:
+        img.verify()
+    img = Image.open(io.BytesIO(data))
+    fmt = img.format
+    img.draft('RGB', (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+
+    ext = OUTPUT_FORMATS.get(fmt, 'png')
+    pil_format = 'JPEG' if ext == 'jpg' else ext.upper()
+    if pil_format == 'JPEG' and img.mode != 'RGB':
+        img = img.convert('RGB')
+    elif pil_format != 'JPEG' and img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA')
+    out = io.BytesIO()
+    # no exif=/icc_profile= arguments: Pillow writes no metadata unless asked
+    img.save(out, pil_format, quality=90, optimize=True)
+    return out.getvalue(), ext
+
+
+def process_staged_file(staged, storage, field):
+    """Normalize one staged upload into `field`'s upload directory and
+    render its renditions. Returns the stored name, or None (logged) if
+    the upload isn't a valid image."""
+    try:
+        with storage.open(staged, 'rb') as f:
+            data, ext = normalize_image(f.read())
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning("Rejected upload %s: %s", staged, exc)
+        return None
+    # staging/<hex>-<original name> -> product_images/<original stem>.<ext>,
+    # which the storage turns into its content-addressed name
+    stem = posixpath.splitext(posixpath.basename(staged))[0].partition('-')[2]
+    final = storage.save(field.generate_filename(None, f"{stem}.{ext}"), ContentFile(data))
+    generate_renditions(final, storage=storage)
+    return final
+
+
+def process_product_image(pid):
+    """Check, clean and resize a product's staged upload, move it into
+    product_images/ and render its renditions.
+
+    A corrupt upload falls back to the default image with image_status
+    "failed". If the product got another upload meanwhile, this result is
+    thrown away and the newer job wins.
+    """
+    product = Product.objects.filter(pid=pid).only('image').first()
+    if product is None or not is_staged(product.image.name):
+        return
+    staged = product.image.name
+    storage = product.image.storage
+    field = Product._meta.get_field('image')
+
+    final = process_staged_file(staged, storage, field)
+    if final is None:
+        final, status = field.default, FAILED
+    else:
+        status = READY
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().filter(pid=pid).first()
+        current = product is not None and product.image.name == staged
+        if current:
+            product.image.name = final
+            product.image_status = status
+            product.save(update_fields=['image', 'image_status', 'updated'])
+    # a superseded result is not deleted here: content-addressed files may be
+    # shared, so unreferenced ones are left to the orphan sweep
+    storage.delete(staged)
+
+
+############################ Gallery uploads ################################
+
+def max_gallery_files():
+    """Images accepted per gallery upload (MAX_GALLERY_FILES setting)."""
+    return getattr(settings, 'MAX_GALLERY_FILES', MAX_GALLERY_FILES)
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Stream every uploaded file to a temp file, chunk by chunk, enforcing
+    the gallery limits as the body arrives.
+
+    An oversized request is cut off at its first file, before the body is
+    read; a file over the per-file limit, past the file count, or of a
+    type that isn't an image is skipped as soon as that is known. Reasons
+    are collected in `errors` for the view to report. Install it before
+    anything reads request.POST (see useradmin.views.upload_gallery_images).
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_file_size = getattr(settings, 'MAX_UPLOAD_FILE_SIZE', MAX_UPLOAD_FILE_SIZE)
+        self.max_request_size = getattr(settings, 'MAX_UPLOAD_REQUEST_SIZE', MAX_UPLOAD_REQUEST_SIZE)
+        self.max_files = max_gallery_files()
+        self.errors = []
+        self.files_seen = 0
+        self.request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_too_large = content_length > self.max_request_size
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        if self.request_too_large:
+            self.errors.append(f"The upload is larger than {filesizeformat(self.max_request_size)} in total.")
+            raise StopUpload(connection_reset=True)
+        self.files_seen += 1
+        if self.files_seen > self.max_files:
+            if self.files_seen == self.max_files + 1:
+                self.errors.append(f"Only {self.max_files} images can be uploaded at once.")
+            raise SkipFile()
+        if content_type not in ACCEPTED_CONTENT_TYPES:
+            self.errors.append(f"{file_name} is not a JPEG, PNG, WebP or GIF image.")
+            raise SkipFile()
+        self.received = 0
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_file_size:
+            self.errors.append(f"{self.file_name} is larger than {filesizeformat(self.max_file_size)}.")
+            self.upload_interrupted()
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
+
+
+def attach_gallery(product, uploaded_files):
+    """Stage uploaded gallery images; once the request commits, a worker
+    runs each through normalize_image like the main image and adds the
+    good ones to the product. Returns the number staged."""
+    field = ProductImages._meta.get_field('images')
+    staged = [stage_upload(f, field.storage) for f in uploaded_files]
+    transaction.on_commit(lambda: run_in_background(process_gallery_images, product.pk, staged))
+    return len(staged)
+
+
+def process_gallery_images(pid, staged):
+    """Normalize staged gallery uploads and add them with one bulk_create.
+    bulk_create sends no post_save, so the blob references are counted here.
+    Staged files left by a crash are removed by the orphan sweep."""
+    field = ProductImages._meta.get_field('images')
+    storage = field.storage
+    names = [name for name in (process_staged_file(s, storage, field) for s in staged) if name]
+    with transaction.atomic():
+        # a product deleted meanwhile leaves its processed files to the orphan sweep
+        if names and Product.objects.filter(pid=pid).exists():
+            ProductImages.objects.bulk_create(ProductImages(product_id=pid, images=name) for name in names)
+            for name in names:
+                media.acquire(name)
+            invalidate_catalog_lists("pages")
+    for name in staged:
+        storage.delete(name)
+    return len(names)
@@ -10,11 +10,15 @@ urlpatterns = [
    path("claim-daily/", views.claim_daily_ptc, name="claim_daily"),
    path("seller/", views.seller, name = "seller"),
    path("home/", views.home, name ="home"),
+   path("home/more/", views.home_more_view, name="home_more"),
    path("product/<str:pid>/", views.product_detail_view, name="product_detail"),
    path("search/", views.search_view, name="search"),
+   path("search/suggest/", views.search_suggest_view, name="search_suggest"),
    path('cart/', views.cart_view, name='cart'),
    path('add-to-cart/<str:pid>/', views.add_to_cart_view, name='add_to_cart'),
+   path('csrf/', views.csrf_cookie_view, name='csrf_cookie'),
    path('cart/update/<int:item_id>/', views.update_cart_view, name='update_cart'),
+   path('cart/batch/', views.cart_batch_view, name='cart_batch'),
    path('checkout/', views.checkout_view, name='checkout'),
    path('checkout/place-order/', views.place_order_view, name='place_order'),
    path('update_info/', views.update_info, name = 'update_info'),
@@ -6,15 +6,32 @@ from django.conf import settings
 from django.http import HttpResponse, Http404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import models
+from django.db import models, transaction
 from core.models import Category, Tags, Vendor, Product, ProductImages, CartOrder, CartOrderItems, ProductReview, Wishlist, Address, PTCCurrency, PTCCurrencyTransaction
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponseNotAllowed
 from django.db.models import Sum
-from django.views.decorators.http import require_POST
-from django.views.decorators.csrf import csrf_exempt
-from core.utils import spend_ptc_bucks
+from django.views.decorators.http import require_POST, condition
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.views.decorators.cache import never_cache
 from core.utils import notify_vendors_of_order
+from core.checkout import pay_with_ptc_bucks
+from core.pagination import keyset_paginate
+from core.cards import product_cards
+from core.related import related_for
+from core.recommendations import product_neighbours, also_bought_for_cart, record_order
+from core.cart import (
+    get_cart_count, set_cart_count, forget_cart_count, apply_cart_operations, add_to_cart, get_open_cart, open_cart_items,
+    has_guest_cart, read_guest_cart, write_guest_cart, add_to_guest_cart, guest_cart_lines, apply_guest_operations,
+    MAX_LINE_QTY,
+)
+from core.search import search_products, ranked_queryset, render_snippet
+from core.fuzzy import did_you_mean
+from core.suggest import suggest
+from core.facets import FacetSelection, facet_counts
+from core.catalog import get_tag_cloud, get_categories, get_featured_products, get_facet_counts, get_generation
+from core.page_cache import cache_anonymous_page, PAGE_CACHE_TIMEOUT
+from core.http_cache import cache_policy, make_etag
 from useradmin.decorators import custom_admin_required
 
 def base(request):
@@ -81,45 +98,111 @@ def claim_daily_ptc(request):
 def seller(request):
     return render(request, 'useradmin/dashboard.html',)
 
+def _storefront_products(request):
+    # Only show active and published products
+    products = Product.objects.filter(status=True, product_status="published")
+
+    # facet filters: ?tag=slug (repeatable), category, price, in_stock, featured
+    return FacetSelection.from_request(request).apply(products)
+
+
+@cache_anonymous_page
 def home(request):
-    if not request.user.is_authenticated:
-        # Only show active products, newest first
-        # Only show active and published products
-        products = Product.objects.filter(status=True, product_status="published").order_by('-date')
+    products = _storefront_products(request)
+    selection = FacetSelection.from_request(request)
 
-        # allow filtering by tag (slug passed as ?tag=slug)
-        tag_slug = request.GET.get('tag')
-        if tag_slug:
-            products = products.filter(tags__slug=tag_slug)
+    # Newest first, one keyset page at a time; further pages are fetched
+    # from home_more_view by the "Load more" button.
+    page = keyset_paginate(products, load=product_cards)
 
-        # all tags for tag cloud/listing
-        all_tags = Tags.objects.all()
+    # all tags for tag cloud/listing (cached, see core/catalog.py)
+    all_tags = get_tag_cloud()
 
-        context = {
-            'products': products,
-            'all_tags': all_tags,
-        }
+    context = {
+        'products': page,
+        'next_cursor': page.next_cursor,
+        'all_tags': all_tags,
+        'featured_products': get_featured_products(),
+        # the unfiltered counts are the same for everyone and cached
+        'facets': (
+            facet_counts(products, selection, all_tags, get_categories()) if selection.is_active
+            else dict(get_facet_counts(), tag_mode=selection.tag_mode)
+        ),
+    }
+    if not request.user.is_authenticated:
         return render(request, 'core/home_lo.html', context)
+    return render(request, 'core/home.html', context)
+
+
+def home_more_view(request):
+    """Return the next page of the storefront grid as an HTML fragment.
+    The cursor for the page after it is sent in the X-Next-Cursor header
+    (absent on the last page).
+    """
+    page = keyset_paginate(_storefront_products(request), cursor=request.GET.get('cursor'), load=product_cards)
+    response = render(request, 'core/partials/product_grid_items.html', {'products': page})
+    if page.next_cursor:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+def _product_state(request, pid):
+    # (updated, product_status, user_id) of the product, read once per request
+    if not hasattr(request, '_product_state'):
+        request._product_state = (
+            Product.objects.filter(pid=pid).values_list('updated', 'product_status', 'user_id').first()
+        )
+    return request._product_state
+
+
+def _can_view_product(request, state):
+    if state[1] == 'published':
+        return True
+    user = request.user
+    return user.is_authenticated and (user.is_staff or user.pk == state[2])
+
+
+def _product_validatable(request, state):
+    # No validators for pages the view would 404, or that carry flash messages
+    return state is not None and _can_view_product(request, state) and not len(messages.get_messages(request))
+
+
+def product_etag(request, pid):
+    state = _product_state(request, pid)
+    if not _product_validatable(request, state):
+        return None
+    updated, status, _ = state
+    # the header shows the viewer's cart count
+    if request.user.is_authenticated:
+        viewer = f"{request.user.pk}:{get_cart_count(request.user.pk)}"
     else:
-        # Only show active products, newest first
-        # Only show active and published products
-        products = Product.objects.filter(status=True, product_status="published").order_by('-date')
+        viewer = f"guest{sum(read_guest_cart(request).values())}" if has_guest_cart(request) else 'anon'
+    # the "pages" generation covers the related-products blocks
+    return make_etag(pid, updated.isoformat() if updated else '', status, viewer, get_generation("pages"))
 
-        # allow filtering by tag (slug passed as ?tag=slug)
-        tag_slug = request.GET.get('tag')
-        if tag_slug:
-            products = products.filter(tags__slug=tag_slug)
 
-        # all tags for tag cloud/listing
-        all_tags = Tags.objects.all()
+def product_last_modified(request, pid):
+    state = _product_state(request, pid)
+    # Logged-in pages differ per viewer, which a date alone can't express
+    if request.user.is_authenticated or has_guest_cart(request) or not _product_validatable(request, state):
+        return None
+    return state[0]
 
-        context = {
-            'products': products,
-            'all_tags': all_tags,
-        }
-        return render(request, 'core/home.html', context)
+
+def product_cache_control(request, pid):
+    state = _product_state(request, pid)
+    if state is None:
+        return None
+    if (state[1] == 'published' and not request.user.is_authenticated and not has_guest_cart(request)
+            and not len(messages.get_messages(request))):
+        return {'public': True, 'max_age': PAGE_CACHE_TIMEOUT}
+    # owner/staff previews of unpublished products, logged-in pages and guest carts
+    return {'private': True, 'no_cache': True}
 
 
+@cache_policy(product_cache_control)
+@condition(etag_func=product_etag, last_modified_func=product_last_modified)
+@cache_anonymous_page
 def product_detail_view(request, pid):
     # fetch product; allow owner or staff to preview non-published products
     product = get_object_or_404(Product, pid=pid)
@@ -130,96 +213,149 @@ def product_detail_view(request, pid):
 
     context = {
         'product': product,
+        # evaluated once here; the template tests and loops over the list
+        'gallery': list(product.productimages_set.all()),
+        'related': related_for(product),
+        'recommended': product_neighbours(product),
     }
 
     return render(request, 'core/product_detail.html', context)
 
+@cache_anonymous_page
 def search_view(request):
     query = request.GET.get('q')
     # Only search published products
+    products = Product.objects.filter(
+        status=True,
+        product_status="published",
+    )
+    hits = []
+    suggestion = None
     if query:
-        products = Product.objects.filter(
-            (Q(title__icontains=query) | Q(description__icontains=query)),
-            status=True,
-            product_status="published",
-        ).order_by('-date')
+        # Ranked full-text match (see core/search.py)
+        hits = search_products(query)
+        if not hits:
+            # Nothing matched as typed: try the closest spelling from the
+            # catalog vocabulary and show those results instead
+            suggestion = did_you_mean(query)
+            if suggestion:
+                hits = search_products(suggestion)
+        products = ranked_queryset(products, hits)
     else:
         # No query, show all published products
-        products = Product.objects.filter(
-            status=True,
-            product_status="published",
-        ).order_by('-date')
+        products = products.order_by('-date')
+
+    # facet filtering on search results (?tag=, category, price, ...)
+    selection = FacetSelection.from_request(request)
+    products = selection.apply(products)
 
-    # allow tag filtering on search results
-    tag_slug = request.GET.get('tag')
-    if tag_slug:
-        products = products.filter(tags__slug=tag_slug)
+    # The grid renders lightweight cards; `products` stays a lazy queryset
+    # for the facet counts.
+    cards = product_cards(products)
+    if hits:
+        snippets = {h.pid: h.snippet for h in hits}
+        for card in cards:
+            card.search_snippet = render_snippet(snippets.get(card.pid))
 
-    all_tags = Tags.objects.all()
+    all_tags = get_tag_cloud()
 
     context = {
         'products': products,
+        'cards': cards,
         'query': query,
+        'suggestion': suggestion,
         'all_tags': all_tags,
+        'facets': facet_counts(products, selection, all_tags, get_categories()),
     }
     return render(request, 'core/search.html', context)
 
+def search_suggest_view(request):
+    """Type-ahead suggestions for the search box, served from the in-memory
+    prefix index (core/suggest.py) without touching the database."""
+    query = request.GET.get('q', '')
+    suggestions = suggest(query) if len(query.strip()) >= 2 else []
+    return JsonResponse({
+        'query': query,
+        'suggestions': [{'label': s.label, 'kind': s.kind, 'url': s.url} for s in suggestions],
+    })
+
+def _requested_qty(request):
+    try:
+        return min(max(int(request.POST.get('qty') or 1), 1), MAX_LINE_QTY)
+    except ValueError:
+        return None
+
+
 def add_to_cart_view(request, pid):
     if request.method != 'POST':
         return HttpResponseNotAllowed(['POST'])
+    qty = _requested_qty(request)
+    if qty is None:
+        return JsonResponse({'success': False, 'error': 'Invalid quantity.'}, status=400)
+    if request.user.is_authenticated:
+        return _add_to_user_cart(request, pid, qty)
+
+    # guests go through the CSRF check too; cached product pages carry no
+    # token, so their script fetches the cookie from csrf_cookie_view first
+    title = Product.objects.filter(pid=pid).values_list('title', flat=True).first()
+    if title is None:
+        raise Http404("No such product.")
+    try:
+        cart = add_to_guest_cart(read_guest_cart(request), pid, qty)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+    response = JsonResponse({'success': True, 'product_name': title, 'new_cart_count': sum(cart.values())})
+    write_guest_cart(request, response, cart)
+    return response
 
-    product = get_object_or_404(Product, pid=pid)
-    qty = int(request.POST.get('qty', 1)) if request.POST.get('qty') else 1
 
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Login required.'})
-
-    order, _ = CartOrder.objects.get_or_create(user=request.user, paid_status=False)
-
-    item, created = CartOrderItems.objects.get_or_create(
-        order=order,
-        item=product.title,
-        defaults={
-            'invoice_no': f'INV{order.id}{product.pid}',
-            'product': product,
-            'image': product.image.url if product.image else '',
-            'price': product.price,
-            'qty': qty,
-            'total': product.price * qty,
-            'product_status': 'processing',
-        }
-    )
+def _add_to_user_cart(request, pid, qty):
+    order = get_open_cart(request.user, create=True)
+    added = add_to_cart(order, pid, qty)
+    if added is None:
+        raise Http404("No such product.")
+
+    title, total_qty = added
+    set_cart_count(request.user.pk, total_qty)
+    return JsonResponse({'success': True, 'product_name': title, 'new_cart_count': total_qty})
 
-    if not created:
-        item.qty += qty
-        item.total = item.price * item.qty
-        item.save()
 
-    total_qty = CartOrderItems.objects.filter(order=order).aggregate(total_qty=Sum('qty'))['total_qty'] or 0
-    return JsonResponse({'success': True, 'product_name': product.title, 'new_cart_count': total_qty})
+@never_cache
+@ensure_csrf_cookie
+def csrf_cookie_view(request):
+    """Set the CSRF cookie for a script on a cached (token-less) page."""
+    return HttpResponse(status=204)
 
 
+@ensure_csrf_cookie
 def cart_view(request):
     if not request.user.is_authenticated:
-        messages.warning(request, "Must be logged in to view cart.")
-        return redirect('userauths:login')
+        # guest cart from the signed cookie: one product query, no cart rows
+        items = guest_cart_lines(read_guest_cart(request))
+        context = {
+            'items': items,
+            'total_price': sum(i.total for i in items),
+            'also_bought': also_bought_for_cart(i.product_id for i in items),
+        }
+        return render(request, 'core/cart.html', context)
 
-    order, _ = CartOrder.objects.get_or_create(user=request.user, paid_status=False)
-    items = CartOrderItems.objects.filter(order=order)
+    # viewing an empty cart doesn't create one
+    items = open_cart_items(request.user.pk)
     total_price = sum(i.total for i in items)
 
-    context = {'items': items, 'total_price': total_price}
+    context = {
+        'items': items,
+        'total_price': total_price,
+        'also_bought': also_bought_for_cart(i.product_id for i in items if i.product_id),
+    }
     return render(request, 'core/cart.html', context)
 
 
 def update_cart_view(request, item_id):
     if request.method != "POST":
         return HttpResponseNotAllowed(["POST"])
-
-    try:
-        item = CartOrderItems.objects.get(id=item_id)
-    except CartOrderItems.DoesNotExist:
-        return JsonResponse({"success": False, "error": "Item not found"})
+    if not request.user.is_authenticated:
+        return JsonResponse({"success": False, "error": "Login required."})
 
     try:
         data = json.loads(request.body)
@@ -227,40 +363,59 @@ def update_cart_view(request, item_id):
     except json.JSONDecodeError:
         return JsonResponse({"success": False, "error": "Invalid JSON"})
 
-    if action == "increase":
-        item.qty += 1
-        item.total = item.price * item.qty
-        item.save()
+    try:
+        result = apply_cart_operations(request.user.pk, [{"item_id": item_id, "action": action}])
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Invalid action"})
+    if item_id in result["missing"]:
+        return JsonResponse({"success": False, "error": "Item not found"})
 
-    elif action == "decrease":
-        item.qty -= 1
-        if item.qty > 0:
-            item.total = item.price * item.qty
-            item.save()
-        else:
-            item.delete()
+    qty, item_total = result["items"].get(item_id, (0, 0))
+    return JsonResponse({
+        "success": True,
+        "qty": qty,
+        "item_total": item_total,
+        "cart_total": result["cart_total"],
+        "removed": item_id in result["removed"],
+    })
 
-    elif action == "remove":
-        item.delete()
-    else:
-        return JsonResponse({"success": False, "error": "Invalid action"})
 
-    order = item.order if item.id else CartOrder.objects.get(id=item.order.id)
-    cart_items = CartOrderItems.objects.filter(order=order)
-    cart_total = sum(i.total for i in cart_items)
+@require_POST
+def cart_batch_view(request):
+    """Apply several cart changes at once: {"operations": [{"item_id", "action"|"qty"}, ...]}.
+    cart.js batches rapid clicks into one of these."""
+    guest = not request.user.is_authenticated
+    try:
+        operations = json.loads(request.body).get("operations")
+        if guest:
+            cart, result = apply_guest_operations(read_guest_cart(request), operations)
+        else:
+            result = apply_cart_operations(request.user.pk, operations)
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({"success": False, "error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
 
-    return JsonResponse({
+    response = JsonResponse({
         "success": True,
-        "qty": item.qty if action != "remove" and item.id else 0,
-        "item_total": item.total if action != "remove" and item.id else 0,
-        "cart_total": cart_total,
-        "removed": action == "remove" or item.qty <= 0
+        "items": [
+            {"item_id": item_id, "qty": qty, "item_total": item_total}
+            for item_id, (qty, item_total) in result["items"].items()
+        ],
+        "removed": result["removed"],
+        "missing": result["missing"],
+        "cart_total": result["cart_total"],
+        "cart_count": result["cart_count"],
     })
+    if guest:
+        write_guest_cart(request, response, cart)
+    return response
 
+@login_required
 def checkout_view(request):
     wallet, _ = PTCCurrency.objects.get_or_create(user=request.user)
-    order, _ = CartOrder.objects.get_or_create(user=request.user, paid_status=False)
-    items = CartOrderItems.objects.filter(order=order)
+    order = get_open_cart(request.user)
+    items = CartOrderItems.objects.filter(order=order) if order else CartOrderItems.objects.none()
     total_price = sum(i.total for i in items)
 
     if not items:
@@ -293,46 +448,13 @@ def checkout_view(request):
 
         # PTC Bucks payment
         if payment_method == "ptc_bucks":
-            buyer_wallet = PTCCurrency.objects.get(user=request.user)
-
-            if buyer_wallet.balance >= total_price:
-                # Deduct from buyer
-                spend_ptc_bucks(request.user, total_price, description="Checkout payment")
-
-                # Mark order as paid
-                order.paid_status = True
-                order.payment_method = "PTC Bucks"
-                order.save()
-
-                # Transfer funds to sellers
-                for item in items:
-                    try:
-                        product = Product.objects.get(title=item.item)
-                        seller = product.user
-                        seller_wallet, _ = PTCCurrency.objects.get_or_create(user=seller)
-                        seller_wallet.balance += item.total
-                        seller_wallet.save()
-
-                        from core.models import PTCCurrencyTransaction
-                        PTCCurrencyTransaction.objects.create(
-                            user=seller,
-                            amount=item.total,
-                            transaction_type="credit",
-                            description=f"Sale of {product.title} to {request.user.username}",
-                        )
-                    except Product.DoesNotExist:
-                        continue
-
-                messages.success(
-                    request,
-                    f"Your order has been placed using PTC Bucks! Remaining balance: {buyer_wallet.balance - total_price}",
-                )
-                # Notify vendors about this order
-                notify_vendors_of_order(order)
-                return redirect('core:home')
-            else:
-                messages.error(request, "Insufficient PTC Bucks balance.")
+            try:
+                balance = pay_with_ptc_bucks(request.user, order)
+            except ValueError as e:
+                messages.error(request, str(e))
                 return redirect('core:checkout')
+            messages.success(request, f"Your order has been placed using PTC Bucks! Remaining balance: {balance}")
+            return redirect('core:home')
 
     context = {
         "items": items,
@@ -345,7 +467,7 @@ def place_order_view(request):
     if request.method == "POST":
         user = request.user
         order = CartOrder.objects.filter(user=user, paid_status=False).first()
-        if not order or not order.items.exists():
+        if not order or not order.cartorderitems_set.exists():
             messages.error(request, "Your cart is empty.")
             return redirect("core:cart")
 
@@ -357,9 +479,12 @@ def place_order_view(request):
         order.address = address
         order.paid_status = True  # mark as paid / processed
         order.save()
+        set_cart_count(user.pk, 0)
 
         # Notify vendors about this order
-        notify_vendors_of_order(order)
+        transaction.on_commit(lambda: notify_vendors_of_order(order))
+        # fold the basket into "customers also bought"
+        transaction.on_commit(lambda: record_order(order))
 
         messages.success(request, "Order placed successfully!")
         return redirect("core:home")
@@ -431,6 +556,7 @@ def refund_order_view(request, order_id):
             
             # Delete the order (cascade will delete order items)
             order.delete()
+            forget_cart_count(request.user.pk)
             
             messages.success(request, f"Order refunded successfully! {refund_amount} PTC has been returned to your wallet. New balance: {ptc_wallet.balance} PTC (was {original_balance} PTC)")
             return redirect("core:my_orders")
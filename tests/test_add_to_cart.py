@@ -0,0 +1,114 @@
+"""
+Test Suite for Adding Products to the Cart
+Maps to Requirements: REQ-6, REQ-7
+User Stories: As per GitHub issues - add to cart keeps one line per product, even under quick repeated clicks
+"""
+
+import pytest
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from core.cart import MAX_LINE_QTY, add_to_cart, add_many_to_cart, get_cart_count
+from core.models import Product, Category, CartOrder, CartOrderItems
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAddToCart:
+    """Test cases for the single-statement add_to_cart upsert"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+
+    @pytest.fixture
+    def shopper(self):
+        """Create a shopper"""
+        return User.objects.create_user(username='addshopper', email='addshopper@example.com', password='ShopperPass123')
+
+    @pytest.fixture
+    def client(self, shopper):
+        """A client logged in as the shopper"""
+        client = Client()
+        client.force_login(shopper)
+        return client
+
+    @pytest.fixture
+    def products(self, shopper):
+        """Two different products that share a title"""
+        category = Category.objects.create(title='Chargers', image=None)
+        return [
+            Product.objects.create(title='Wall Charger', price=Decimal(price), user=shopper, category=category,
+                                   product_status='published')
+            for price in ('19.99', '24.50')
+        ]
+
+    def _add(self, client, product, qty):
+        return client.post(reverse('core:add_to_cart', args=[product.pid]), {'qty': qty}).json()
+
+    def test_products_with_the_same_title_get_their_own_lines(self, client, shopper, products):
+        """
+        Test Case 1: Lines are keyed on the product, not its title
+
+        Expected: Two lines with their own price and total, and the count covers both
+        """
+        self._add(client, products[0], 1)
+        data = self._add(client, products[1], 2)
+
+        lines = CartOrderItems.objects.filter(order__user=shopper).order_by('price')
+        assert [(line.product_id, line.qty, line.total) for line in lines] == [
+            (products[0].pid, 1, Decimal('19.99')),
+            (products[1].pid, 2, Decimal('49.00')),
+        ]
+        assert data == {'success': True, 'product_name': 'Wall Charger', 'new_cart_count': 3}
+        assert get_cart_count(shopper.pk) == 3
+
+    def test_quantity_stops_at_the_line_limit(self, client, shopper, products):
+        """
+        Test Case 2: Repeated adds, a huge posted qty and a guest-cart merge all stop at MAX_LINE_QTY
+
+        Expected: Lines hold 999 with matching totals; an unknown pid adds nothing
+        """
+        order = CartOrder.objects.create(user=shopper)
+        assert add_to_cart(order, products[0].pid, 2) == ('Wall Charger', 2)
+        assert add_to_cart(order, products[0].pid, MAX_LINE_QTY) == ('Wall Charger', MAX_LINE_QTY)
+        assert add_to_cart(order, 'no-such-product', 1) is None
+
+        data = self._add(client, products[1], 10 ** 12)
+        add_many_to_cart(order, {products[0].pid: 5, products[1].pid: 5})
+
+        lines = CartOrderItems.objects.filter(order=order).order_by('price')
+        assert [(line.qty, line.total) for line in lines] == [
+            (MAX_LINE_QTY, Decimal('19970.01')), (MAX_LINE_QTY, Decimal('24475.50')),
+        ]
+        assert data['new_cart_count'] == 2 * MAX_LINE_QTY
+        assert (lines[0].invoice_no, lines[0].image) == (f'INV{order.pk}{products[0].pid}', products[0].image.url)
+
+    def test_add_is_one_statement_once_the_cart_exists(self, client, shopper, products):
+        """
+        Test Case 3: The upsert writes the line and returns the count in the same round trip
+
+        Expected: Only the open-cart lookup and the upsert touch the cart tables
+        """
+        self._add(client, products[0], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self._add(client, products[0], 1)
+        cart_queries = [q['sql'] for q in queries.captured_queries if 'core_cartorder' in q['sql']]
+
+        assert data['new_cart_count'] == 2
+        assert len(cart_queries) == 2
+        assert cart_queries[1].lstrip().startswith('INSERT')
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
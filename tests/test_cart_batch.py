@@ -0,0 +1,121 @@
+"""
+Test Suite for the Batched Cart API
+Maps to Requirements: REQ-6, REQ-7
+User Stories: As per GitHub issues - quick clicks on cart buttons don't flood the server
+"""
+
+import json
+import pytest
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from core.cart import MAX_LINE_QTY
+from core.models import Product, Category, CartOrder, CartOrderItems
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCartBatch:
+    """Test cases for cart_batch_view"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+
+    @pytest.fixture
+    def shopper(self):
+        """Create a shopper"""
+        return User.objects.create_user(username='batchshopper', email='batchshopper@example.com', password='ShopperPass123')
+
+    @pytest.fixture
+    def client(self, shopper):
+        """A client logged in as the shopper"""
+        client = Client()
+        client.force_login(shopper)
+        return client
+
+    @pytest.fixture
+    def lines(self, shopper):
+        """Three cart lines: a keyboard, a mouse and a cable"""
+        category = Category.objects.create(title='Peripherals', image=None)
+        order = CartOrder.objects.create(user=shopper)
+        result = {}
+        for title, price, qty in (('Keyboard', '50.00', 1), ('Mouse', '20.00', 2), ('Cable', '5.00', 4)):
+            product = Product.objects.create(title=title, price=Decimal(price), user=shopper, category=category)
+            result[title] = CartOrderItems.objects.create(
+                order=order, product=product, item=title, invoice_no=f'INV-{title}', product_status='processing',
+                price=Decimal(price), qty=qty, total=Decimal(price) * qty,
+            )
+        return result
+
+    def _batch(self, client, operations):
+        return client.post(reverse('core:cart_batch'), json.dumps({'operations': operations}), content_type='application/json')
+
+    def test_batch_clamps_at_the_quantity_limits(self, client, lines):
+        """
+        Test Case 1: Clicks that would push a line past MAX_LINE_QTY or below zero arrive together
+
+        Expected: The full line stops at 999, the emptied line is removed, a set-then-increase folds;
+        still one UPDATE per distinct change
+        """
+        keyboard, mouse, cable = lines['Keyboard'], lines['Mouse'], lines['Cable']
+        CartOrderItems.objects.filter(id=keyboard.id).update(qty=MAX_LINE_QTY - 1)
+        operations = [{'item_id': keyboard.id, 'action': 'increase'}] * 3 + [
+            {'item_id': mouse.id, 'action': 'decrease'},
+        ] * 5 + [{'item_id': cable.id, 'qty': 5}] + [{'item_id': cable.id, 'action': 'increase'}] * 2
+        with CaptureQueriesContext(connection) as queries:
+            data = self._batch(client, operations).json()
+
+        assert data['success']
+        assert {i['item_id']: (i['qty'], Decimal(i['item_total'])) for i in data['items']} == {
+            keyboard.id: (MAX_LINE_QTY, Decimal('49950.00')), cable.id: (7, Decimal('35.00')),
+        }
+        assert data['removed'] == [mouse.id]
+        assert Decimal(data['cart_total']) == Decimal('49985.00')
+        assert data['cart_count'] == MAX_LINE_QTY + 7
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "core_cartorderitems"')]
+        assert len(updates) == 3
+
+    def test_other_carts_are_out_of_reach(self, client, lines):
+        """
+        Test Case 2: Items in someone else's cart are reported missing, never changed
+
+        Expected: Foreign line untouched and listed under "missing"
+        """
+        other = User.objects.create_user(username='othershopper', email='othershopper@example.com', password='ShopperPass123')
+        foreign = CartOrderItems.objects.create(
+            order=CartOrder.objects.create(user=other), item='Monitor', invoice_no='INV-X',
+            product_status='processing', price=Decimal('100.00'), qty=1, total=Decimal('100.00'),
+        )
+        data = self._batch(client, [{'item_id': foreign.id, 'qty': 0}]).json()
+        assert data['missing'] == [foreign.id]
+        assert CartOrderItems.objects.get(id=foreign.id).qty == 1
+
+    def test_invalid_batches_are_rejected(self, client, lines):
+        """
+        Test Case 3: Malformed operations fail as a whole with 400
+
+        Expected: Nothing changes for an unknown action, a negative qty or too many operations
+        """
+        keyboard = lines['Keyboard']
+        for operations in (
+            [{'item_id': keyboard.id, 'action': 'double'}],
+            [{'item_id': keyboard.id, 'qty': -1}],
+            [{'item_id': keyboard.id, 'action': 'increase'}] * 101,
+            'not a list',
+        ):
+            assert self._batch(client, operations).status_code == 400
+        assert CartOrderItems.objects.get(id=keyboard.id).qty == 1
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
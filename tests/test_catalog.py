@@ -0,0 +1,100 @@
+"""
+Test Suite for Cached Catalog Lists
+Maps to Requirements: REQ-18, REQ-27
+User Stories: As per GitHub issues - fast storefront pages for tag/category browsing
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from core.models import Product, Category, Tags
+from core.catalog import get_tag_cloud, get_categories, get_featured_products, get_facet_counts
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    """Test cases for the cached tag cloud, category list and featured products"""
+
+    @pytest.fixture
+    def test_user(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='cachevendor',
+            email='cachevendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def test_category(self):
+        """Create test category for products"""
+        return Category.objects.create(title='Cached Coolers', image=None)
+
+    @pytest.fixture
+    def test_tag(self):
+        """Create a tag used only by this suite"""
+        return Tags.objects.create(name='Cache Test Tag')
+
+    def test_lists_are_served_from_cache(self, test_category, test_tag, django_assert_num_queries):
+        """
+        Test Case 1: Repeated reads of the catalog lists do not touch the database
+
+        Expected: First read queries, second read is free (facet counts included)
+        """
+        get_tag_cloud()
+        get_categories()
+        get_featured_products()
+        get_facet_counts()
+        with django_assert_num_queries(0):
+            get_tag_cloud()
+            get_categories()
+            get_featured_products()
+            get_facet_counts()
+
+    def test_tag_counts_follow_publication(self, test_user, test_category, test_tag):
+        """
+        Test Case 2: Tag cloud counts only published products and refreshes on change
+
+        Expected: Count goes 0 -> 1 when the tagged product is approved
+        """
+        product = Product.objects.create(
+            title='Tower Cooler',
+            price=Decimal('49.99'),
+            user=test_user,
+            category=test_category,
+            product_status='in_review',
+            featured=True,
+        )
+        product.tags.add(test_tag)
+        counts = {t.slug: t.num_products for t in get_tag_cloud()}
+        assert counts[test_tag.slug] == 0
+        assert product.pid not in [p.pid for p in get_featured_products()]
+
+        product.product_status = 'published'
+        product.save()
+        counts = {t.slug: t.num_products for t in get_tag_cloud()}
+        assert counts[test_tag.slug] == 1
+        assert product.pid in [p.pid for p in get_featured_products()]
+        facets = {v.value: v.count for v in get_facet_counts()['tags']}
+        assert facets[test_tag.slug] == 1
+
+    def test_category_list_refreshes_on_rename(self, test_category):
+        """
+        Test Case 3: Renaming a category invalidates the cached category list
+
+        Expected: New title is returned after save
+        """
+        assert 'Cached Coolers' in [c.title for c in get_categories()]
+        test_category.title = 'Cached Fans'
+        test_category.save()
+        titles = [c.title for c in get_categories()]
+        assert 'Cached Fans' in titles
+        assert 'Cached Coolers' not in titles
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
@@ -0,0 +1,128 @@
+"""
+Test Suite for PTC Bucks Checkout
+Maps to Requirements: REQ-6, REQ-7, REQ-8
+User Stories: As per GitHub issues - paying with PTC Bucks is all-or-nothing and can't double-spend
+"""
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.cart import add_to_cart
+from core.checkout import pay_with_ptc_bucks
+from core.models import Product, Category, CartOrder, PTCCurrency, PTCCurrencyTransaction
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCheckout:
+    """Test cases for the atomic PTC Bucks checkout"""
+
+    @pytest.fixture
+    def buyer(self):
+        """A buyer with 100 PTC Bucks"""
+        user = User.objects.create_user(username='ptcbuyer', email='ptcbuyer@example.com', password='BuyerPass123')
+        PTCCurrency.objects.update_or_create(user=user, defaults={'balance': Decimal('100.00')})
+        return user
+
+    @pytest.fixture
+    def vendors(self):
+        """Two vendors; only the first has a wallet yet"""
+        first = User.objects.create_user(username='vendorone', email='vendorone@example.com', password='VendorPass123')
+        second = User.objects.create_user(username='vendortwo', email='vendortwo@example.com', password='VendorPass123')
+        PTCCurrency.objects.update_or_create(user=first, defaults={'balance': Decimal('5.00')})
+        PTCCurrency.objects.filter(user=second).delete()
+        return first, second
+
+    @pytest.fixture
+    def products(self, vendors):
+        """Three products: two from the first vendor, one from the second"""
+        category = Category.objects.create(title='Gadgets', image=None)
+        return [
+            Product.objects.create(title=title, price=Decimal(price), user=vendor, category=category,
+                                   product_status='published')
+            for title, price, vendor in (
+                ('Mouse', '10.00', vendors[0]), ('Pad', '5.00', vendors[0]), ('Hub', '20.00', vendors[1]),
+            )
+        ]
+
+    def _cart(self, buyer, products, qty=1):
+        order = CartOrder.objects.create(user=buyer)
+        for product in products:
+            add_to_cart(order, product.pid, qty)
+        return order
+
+    def test_checkout_pays_every_vendor_in_one_transaction(self, buyer, vendors, products,
+                                                           django_capture_on_commit_callbacks):
+        """
+        Test Case 1: A PTC Bucks checkout debits the buyer and credits each vendor
+
+        Expected: Balances and ledger match the cart, the order is paid, vendors are emailed after commit
+        """
+        order = self._cart(buyer, products, qty=2)
+        client = Client()
+        client.force_login(buyer)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('core:checkout'), {
+                'full_name': 'PTC Buyer', 'email': 'ptcbuyer@example.com', 'address': '1 Main St',
+                'city': 'Springfield', 'postcode': '12345', 'country': 'US', 'payment_method': 'ptc_bucks',
+            })
+
+        assert response.url == reverse('core:home')
+        balances = dict(PTCCurrency.objects.values_list('user_id', 'balance'))
+        assert balances == {buyer.pk: Decimal('30.00'), vendors[0].pk: Decimal('35.00'), vendors[1].pk: Decimal('40.00')}
+        order.refresh_from_db()
+        assert order.paid_status and order.price == Decimal('70.00')
+        ledger = sorted(PTCCurrencyTransaction.objects.values_list('user_id', 'transaction_type', 'amount'))
+        assert ledger == sorted([
+            (buyer.pk, 'debit', Decimal('70.00')), (vendors[0].pk, 'credit', Decimal('20.00')),
+            (vendors[0].pk, 'credit', Decimal('10.00')), (vendors[1].pk, 'credit', Decimal('40.00')),
+        ])
+        assert sorted(m.to[0] for m in mail.outbox) == ['vendorone@example.com', 'vendortwo@example.com']
+
+    def test_short_balance_or_paid_cart_changes_nothing(self, buyer, products):
+        """
+        Test Case 2: A failed payment leaves every balance and the cart untouched; a paid cart can't be paid twice
+
+        Expected: ValueError with a message for both, no ledger rows beyond the first payment
+        """
+        order = self._cart(buyer, products, qty=3)  # 105.00
+        with pytest.raises(ValueError, match='Insufficient'):
+            pay_with_ptc_bucks(buyer, order)
+        assert PTCCurrency.objects.get(user=buyer).balance == Decimal('100.00')
+        assert not PTCCurrencyTransaction.objects.exists()
+        assert not CartOrder.objects.get(pk=order.pk).paid_status
+
+        PTCCurrency.objects.filter(user=buyer).update(balance=Decimal('200.00'))
+        assert pay_with_ptc_bucks(buyer, order) == Decimal('95.00')
+        with pytest.raises(ValueError, match='empty'):
+            pay_with_ptc_bucks(buyer, order)
+        assert PTCCurrency.objects.get(user=buyer).balance == Decimal('95.00')
+
+    def test_query_count_does_not_grow_with_the_cart(self, buyer, vendors, products):
+        """
+        Test Case 3: More lines from the same vendors cost no extra queries
+
+        Expected: A one-line and a three-line cart from both vendors run the same number of queries
+        """
+        def queries_for(cart_products):
+            order = self._cart(buyer, cart_products)
+            with CaptureQueriesContext(connection) as queries:
+                pay_with_ptc_bucks(buyer, order)
+            return len(queries.captured_queries)
+
+        small = queries_for([products[0], products[2]])
+        large = queries_for(products)
+        assert small == large
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
@@ -0,0 +1,128 @@
+"""
+Test Suite for Near-Duplicate Listing Detection
+Maps to Requirements: REQ-12, REQ-13
+User Stories: As per GitHub issues - keep re-uploaded listings out of the review queue
+"""
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from core.models import Product, Category, LSHBucket
+from core.dedup import find_duplicates
+from decimal import Decimal
+from PIL import Image
+import io
+
+User = get_user_model()
+
+
+def _photo(name, size, fmt):
+    """A gradient-and-shapes test picture, so its dHash is not degenerate"""
+    image = Image.new('RGB', (200, 160))
+    for x in range(200):
+        for y in range(160):
+            image.putpixel((x, y), ((x * 5) % 256, (y * 3) % 256, ((x + y) * 2) % 256))
+    image = image.resize(size)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+@pytest.mark.django_db
+class TestDuplicateDetection:
+    """Test cases for the MinHash/dHash LSH duplicate index"""
+
+    @pytest.fixture
+    def client(self):
+        """Fixture to provide a test client"""
+        return Client()
+
+    @pytest.fixture
+    def vendor(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='dupvendor',
+            email='dupvendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def category(self):
+        """Create test category"""
+        return Category.objects.create(title='Figures', image=None)
+
+    @pytest.fixture
+    def original(self, vendor, category):
+        """An already listed product with its own photo"""
+        return Product.objects.create(
+            title='Agnes Tachyon 1/7 Scale Figure',
+            description='Limited edition PVC figure with display base',
+            price=Decimal('129.00'), user=vendor, category=category,
+            image=_photo('Agnes_tachyon_1.png', (200, 160), 'PNG'),
+            product_status='published',
+        )
+
+    def test_photo_less_listings_and_stale_buckets(self, vendor, category, original):
+        """
+        Test Case 1: Listings sharing only the default photo and description are not duplicates;
+        a flagged copy that is reworded away stops matching
+
+        Expected: No image buckets for the default photo; re-saving replaces the 16 text buckets
+        """
+        mouse = Product.objects.create(title='Wireless Gaming Mouse', price=Decimal('49.00'), user=vendor, category=category)
+        stand = Product.objects.create(title='Headphone Stand', price=Decimal('19.00'), user=vendor, category=category)
+        assert not LSHBucket.objects.filter(product__in=[mouse, stand], key__startswith='i').exists()
+        assert find_duplicates(stand) == []
+
+        copy = Product.objects.create(
+            title='Agnes Tachyon 1/7 scale figure!', description='Limited edition PVC figure, with display base',
+            price=Decimal('119.00'), user=vendor, category=category,
+        )
+        assert [(d.pid, d.reason) for d in find_duplicates(copy)] == [(original.pid, 'text')]
+
+        copy.title, copy.description = 'Manhattan Cafe Acrylic Stand', 'Double-sided acrylic stand'
+        copy.save()
+        assert LSHBucket.objects.filter(product=copy).count() == 16
+        assert find_duplicates(copy) == []
+        assert find_duplicates(original) == []
+
+    def test_reencoded_image_is_flagged(self, vendor, category, original):
+        """
+        Test Case 2: The same photo saved smaller as JPEG under a new title is reported
+
+        Expected: Image duplicate despite completely different text
+        """
+        copy = Product.objects.create(
+            title='Collectible anime statue', price=Decimal('99.00'), user=vendor, category=category,
+            image=_photo('Agnes_tachyon_2.jpeg', (120, 96), 'JPEG'),
+        )
+        assert [(d.pid, d.reason) for d in find_duplicates(copy)] == [(original.pid, 'image')]
+
+    def test_submission_and_review_queue_flag_duplicates(self, client, vendor, category, original):
+        """
+        Test Case 3: add_product_view warns the seller and the review queue shows a badge
+
+        Expected: Warning message on submit, "Possible duplicate" next to the pending listing
+        """
+        client.force_login(vendor)
+        response = client.post(reverse('useradmin:add_product'), {
+            'title': 'Agnes Tachyon 1/7 Scale Figure',
+            'category': category.cid,
+            'price': '125.00',
+            'image': _photo('Agnes_tachyon_3.png', (200, 160), 'PNG'),
+        }, follow=True)
+        assert any('duplicate' in str(m) for m in response.context['messages'])
+
+        admin = User.objects.create_user(username='dupadmin', email='dupadmin@example.com', password='AdminPass123', is_staff=True)
+        client.force_login(admin)
+        response = client.get(reverse('useradmin:admin_review_products'))
+        assert b'Possible duplicate' in response.content
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
@@ -0,0 +1,149 @@
+"""
+Test Suite for Gallery Image Uploads
+Maps to Requirements: REQ-12, REQ-25
+User Stories: As per GitHub issues - sellers add several product photos at once
+"""
+
+import pytest
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from core.models import Product, ProductImages, Category, MediaBlob
+from core.images import rendition_name, RENDITION_WIDTHS
+from decimal import Decimal
+from PIL import Image
+import io
+
+User = get_user_model()
+
+
+def _png(name, color, size=(80, 60)):
+    """A PNG upload of one solid colour"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+def _jpeg_with_gps(name, size=(120, 60)):
+    """A JPEG carrying a GPS position and a rotate-90 orientation tag"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x8825] = {1: 'N', 2: (51.0, 30.0, 0.0)}
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color='blue').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@pytest.mark.django_db
+class TestGalleryUpload:
+    """Test cases for the streaming multi-image gallery endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        """Write uploads to a per-test media directory and render inline"""
+        settings.MEDIA_ROOT = tmp_path
+        settings.IMAGE_WORKERS = 0
+        cache.clear()
+        return tmp_path
+
+    @pytest.fixture
+    def vendor(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(username='galleryvendor', email='galleryvendor@example.com', password='VendorPass123')
+
+    @pytest.fixture
+    def product(self, vendor):
+        """A product owned by the vendor"""
+        category = Category.objects.create(title='Monitors', image=None)
+        return Product.objects.create(title='Monitor', price=Decimal('150.00'), user=vendor, category=category)
+
+    @pytest.fixture
+    def client(self, vendor):
+        """A logged-in client that enforces CSRF like a browser"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(vendor)
+        return client
+
+    def _post(self, client, product, files):
+        """Post files with the CSRF token taken from the edit page"""
+        page = client.get(reverse('useradmin:edit_product', args=[product.pid]))
+        token = page.context['csrf_token']
+        return client.post(
+            reverse('useradmin:upload_gallery_images', args=[product.pid]),
+            {'csrfmiddlewaretoken': str(token), 'images': files}, follow=True,
+        )
+
+    def test_images_are_added_with_one_insert(self, client, product, django_capture_on_commit_callbacks):
+        """
+        Test Case 1: Images are normalized after commit, then added as rows in a single INSERT
+
+        Expected: No rows until commit; then rows, blob counts, renditions, and no EXIF/GPS left
+        """
+        files = [_png('a.png', 'red'), _png('b.png', 'green'), _png('c.png', 'red'), _jpeg_with_gps('d.jpg')]
+        with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+            response = self._post(client, product, files)
+            assert ProductImages.objects.filter(product=product).count() == 0
+
+        assert response.status_code == 200
+        assert ProductImages.objects.filter(product=product).count() == 4
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "core_productimages"')]
+        assert len(inserts) == 1
+
+        red = ProductImages.objects.filter(product=product).order_by('pk').first().images.name
+        assert MediaBlob.objects.get(name=red).refcount == 2
+        assert default_storage.exists(rendition_name(red, RENDITION_WIDTHS[0], 'webp'))
+        photo = ProductImages.objects.get(product=product, images__endswith='.jpg').images
+        with default_storage.open(photo.name) as f, Image.open(f) as img:
+            assert img.size == (60, 120) and not img.getexif()
+        assert not default_storage.listdir('staging')[1]
+        assert b'Added 4 image(s)' in response.content
+
+    def test_per_file_limits_skip_only_offending_files(self, client, product, settings,
+                                                       django_capture_on_commit_callbacks):
+        """
+        Test Case 2: Oversized, non-image and surplus files are skipped while streaming
+
+        Expected: Only the valid files are stored; each problem is reported
+        """
+        settings.MAX_UPLOAD_FILE_SIZE = 2000
+        settings.MAX_GALLERY_FILES = 3
+        files = [
+            _png('small.png', 'red'),
+            _png('huge.png', 'blue', size=(800, 800)),
+            SimpleUploadedFile('notes.txt', b'hello', content_type='text/plain'),
+            _png('extra.png', 'green'),
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self._post(client, product, files)
+
+        assert ProductImages.objects.filter(product=product).count() == 1
+        body = response.content.decode()
+        assert 'huge.png is larger than' in body
+        assert 'notes.txt is not a JPEG' in body
+        assert 'Only 3 images can be uploaded at once' in body
+
+    def test_oversized_request_is_refused_up_front(self, client, product, settings):
+        """
+        Test Case 3: A body over the request limit is cut off at its first file; CSRF still applies
+
+        Expected: Nothing stored and an error shown; a post without a token is rejected
+        """
+        settings.MAX_UPLOAD_REQUEST_SIZE = 1000
+        response = self._post(client, product, [_png('a.png', 'red', size=(300, 300))])
+        assert ProductImages.objects.count() == 0
+        assert 'The upload is larger than 1000' in response.content.decode()
+
+        forged = client.post(reverse('useradmin:upload_gallery_images', args=[product.pid]), {'images': [_png('a.png', 'red')]})
+        assert forged.status_code == 403
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
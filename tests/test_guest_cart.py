@@ -0,0 +1,130 @@
+"""
+Test Suite for Guest Carts
+Maps to Requirements: REQ-6, REQ-7, REQ-15
+User Stories: As per GitHub issues - shoppers can fill a cart before logging in and keep it afterwards
+"""
+
+import json
+import pytest
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from core.cart import GUEST_CART_COOKIE, add_to_cart
+from core.models import Product, Category, CartOrder, CartOrderItems
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestGuestCart:
+    """Test cases for the signed-cookie guest cart and its merge on login"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+
+    @pytest.fixture
+    def shopper(self):
+        """Create a shopper account"""
+        return User.objects.create_user(username='guestshopper', email='guestshopper@example.com', password='ShopperPass123')
+
+    @pytest.fixture
+    def products(self, shopper):
+        """Two published products"""
+        category = Category.objects.create(title='Audio', image=None)
+        return [
+            Product.objects.create(title=title, price=Decimal(price), user=shopper, category=category,
+                                   product_status='published')
+            for title, price in (('Earbuds', '39.00'), ('Speaker', '80.00'))
+        ]
+
+    def _add(self, client, product, qty):
+        token = client.cookies['csrftoken'].value if 'csrftoken' in client.cookies else ''
+        return client.post(reverse('core:add_to_cart', args=[product.pid]), {'qty': qty}, HTTP_X_CSRFTOKEN=token)
+
+    def test_guest_cart_lives_in_the_cookie(self, products):
+        """
+        Test Case 1: A logged-out visitor can add to the cart without any database writes
+
+        Expected: Only SELECTs run, the count comes back, and the cart page lists the lines
+        """
+        client = Client()
+        with CaptureQueriesContext(connection) as queries:
+            self._add(client, products[0], 2)
+            data = self._add(client, products[1], 1).json()
+
+        assert data == {'success': True, 'product_name': 'Speaker', 'new_cart_count': 3}
+        assert all(q['sql'].lstrip().startswith('SELECT') for q in queries.captured_queries)
+        assert not CartOrderItems.objects.exists()
+
+        response = client.get(reverse('core:cart'))
+        assert [(i.item, i.qty, i.total) for i in response.context['items']] == [
+            ('Earbuds', 2, Decimal('78.00')), ('Speaker', 1, Decimal('80.00')),
+        ]
+        assert response.context['total_price'] == Decimal('158.00')
+        # cached anonymous pages would show a stranger's header count
+        assert 'X-Page-Cache' not in client.get(reverse('core:home'))
+
+    def test_guest_batch_updates_and_tampering(self, products):
+        """
+        Test Case 2: Guest adds need the CSRF token; cart.js batches work on the guest cart; a forged cookie is ignored
+
+        Expected: 403 without a token, quantities change by pid, removed lines drop out, a bad signature means an empty cart
+        """
+        client = Client(enforce_csrf_checks=True)
+        assert self._add(client, products[0], 1).status_code == 403
+        assert GUEST_CART_COOKIE not in client.cookies
+
+        # what the product page script fetches before its first add
+        assert client.get(reverse('core:csrf_cookie')).status_code == 204
+        self._add(client, products[0], 1)
+        self._add(client, products[1], 1)
+
+        operations = [{'item_id': products[0].pid, 'qty': 4}, {'item_id': products[1].pid, 'action': 'remove'}]
+        data = client.post(
+            reverse('core:cart_batch'), json.dumps({'operations': operations}), content_type='application/json',
+            HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value,
+        ).json()
+        assert data['items'] == [{'item_id': products[0].pid, 'qty': 4, 'item_total': '156.00'}]
+        assert data['removed'] == [products[1].pid]
+        assert data['cart_count'] == 4
+
+        client.cookies[GUEST_CART_COOKIE] = client.cookies[GUEST_CART_COOKIE].value[:-2] + 'xx'
+        assert list(client.get(reverse('core:cart')).context['items']) == []
+
+    def test_login_merges_the_guest_cart(self, shopper, products):
+        """
+        Test Case 3: Logging in moves the guest cart into the user's cart with one upsert
+
+        Expected: Quantities add to existing lines, new lines are created, the cookie is cleared
+        """
+        order = CartOrder.objects.create(user=shopper)
+        add_to_cart(order, products[0].pid, 1)
+
+        client = Client()
+        self._add(client, products[0], 2)
+        self._add(client, products[1], 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(reverse('userauths:login'), {
+                'email': 'guestshopper@example.com', 'password': 'ShopperPass123',
+            })
+        writes = [q['sql'] for q in queries.captured_queries if 'core_cartorderitems' in q['sql']]
+
+        assert response.url == reverse('core:cart')
+        assert response.cookies[GUEST_CART_COOKIE].value == ''
+        assert len(writes) == 1 and writes[0].lstrip().startswith('INSERT')
+        lines = CartOrderItems.objects.filter(order=order).order_by('price')
+        assert [(line.product_id, line.qty) for line in lines] == [(products[0].pid, 3), (products[1].pid, 3)]
+        assert client.get(reverse('core:home')).context['cart_count'] == 6
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
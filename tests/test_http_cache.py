@@ -0,0 +1,147 @@
+"""
+Test Suite for Conditional GET and Cache-Control
+Maps to Requirements: REQ-18, REQ-20
+User Stories: As per GitHub issues - repeat visitors and feed readers revalidate instead of re-downloading
+"""
+
+import pytest
+from django.core import signing
+from django.test import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import Product, Category, CartOrder, CartOrderItems
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Test cases for ETag/Last-Modified validation and cache policies"""
+
+    @pytest.fixture
+    def client(self):
+        """Fixture to provide a test client"""
+        return Client()
+
+    @pytest.fixture
+    def vendor(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='etagvendor',
+            email='etagvendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def category(self):
+        """Create a test category"""
+        return Category.objects.create(title='Validator Parts', image=None)
+
+    @pytest.fixture
+    def product(self, vendor, category):
+        """Create a published product"""
+        return Product.objects.create(
+            title='Validated Motherboard',
+            price=Decimal('199.99'),
+            user=vendor,
+            category=category,
+            product_status='published',
+        )
+
+    def test_product_page_revalidates_with_304(self, client, product):
+        """
+        Test Case 1: Repeat visit with the ETag gets a 304 until the product changes
+
+        Expected: 304 with no body and a public Cache-Control, then 200 after an edit
+        """
+        url = reverse('core:product_detail', args=[product.pid])
+        first = client.get(url)
+        assert first.status_code == 200
+        assert 'public' in first['Cache-Control']
+        etag = first['ETag']
+
+        repeat = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert repeat.status_code == 304
+        assert repeat.content == b''
+        assert 'public' in repeat['Cache-Control']
+
+        product.price = Decimal('179.99')
+        product.save()
+        changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200
+        assert changed['ETag'] != etag
+
+    def test_owner_preview_is_private(self, client, vendor, category):
+        """
+        Test Case 2: Owner previews of unpublished products are never shared-cacheable,
+        and other visitors get no validators for them
+
+        Expected: private Cache-Control for the owner, 404 for anonymous visitors
+        """
+        draft = Product.objects.create(
+            title='Draft GPU', price=Decimal('499.00'), user=vendor, category=category,
+            product_status='in_review',
+        )
+        url = reverse('core:product_detail', args=[draft.pid])
+        assert client.get(url, HTTP_IF_NONE_MATCH='"*"').status_code == 404
+
+        client.force_login(vendor)
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'private' in response['Cache-Control']
+        assert 'public' not in response['Cache-Control']
+
+    def test_vendor_feed_revalidates_on_new_orders(self, client, vendor, product):
+        """
+        Test Case 3: The vendor RSS feed answers 304 until a new order arrives
+
+        Expected: Private and revalidated every poll; 304 for an unchanged feed, 200 once an order is placed, 403 for bad tokens
+        """
+        buyer = User.objects.create_user(username='feedbuyer', email='feedbuyer@example.com', password='BuyerPass123')
+        token = signing.dumps({'user_id': vendor.id})
+        url = reverse('useradmin:vendor_order_feed', args=[vendor.id, token])
+
+        first = client.get(url)
+        assert first.status_code == 200
+        repeat = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert repeat.status_code == 304
+        for response in (first, repeat):
+            assert 'private' in response['Cache-Control'] and 'no-cache' in response['Cache-Control']
+            assert 'public' not in response['Cache-Control']
+
+        order = CartOrder.objects.create(user=buyer, price=Decimal('199.99'), paid_status=True)
+        CartOrderItems.objects.create(
+            order=order, product=product, item=product.title, qty=1,
+            price=Decimal('199.99'), total=Decimal('199.99'),
+        )
+        updated = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert updated.status_code == 200
+        assert b'New Order #' in updated.content
+
+        bad = reverse('useradmin:vendor_order_feed', args=[vendor.id, 'not-a-token'])
+        assert client.get(bad).status_code == 403
+
+    def test_cart_change_invalidates_logged_in_product_page(self, client, vendor, product):
+        """
+        Test Case 4: The header's cart count is part of a logged-in product page's ETag
+
+        Expected: 304 while the cart is unchanged, 200 with the new count after an add
+        """
+        buyer = User.objects.create_user(username='etagbuyer', email='etagbuyer@example.com', password='BuyerPass123')
+        client.force_login(buyer)
+        url = reverse('core:product_detail', args=[product.pid])
+        first = client.get(url)
+        assert client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+
+        client.post(reverse('core:add_to_cart', args=[product.pid]), {'qty': 2})
+        after = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert after.status_code == 200
+        assert after.context['cart_count'] == 2
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
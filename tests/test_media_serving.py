@@ -0,0 +1,103 @@
+"""
+Test Suite for Production Media Serving
+Maps to Requirements: REQ-18
+User Stories: As per GitHub issues - product images load fast and are cached by browsers
+"""
+
+import pytest
+from django.test import RequestFactory
+from django.http import Http404
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from core.media_serving import serve_media, IMMUTABLE_MAX_AGE
+
+BODY = bytes(range(256)) * 4
+
+
+def _read(response):
+    return b"".join(response.streaming_content) if response.streaming else response.content
+
+
+@pytest.mark.django_db
+class TestMediaServing:
+    """Test cases for the serve_media view"""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        """Serve from a per-test media directory"""
+        settings.MEDIA_ROOT = tmp_path
+        return tmp_path
+
+    @pytest.fixture
+    def blob(self):
+        """A content-addressed file"""
+        return default_storage.save('product_images/data.png', ContentFile(BODY))
+
+    @pytest.fixture
+    def rf(self):
+        """Fixture to provide a request factory"""
+        return RequestFactory()
+
+    def _get(self, rf, name, **headers):
+        return serve_media(rf.get(f'/media/{name}', **headers), name)
+
+    def test_blob_is_immutable_and_revalidates(self, rf, blob):
+        """
+        Test Case 1: A hashed file is cached for a year and its hash is the ETag
+
+        Expected: 200 with immutable Cache-Control, then 304 for a matching If-None-Match
+        """
+        response = self._get(rf, blob)
+        assert response.status_code == 200
+        assert _read(response) == BODY
+        assert f'max-age={IMMUTABLE_MAX_AGE}' in response['Cache-Control']
+        assert 'immutable' in response['Cache-Control']
+        assert response['ETag'].strip('"') in blob
+
+        again = self._get(rf, blob, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert again.status_code == 304
+        assert 'immutable' in again['Cache-Control']
+
+    def test_byte_ranges(self, rf, blob):
+        """
+        Test Case 2: Single ranges get 206, impossible ones 416, stale If-Range the whole file
+
+        Expected: Correct slice, Content-Range and Content-Length for each case
+        """
+        response = self._get(rf, blob, HTTP_RANGE='bytes=10-19')
+        assert response.status_code == 206
+        assert response['Content-Range'] == f'bytes 10-19/{len(BODY)}'
+        assert response['Content-Length'] == '10'
+        assert _read(response) == BODY[10:20]
+
+        suffix = self._get(rf, blob, HTTP_RANGE='bytes=-5')
+        assert _read(suffix) == BODY[-5:]
+
+        assert self._get(rf, blob, HTTP_RANGE=f'bytes={len(BODY)}-').status_code == 416
+        stale = self._get(rf, blob, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outdated"')
+        assert stale.status_code == 200 and _read(stale) == BODY
+
+    def test_accel_redirect_and_path_safety(self, rf, settings, media_root):
+        """
+        Test Case 3: With MEDIA_ACCEL_REDIRECT the proxy sends the body; traversal is refused
+
+        Expected: Empty response with X-Accel-Redirect and short public caching; 404 outside MEDIA_ROOT
+        """
+        settings.MEDIA_ACCEL_REDIRECT = '/protected-media/'
+        (media_root / 'product.jpg').write_bytes(BODY)
+
+        response = self._get(rf, 'product.jpg')
+        assert response['X-Accel-Redirect'] == '/protected-media/product.jpg'
+        assert response.content == b''
+        assert 'immutable' not in response['Cache-Control']
+
+        for bad in ('../secret.txt', '.tmp/partial', 'missing.png'):
+            with pytest.raises(Http404):
+                self._get(rf, bad)
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
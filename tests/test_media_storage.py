@@ -0,0 +1,120 @@
+"""
+Test Suite for Content-Addressed Media Storage
+Maps to Requirements: REQ-25
+User Stories: As per GitHub issues - identical uploads are stored once
+"""
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from core.models import Product, ProductImages, Category, MediaBlob
+from core.storage import is_blob
+from decimal import Decimal
+from PIL import Image
+import io
+import os
+
+User = get_user_model()
+
+
+def _png(color):
+    """A small PNG upload of one solid colour"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 40), color=color).save(buffer, 'PNG')
+    return SimpleUploadedFile('test_product.png', buffer.getvalue(), content_type='image/png')
+
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+    """Test cases for hashed, sharded, reference-counted image files"""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        """Write uploads to a per-test media directory"""
+        settings.MEDIA_ROOT = tmp_path
+        cache.clear()
+        return tmp_path
+
+    @pytest.fixture
+    def vendor(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(username='blobvendor', email='blobvendor@example.com', password='VendorPass123')
+
+    @pytest.fixture
+    def category(self):
+        """Create test category"""
+        return Category.objects.create(title='Mice', image=None)
+
+    def _product(self, vendor, category, image, title='Mouse'):
+        return Product.objects.create(title=title, price=Decimal('20.00'), user=vendor, category=category, image=image)
+
+    def test_identical_uploads_share_one_sharded_file(self, vendor, category, media_root):
+        """
+        Test Case 1: The same picture uploaded for two products and a gallery is stored once
+
+        Expected: One name of the form images/ab/cd/<sha256>.png, one file on disk, refcount 3
+        """
+        first = self._product(vendor, category, _png('red'))
+        second = self._product(vendor, category, _png('red'), title='Mouse (again)')
+        ProductImages.objects.create(product=first, images=_png('red'))
+
+        name = first.image.name
+        assert is_blob(name)
+        digest = os.path.basename(name).split('.')[0]
+        assert name == f"images/{digest[:2]}/{digest[2:4]}/{digest}.png"
+        assert second.image.name == name
+        assert os.listdir(media_root / 'images' / digest[:2] / digest[2:4]) == [f"{digest}.png"]
+        assert MediaBlob.objects.get(name=name).refcount == 3
+
+    def test_replacing_and_deleting_release_references(self, vendor, category):
+        """
+        Test Case 2: Changing or deleting an image moves the counts; the file stays for the sweep
+
+        Expected: Old blob drops to 0, new blob counts 1, cascaded gallery rows are released
+        """
+        product = self._product(vendor, category, _png('red'))
+        ProductImages.objects.create(product=product, images=_png('blue'))
+        red = product.image.name
+        blue = ProductImages.objects.get(product=product).images.name
+
+        product = Product.objects.only('pid', 'title').get(pk=product.pk)
+        product.image = _png('green')
+        product.save()
+        green = product.image.name
+        assert MediaBlob.objects.get(name=red).refcount == 0
+        assert MediaBlob.objects.get(name=green).refcount == 1
+        assert default_storage.exists(red)
+
+        Product.objects.get(pk=product.pk).delete()
+        assert MediaBlob.objects.get(name=green).refcount == 0
+        assert MediaBlob.objects.get(name=blue).refcount == 0
+
+    def test_convert_command_collapses_old_copies(self, vendor, category, media_root):
+        """
+        Test Case 3: Flat files with random suffixes are converted into one blob
+
+        Expected: Rows point at the blob, originals are removed, refcount matches the rows
+        """
+        data = _png('red').read()
+        for suffix in ('', '_bqPJEtr', '_nnxKwn8'):
+            (media_root / 'product_images').mkdir(exist_ok=True)
+            (media_root / 'product_images' / f'test_product{suffix}.png').write_bytes(data)
+            product = self._product(vendor, category, None, title=f'Old {suffix}')
+            Product.objects.filter(pk=product.pk).update(image=f'product_images/test_product{suffix}.png')
+
+        call_command('convert_media_to_blobs')
+
+        names = set(Product.objects.filter(title__startswith='Old').values_list('image', flat=True))
+        assert len(names) == 1 and is_blob(names.pop())
+        assert os.listdir(media_root / 'product_images') == []
+        assert MediaBlob.objects.get().refcount == 3
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
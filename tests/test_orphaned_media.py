@@ -0,0 +1,110 @@
+"""
+Test Suite for the Orphaned Media Collector
+Maps to Requirements: REQ-24, REQ-25
+User Stories: As per GitHub issues - deleted and replaced images stop using disk space
+"""
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from core.models import Product, Category, CartOrder, CartOrderItems, MediaBlob
+from core.images import rendition_name, RENDITION_WIDTHS
+from decimal import Decimal
+from PIL import Image
+import io
+import os
+import time
+
+User = get_user_model()
+
+
+def _png(color):
+    """A small PNG upload of one solid colour"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 40), color=color).save(buffer, 'PNG')
+    return SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+
+def _age(root):
+    """Backdate every file so it is outside the grace window"""
+    old = time.time() - 2 * 24 * 3600
+    for directory, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(directory, name), (old, old))
+
+
+@pytest.mark.django_db
+class TestOrphanedMediaCollector:
+    """Test cases for collect_orphaned_media"""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        """Write uploads to a per-test media directory, rendering inline"""
+        settings.MEDIA_ROOT = tmp_path / 'media'
+        settings.IMAGE_WORKERS = 0
+        cache.clear()
+        return tmp_path / 'media'
+
+    @pytest.fixture
+    def catalog(self, media_root, django_capture_on_commit_callbacks):
+        """A product whose image was replaced, and an order that kept a deleted product's image"""
+        with django_capture_on_commit_callbacks(execute=True):
+            vendor = User.objects.create_user(username='gcvendor', email='gcvendor@example.com', password='VendorPass123')
+            category = Category.objects.create(title='Keyboards', image=None)
+            product = Product.objects.create(title='Keyboard', price=Decimal('50.00'), user=vendor, category=category, image=_png('red'))
+            replaced = product.image.name
+            product.image = _png('green')
+            product.save()
+
+            sold = Product.objects.create(title='Sold out', price=Decimal('10.00'), user=vendor, category=category, image=_png('blue'))
+            order = CartOrder.objects.create(user=vendor, paid_status=True)
+            CartOrderItems.objects.create(order=order, product=sold, item='Sold out', image=sold.image.url, invoice_no='INV1', product_status='delivered')
+            kept_by_order = sold.image.name
+            sold.delete()
+
+        _age(media_root)
+        default_storage.save('staging/fresh-upload.png', _png('white'))
+        return {'current': product.image.name, 'replaced': replaced, 'order': kept_by_order}
+
+    def test_dry_run_reports_without_deleting(self, catalog, media_root):
+        """
+        Test Case 1: --dry-run lists only the replaced image and its renditions
+
+        Expected: Nothing removed; current, order-history and fresh files not reported
+        """
+        out = io.StringIO()
+        call_command('collect_orphaned_media', dry_run=True, verbosity=2, stdout=out)
+        reported = out.getvalue()
+
+        assert catalog['replaced'] in reported
+        assert rendition_name(catalog['replaced'], RENDITION_WIDTHS[0], 'webp') in reported
+        for kept in (catalog['current'], catalog['order'], 'staging/fresh-upload.png'):
+            assert kept not in reported
+        assert f"Would remove {1 + 2 * len(RENDITION_WIDTHS)} of" in reported
+        assert default_storage.exists(catalog['replaced'])
+
+    def test_collect_deletes_or_quarantines(self, catalog, media_root, tmp_path):
+        """
+        Test Case 2: A real run quarantines the orphans and forgets their blob rows
+
+        Expected: Files moved under the quarantine directory, referenced files untouched
+        """
+        quarantine = tmp_path / 'quarantine'
+        call_command('collect_orphaned_media', quarantine=str(quarantine), batch_size=3, stdout=io.StringIO())
+
+        assert not default_storage.exists(catalog['replaced'])
+        assert (quarantine / catalog['replaced']).is_file()
+        assert not MediaBlob.objects.filter(name=catalog['replaced']).exists()
+        for kept in (catalog['current'], catalog['order'], 'staging/fresh-upload.png'):
+            assert default_storage.exists(kept)
+        assert default_storage.exists(rendition_name(catalog['current'], RENDITION_WIDTHS[0], 'jpg'))
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
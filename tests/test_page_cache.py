@@ -0,0 +1,114 @@
+"""
+Test Suite for the Anonymous Page Cache
+Maps to Requirements: REQ-18, REQ-19
+User Stories: As per GitHub issues - fast storefront for logged-out visitors
+"""
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import Product, Category
+from core.page_cache import page_cache_key
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAnonymousPageCache:
+    """Test cases for full-page caching of logged-out storefront pages"""
+
+    @pytest.fixture
+    def client(self):
+        """Fixture to provide a test client"""
+        return Client()
+
+    @pytest.fixture
+    def test_user(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='pagecachevendor',
+            email='pagecachevendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def product(self, test_user):
+        """Create a published product"""
+        category = Category.objects.create(title='Page Cache Parts', image=None)
+        return Product.objects.create(
+            title='Cached Power Supply',
+            price=Decimal('89.99'),
+            user=test_user,
+            category=category,
+            product_status='published',
+        )
+
+    def test_repeat_visit_is_served_from_cache(self, client, product):
+        """
+        Test Case 1: Second anonymous GET of the same URL is a cache hit
+
+        Expected: MISS then HIT, with parameter order ignored in the key
+        """
+        url = reverse('core:search')
+        first = client.get(url, {'q': 'cached', 'in_stock': '1'})
+        assert first['X-Page-Cache'] == 'MISS'
+        second = client.get(f'{url}?in_stock=1&q=cached&utm_source=mail')
+        assert second['X-Page-Cache'] == 'HIT'
+        assert second.content == first.content
+
+    def test_product_edit_invalidates_pages(self, client, product):
+        """
+        Test Case 2: Editing a product expires cached pages
+
+        Expected: After a save the page is rendered again with the new title
+        """
+        url = reverse('core:product_detail', args=[product.pid])
+        client.get(url)
+        assert client.get(url)['X-Page-Cache'] == 'HIT'
+
+        product.title = 'Cached Power Supply v2'
+        product.save()
+        response = client.get(url)
+        assert response['X-Page-Cache'] == 'MISS'
+        assert b'Cached Power Supply v2' in response.content
+
+    def test_stale_page_served_while_another_worker_rebuilds(self, client, product, rf):
+        """
+        Test Case 3: Stampede protection serves the stale copy when the rebuild lock is taken
+
+        Expected: STALE response with the old content
+        """
+        url = reverse('core:product_detail', args=[product.pid])
+        old = client.get(url)
+
+        product.title = 'Renamed Power Supply'
+        product.save()
+        lock_key = page_cache_key(rf.get(url)) + ':lock'
+        cache.add(lock_key, 1, 30)
+        try:
+            response = client.get(url)
+        finally:
+            cache.delete(lock_key)
+        assert response['X-Page-Cache'] == 'STALE'
+        assert response.content == old.content
+
+    def test_logged_in_users_bypass_cache(self, client, product, test_user):
+        """
+        Test Case 4: Authenticated pages are never cached
+
+        Expected: No X-Page-Cache header for a logged-in visitor
+        """
+        client.force_login(test_user)
+        response = client.get(reverse('core:product_detail', args=[product.pid]))
+        assert response.status_code == 200
+        assert 'X-Page-Cache' not in response
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
@@ -0,0 +1,124 @@
+"""
+Test Suite for Storefront Pagination
+Maps to Requirements: REQ-18, REQ-19
+User Stories: As per GitHub issues - browsing large catalogs page by page
+"""
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import Product, Category
+from core.pagination import keyset_paginate, encode_cursor, decode_cursor
+from core.cards import ProductCard, product_cards
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cases for cursor-based storefront pagination"""
+
+    @pytest.fixture
+    def client(self):
+        """Fixture to provide a test client"""
+        return Client()
+
+    @pytest.fixture
+    def test_user(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='pagevendor',
+            email='pagevendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def test_category(self):
+        """Create test category for products"""
+        return Category.objects.create(title='Pagination Parts', image=None)
+
+    @pytest.fixture
+    def sample_products(self, test_user, test_category):
+        """Create five published products in our own category"""
+        return [
+            Product.objects.create(
+                title=f'Paged Product {i}',
+                price=Decimal('10.00'),
+                user=test_user,
+                category=test_category,
+                product_status='published',
+            )
+            for i in range(5)
+        ]
+
+    def test_cursor_round_trip(self, sample_products):
+        """
+        Test Case 1: A cursor decodes to the (date, pid) it was built from
+
+        Expected: Round trip is lossless, garbage decodes to None
+        """
+        product = sample_products[0]
+        assert decode_cursor(encode_cursor(product.date, product.pid)) == (product.date, product.pid)
+        assert decode_cursor('not-a-cursor') is None
+        assert decode_cursor('') is None
+
+    def test_pages_cover_every_product_once(self, sample_products, test_category):
+        """
+        Test Case 2: Walking the cursors visits every product exactly once
+
+        Expected: Pages of 2 return 2, 2, 1 products with no overlap
+        """
+        queryset = Product.objects.filter(category=test_category, product_status='published')
+        seen = []
+        cursor = None
+        sizes = []
+        while True:
+            page = keyset_paginate(queryset, cursor=cursor, page_size=2)
+            sizes.append(len(page))
+            seen.extend(p.pid for p in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert sizes == [2, 2, 1]
+        assert sorted(seen) == sorted(p.pid for p in sample_products)
+
+    def test_load_more_fragment(self, client, sample_products):
+        """
+        Test Case 3: The load-more endpoint returns a grid fragment
+
+        Expected: 200 response rendering product cards, not a full page
+        """
+        response = client.get(reverse('core:home_more'))
+        assert response.status_code == 200
+        assert b'<html' not in response.content
+        assert b'View Details' in response.content
+
+    def test_grid_uses_card_projection(self, sample_products, test_category):
+        """
+        Test Case 4: Grid pages are built from narrow ProductCard rows
+
+        Expected: One query that never selects the specifications column, cards carry the image URL
+        """
+        products = Product.objects.filter(category=test_category)
+        with CaptureQueriesContext(connection) as queries:
+            page = keyset_paginate(products, page_size=3, load=product_cards)
+        assert len(queries) == 1
+        assert 'specifications' not in queries[0]['sql']
+
+        card = page.items[0]
+        assert isinstance(card, ProductCard)
+        assert card.image_url.endswith('product.jpg')
+        assert card.summary == 'No description provided'
+        assert page.next_cursor == encode_cursor(page.items[-1].date, page.items[-1].pid)
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
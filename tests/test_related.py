@@ -0,0 +1,133 @@
+"""
+Test Suite for the Product Detail Page
+Maps to Requirements: REQ-18, REQ-21
+User Stories: As per GitHub issues - keep buyers browsing from a product page
+"""
+
+import pytest
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import Product, Category, ProductImages, RelatedItem
+from decimal import Decimal
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestRelatedProducts:
+    """Test cases for the gallery and precomputed related-product blocks"""
+
+    @pytest.fixture
+    def client(self):
+        """Fixture to provide a test client"""
+        return Client()
+
+    @pytest.fixture
+    def seller(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='relatedvendor',
+            email='relatedvendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def other_seller(self):
+        """Create a second vendor selling in the same category"""
+        return User.objects.create_user(
+            username='othervendor',
+            email='othervendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def category(self):
+        """Create test category for products"""
+        return Category.objects.create(title='Related Parts', image=None)
+
+    def _product(self, title, user, category, status='published'):
+        return Product.objects.create(
+            title=title, price=Decimal('25.00'), user=user, category=category, product_status=status,
+        )
+
+    def test_concurrent_approval_taking_the_same_slot(self, seller, other_seller, category):
+        """
+        Test Case 1: Another approval fills the category group between our delete and our insert
+
+        Expected: No IntegrityError on unique_related_slot; the group holds the newest products, and
+        a later edit that leaves seller, category, status and date alone rebuilds nothing
+        """
+        older = self._product('Older Cooler', seller, category)
+        rival = self._product('Rival Cooler', other_seller, category)
+        pending = self._product('Pending Cooler', seller, category, status='in_review')
+        raced = []
+
+        def concurrent_rebuild(execute, sql, params, many, context):
+            # runs just before the category group's slots go in, after its old slots were deleted
+            if not raced and sql.startswith('INSERT INTO "core_relateditem"') and str(category.pk) in params:
+                raced.append(True)
+                RelatedItem.objects.create(kind='category', group_key=str(category.pk), position=0, product=older)
+            return execute(sql, params, many, context)
+
+        pending.product_status = 'published'
+        with connection.execute_wrapper(concurrent_rebuild):
+            pending.save()
+
+        assert raced
+        group = RelatedItem.objects.filter(kind='category', group_key=str(category.pk)).order_by('position')
+        assert list(group.values_list('product', flat=True)) == [pending.pid, rival.pid, older.pid]
+
+        pending.title = 'Pending Cooler v2'
+        with CaptureQueriesContext(connection) as queries:
+            pending.save()
+        assert not [q for q in queries.captured_queries if 'core_relateditem' in q['sql']]
+
+    def test_groups_follow_publication(self, seller, category):
+        """
+        Test Case 2: Groups are rebuilt when a product is approved, rejected or deleted
+
+        Expected: The product's slots appear on approval and disappear on rejection and delete
+        """
+        pending = self._product('Pending Cooler', seller, category, status='in_review')
+        assert not RelatedItem.objects.filter(product=pending).exists()
+
+        pending.product_status = 'published'
+        pending.save()
+        assert set(RelatedItem.objects.filter(product=pending).values_list('kind', flat=True)) == {'seller', 'category'}
+
+        pending.product_status = 'rejected'
+        pending.save()
+        assert not RelatedItem.objects.filter(product=pending).exists()
+
+        survivor = self._product('Survivor Cooler', seller, category)
+        victim = self._product('Victim Cooler', seller, category)
+        victim.delete()
+        assert list(RelatedItem.objects.filter(kind='seller', group_key=str(seller.pk)).values_list('product', flat=True)) == [survivor.pid]
+
+    def test_query_count_does_not_grow_with_catalog(self, client, seller, category, django_assert_max_num_queries):
+        """
+        Test Case 3: The page costs a fixed number of queries and renders the gallery once
+
+        Expected: At most 5 queries with a large seller catalog; gallery images rendered
+        """
+        main = self._product('Gallery Cooler', seller, category)
+        ProductImages.objects.create(product=main)
+        ProductImages.objects.create(product=main)
+        for i in range(15):
+            self._product(f'Filler Cooler {i}', seller, category)
+
+        with django_assert_max_num_queries(5):
+            response = client.get(reverse('core:product_detail', args=[main.pid]))
+        assert len(response.context['gallery']) == 2
+        assert len(response.context['related']['seller']) == 6
+        assert b'More from this seller' in response.content
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
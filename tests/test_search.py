@@ -7,7 +7,10 @@ User Stories: As per GitHub issues - product search and filtering
 import pytest
 from django.test import Client
 from django.urls import reverse
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
+from core import fuzzy
+from core.catalog import get_catalog_version
 from core.models import Product, Category, Tags
 from decimal import Decimal
 
@@ -18,6 +21,11 @@ User = get_user_model()
 class TestSearchFunctionality:
     """Test cases for product search and filtering functionality"""
 
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty cache, so per-process indexes rebuild"""
+        cache.clear()
+
     @pytest.fixture
     def client(self):
         """Fixture to provide a test client"""
@@ -232,6 +240,117 @@ class TestSearchFunctionality:
         product_titles = [p.title for p in products2]
         assert any('ASUS' in title or 'Gaming' in title for title in product_titles)
 
+    def test_search_ranks_and_highlights(self, client, sample_products):
+        """
+        Test Case 6: Full-text results are ranked and carry a highlighted snippet
+
+        Expected: Title match outranks description-only match, snippet wraps the term
+        """
+        search_url = reverse('core:search')
+        response = client.get(search_url, {'q': 'motherboard'})
+        assert response.status_code == 200
+        cards = response.context['cards']
+
+        assert cards[0].title == 'ASUS Gaming Motherboard'
+        assert '<mark>' in cards[0].search_snippet
+
+    def test_search_index_follows_publication(self, client, sample_products):
+        """
+        Test Case 7: The search index is updated when a product is approved or unpublished
+
+        Expected: Approved product becomes searchable, rejected one disappears
+        """
+        search_url = reverse('core:search')
+        pending = sample_products[3]
+        pending.product_status = 'published'
+        pending.save()
+        response = client.get(search_url, {'q': 'Pending Review'})
+        assert pending.pid in [p.pid for p in response.context['products']]
+
+        pending.product_status = 'rejected'
+        pending.save()
+        response = client.get(search_url, {'q': 'Pending Review'})
+        assert pending.pid not in [p.pid for p in response.context['products']]
+
+    def test_misspelled_query_suggests_correction(self, client, sample_products, monkeypatch):
+        """
+        Test Case 8: A typo with no exact hits falls back to the closest catalog spelling
+
+        Expected: "nvidea rtx" suggests "nvidia rtx" and returns both RTX cards; a rename
+        is applied to the vocabulary without rebuilding it
+        """
+        search_url = reverse('core:search')
+        response = client.get(search_url, {'q': 'nvidea rtx'})
+        assert response.status_code == 200
+        assert response.context['suggestion'] == 'nvidia rtx'
+
+        product_titles = [p.title for p in response.context['products']]
+        assert any('3080' in title for title in product_titles)
+        assert any('4090' in title for title in product_titles)
+
+        def full_build():
+            raise AssertionError("vocabulary rebuilt for a single edit")
+        monkeypatch.setattr(fuzzy, 'build_vocabulary', full_build)
+        board = sample_products[2]
+        board.title = 'Gigabyte Gaming Motherboard'
+        board.save()
+        assert client.get(search_url, {'q': 'gigabite'}).context['suggestion'] == 'gigabyte'
+        assert 'asus' not in fuzzy.get_vocabulary()
+
+    def test_suggest_endpoint_tracks_catalog_changes(self, client, sample_products, test_tags):
+        """
+        Test Case 9: Type-ahead suggestions match any word prefix and follow catalog edits
+
+        Expected: "rtx" suggests the RTX cards and tag; a rename is picked up incrementally
+        """
+        suggest_url = reverse('core:search_suggest')
+        response = client.get(suggest_url, {'q': 'rtx'})
+        assert response.status_code == 200
+        labels = [s['label'] for s in response.json()['suggestions']]
+        assert 'NVIDIA RTX 3080 Graphics Card' in labels
+        assert 'RTX' in labels
+
+        # tagging a product changes neither index, so it costs no refresh
+        version = get_catalog_version()
+        sample_products[2].tags.set(test_tags)
+        assert get_catalog_version() == version
+
+        product = sample_products[0]
+        product.title = 'Zotac Twin Edge 3080'
+        product.save()
+        labels = [s['label'] for s in client.get(suggest_url, {'q': 'zota'}).json()['suggestions']]
+        assert labels == ['Zotac Twin Edge 3080']
+        labels = [s['label'] for s in client.get(suggest_url, {'q': 'rtx'}).json()['suggestions']]
+        assert 'NVIDIA RTX 3080 Graphics Card' not in labels
+
+    def test_facets_filter_and_count_in_one_query(self, client, sample_products, test_tags, test_category, django_assert_num_queries):
+        """
+        Test Case 10: Multi-select facets filter results and report per-value counts
+
+        Expected: tag AND/OR modes differ, counts come from a single aggregate query
+        """
+        from core.facets import FacetSelection, facet_counts
+        search_url = reverse('core:search')
+
+        response = client.get(search_url, {'tag': ['rtx', 'gaming'], 'tag_mode': 'all', 'category': test_category.cid})
+        assert response.context['products'].count() == 2
+
+        response = client.get(search_url, {'tag': ['rtx', 'gaming'], 'category': test_category.cid})
+        assert response.context['products'].count() == 3
+
+        selection = FacetSelection(categories=[test_category.cid])
+        products = selection.apply(Product.objects.filter(status=True, product_status='published'))
+        tags = list(Tags.objects.all())
+        with django_assert_num_queries(1):
+            facets = facet_counts(products, selection, tags, [test_category])
+
+        assert facets['total'] == 3
+        tag_counts = {f.value: f.count for f in facets['tags']}
+        assert tag_counts['gaming'] == 3
+        assert tag_counts['nvidia'] == 2
+        price_counts = {f.value: f.count for f in facets['prices']}
+        assert price_counts == {'100-500': 1, '500-1000': 1, '1000-up': 1}
+
 
 # Additional configuration
 @pytest.fixture(scope='session')
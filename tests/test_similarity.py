@@ -0,0 +1,123 @@
+"""
+Test Suite for Content-Based "Similar Products"
+Maps to Requirements: REQ-21
+User Stories: As per GitHub issues - recommend products that have no order history
+"""
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import Product, Category, ProductNeighbour
+from core.similarity import LOCK_FILE, VectorStore, DIM, _index_lock
+from decimal import Decimal
+import fcntl
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestSimilarProducts:
+    """Test cases for the TF-IDF vector index and similar-product lists"""
+
+    @pytest.fixture(autouse=True)
+    def index_dir(self, settings, tmp_path):
+        """Keep the vector index in a per-test directory, updated inline"""
+        settings.SIMILARITY_INDEX_DIR = tmp_path / 'similarity'
+        settings.IMAGE_WORKERS = 0
+        return settings.SIMILARITY_INDEX_DIR
+
+    @pytest.fixture
+    def seller(self):
+        """Create a test vendor user"""
+        return User.objects.create_user(
+            username='simvendor',
+            email='simvendor@example.com',
+            password='VendorPass123'
+        )
+
+    @pytest.fixture
+    def catalog(self, seller):
+        """Create two graphics cards, a mouse and a keyboard"""
+        category = Category.objects.create(title='Similar Parts', image=None)
+        specs = {
+            'rtx4070': ('NVIDIA RTX 4070 Graphics Card', '12GB GDDR6X graphics card for 1440p gaming, ray tracing'),
+            'rtx4080': ('NVIDIA RTX 4080 Graphics Card', '16GB GDDR6X graphics card for 4K gaming, ray tracing'),
+            'mouse': ('Wireless Optical Mouse', 'Ergonomic wireless mouse with silent buttons'),
+            'keyboard': ('Mechanical Keyboard', 'Tenkeyless mechanical keyboard with brown switches'),
+        }
+        return {
+            key: Product.objects.create(
+                title=title, description=description, price=Decimal('99.00'), user=seller,
+                category=category, product_status='published',
+            )
+            for key, (title, description) in specs.items()
+        }
+
+    def _similar(self, product):
+        return list(
+            ProductNeighbour.objects.filter(product=product, kind='similar')
+            .order_by('rank').values_list('neighbour__title', flat=True)
+        )
+
+    def test_rebuild_pairs_similar_products(self, catalog, index_dir):
+        """
+        Test Case 1: The rebuild command vectorizes the catalog and links look-alike products
+
+        Expected: The two graphics cards are each other's top match; the memory-mapped matrix has one row per
+        product; a writer holding the index lock file keeps any other from taking it
+        """
+        call_command('rebuild_similar_products')
+
+        assert self._similar(catalog['rtx4070'])[0] == 'NVIDIA RTX 4080 Graphics Card'
+        assert 'NVIDIA RTX 4070 Graphics Card' not in self._similar(catalog['mouse'])
+        store = VectorStore.open(index_dir)
+        assert store.matrix().shape == (4, DIM)
+
+        # the same flock another worker process would hold
+        with open(index_dir / LOCK_FILE, 'a') as held:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            with _index_lock(index_dir, timeout=0) as locked:
+                assert not locked
+        with _index_lock(index_dir, timeout=0) as locked:
+            assert locked
+
+    def test_approval_adds_product_without_rebuild(self, catalog, seller, django_capture_on_commit_callbacks):
+        """
+        Test Case 2: Approving a product vectorizes it alone and offers it to its neighbours
+
+        Expected: New card gets the other cards as neighbours and appears in their lists
+        """
+        call_command('rebuild_similar_products')
+        pending = Product.objects.create(
+            title='NVIDIA RTX 4090 Graphics Card', description='24GB GDDR6X graphics card for 4K gaming',
+            price=Decimal('1599.00'), user=seller, category=catalog['rtx4070'].category,
+            product_status='in_review',
+        )
+        admin = User.objects.create_user(username='simadmin', email='simadmin@example.com', password='AdminPass123', is_staff=True)
+        client = Client()
+        client.force_login(admin)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.get(reverse('useradmin:admin_product_approve', args=[pending.pid]))
+
+        assert set(self._similar(pending)[:2]) == {'NVIDIA RTX 4070 Graphics Card', 'NVIDIA RTX 4080 Graphics Card'}
+        assert 'NVIDIA RTX 4090 Graphics Card' in self._similar(catalog['rtx4080'])
+
+    def test_detail_page_shows_similar_block(self, catalog):
+        """
+        Test Case 3: The product page reads similar products from the precomputed table
+
+        Expected: "Similar products" block lists the other graphics card
+        """
+        call_command('rebuild_similar_products')
+        response = Client().get(reverse('core:product_detail', args=[catalog['rtx4080'].pid]))
+        assert response.context['recommended']['similar'][0].title == 'NVIDIA RTX 4070 Graphics Card'
+        assert b'Similar products' in response.content
+
+
+# Additional configuration
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """Setup test database"""
+    pass
@@ -9,6 +9,7 @@ urlpatterns = [
     path("dashboard/", views.dashboard_view, name="dashboard"),
     path('add-product/', views.add_product_view, name='add_product'), 
     path('edit-product/<str:pid>/', views.edit_product, name='edit_product'),
+    path('edit-product/<str:pid>/gallery/', views.upload_gallery_images, name='upload_gallery_images'),
     path("admin-login/", views.admin_login_view, name="admin_login"),
     path("admin-panel/", views.admin_dashboard, name="admin_dashboard"),
     path("admin-panel/users/", views.admin_user_list, name="admin_user_list"),
@@ -7,11 +7,20 @@ from userauths.models import User
 from userauths.views import login_view, logout_view, Register_View
 from django.contrib import messages
 from useradmin.decorators import custom_admin_required
+from core.catalog import get_categories
+from core.cards import product_cards
+from core.similarity import update_product as update_similar
+from core.dedup import duplicates_for, find_duplicates
+from core.uploads import (
+    LimitedUploadHandler, attach_gallery, attach_upload, looks_like_image, max_gallery_files, run_in_background,
+)
+from django.db import transaction
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import UserChangeForm
 from django.forms import ModelForm
 from django.core import signing
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 import datetime
 from django import forms
 
@@ -27,7 +36,7 @@ def dashboard_view(request):
         messages.error(request, "Admins cannot access the seller dashboard. Use the admin panel instead.")
         return redirect('useradmin:admin_dashboard')
     
-    products = Product.objects.filter(user=request.user)
+    products = product_cards(Product.objects.filter(user=request.user))
     revenue = CartOrder.objects.aggregate(price=Sum('price'))
     total_orders_count = CartOrder.objects.all()
     all_products = Product.objects.all()
@@ -76,15 +85,20 @@ def add_product_view(request):
             messages.error(request, "Invalid price format.")
             return redirect('useradmin:add_product')
 
+        if not looks_like_image(image):
+            messages.error(request, "Upload a JPEG, PNG or WebP image.")
+            return redirect('useradmin:add_product')
+
         category = get_object_or_404(Category, cid=category_cid)
 
         product = Product(
             title=title,
             category=category,
             price=price,
-            image=image,
             user=request.user  # set current user
         )
+        # resized and checked in the background; listings show a placeholder until then
+        attach_upload(product, image)
         product.save()
 
         # handle tags (comma separated)
@@ -99,11 +113,16 @@ def add_product_view(request):
             if tag_objs:
                 product.tags.set(tag_objs)
 
+        duplicates = find_duplicates(product)
+        if duplicates:
+            titles = ", ".join(f"'{d.title}'" for d in duplicates[:3])
+            messages.warning(request, f"This listing looks like a duplicate of {titles}. Reviewers will see it flagged.")
+
         messages.success(request, f"Product '{title}' added successfully!")
         return redirect('useradmin:dashboard')
 
     # GET request: show form
-    categories = Category.objects.all()
+    categories = get_categories()
     return render(request, "useradmin/add_product.html", {"categories": categories})
 
 def edit_product(request, pid):
@@ -114,7 +133,7 @@ def edit_product(request, pid):
         messages.error(request, "You don’t have permission to edit this product.")
         return redirect("useradmin:dashboard")
 
-    categories = Category.objects.all()
+    categories = get_categories()
 
     if request.method == "POST":
         title = request.POST.get("title")
@@ -124,6 +143,10 @@ def edit_product(request, pid):
         specifications = request.POST.get("specifications")
         image = request.FILES.get("image")
 
+        if image and not looks_like_image(image):
+            messages.error(request, "Upload a JPEG, PNG or WebP image.")
+            return redirect("useradmin:edit_product", pid=pid)
+
         product.title = title
         product.description = description
         product.price = price
@@ -135,7 +158,7 @@ def edit_product(request, pid):
                 product.category = category
 
         if image:
-            product.image = image
+            attach_upload(product, image)
         # handle tags update
         tags_input = request.POST.get('tags', '')
         if tags_input:
@@ -156,9 +179,48 @@ def edit_product(request, pid):
     context = {
         "product": product,
         "categories": categories,
+        "gallery": product.productimages_set.all(),
+        "max_gallery_files": max_gallery_files(),
     }
     return render(request, "useradmin/edit_product.html", context)
 
+@csrf_exempt
+def upload_gallery_images(request, pid):
+    # the upload handler has to be in place before anything reads the body,
+    # and the CSRF middleware would read it; the check runs inside instead
+    request.upload_handlers = [LimitedUploadHandler(request)]
+    return _upload_gallery_images(request, pid)
+
+
+@csrf_protect
+def _upload_gallery_images(request, pid):
+    if not request.user.is_authenticated:
+        messages.warning(request, "Must be logged in to upload images.")
+        return redirect('userauths:login')
+    product = get_object_or_404(Product, pid=pid)
+    if product.user != request.user:
+        messages.error(request, "You don’t have permission to edit this product.")
+        return redirect("useradmin:dashboard")
+    if request.method != "POST":
+        return redirect("useradmin:edit_product", pid=pid)
+
+    files = request.FILES.getlist('images')
+    errors = request.upload_handlers[0].errors
+    accepted = []
+    for f in files:
+        if looks_like_image(f):
+            accepted.append(f)
+        else:
+            errors.append(f"{f.name} could not be read as an image.")
+    for error in errors:
+        messages.error(request, error)
+    if accepted:
+        attach_gallery(product, accepted)
+        messages.success(request, f"Added {len(accepted)} image(s); they appear in the gallery once processed.")
+    elif not errors:
+        messages.error(request, "Choose at least one image to upload.")
+    return redirect("useradmin:edit_product", pid=pid)
+
 def admin_dashboard(request):
     total_users = User.objects.count()
     total_products = Product.objects.count()
@@ -275,7 +337,7 @@ def admin_unban_user(request, user_id):
 
 @custom_admin_required
 def admin_product_list(request):
-    products = Product.objects.all().order_by('-date')
+    products = product_cards(Product.objects.order_by('-date'), with_vendor=True)
     context = {
         'products': products
     }
@@ -293,6 +355,7 @@ def admin_edit_product(request, pid):
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
             form.save()
+            transaction.on_commit(lambda: run_in_background(update_similar, product.pid))
             messages.success(request, f'Product {product.title} updated successfully.')
             return redirect('useradmin:admin_product_list')
         else:
@@ -376,7 +439,11 @@ def admin_login_view(request):
     return render(request, "useradmin/admin/login.html")
 
 def admin_review_products(request):
-    products = Product.objects.filter(product_status="in_review")
+    products = list(Product.objects.filter(product_status="in_review").select_related('user', 'category'))
+    # flag likely re-uploads (LSH lookup, see core/dedup.py)
+    duplicates = duplicates_for(products)
+    for product in products:
+        product.duplicates = duplicates[product.pk]
     context = {"products": products}
     return render(request, "useradmin/admin/review_products.html", context)
 
@@ -384,6 +451,8 @@ def admin_product_approve(request, pid):
     product = get_object_or_404(Product, pid=pid)
     product.product_status = "published"
     product.save()
+    # vectorize for "similar products" off the request once the approval is committed
+    transaction.on_commit(lambda: run_in_background(update_similar, product.pid))
     messages.success(request, f"Product '{product.title}' approved and published.")
     return redirect("useradmin:admin_review_products")
 
@@ -420,18 +489,58 @@ def seller_delete_product(request, pid):
 from django.http import HttpResponse
 from django.utils import timezone
 from django.core import signing
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+from core.http_cache import cache_policy, make_etag
+
+def _feed_state(request, user_id, token):
+    """Latest order date and order count for a valid feed token, else None.
+    Read once per request and shared by the validators and the view."""
+    if not hasattr(request, '_feed_state'):
+        state = None
+        try:
+            valid = signing.loads(token, max_age=None).get('user_id') == user_id
+        except signing.BadSignature:
+            valid = False
+        if valid:
+            state = CartOrder.objects.filter(cartorderitems__product__user_id=user_id).aggregate(
+                latest=Max('order_date'), orders=Count('id', distinct=True),
+            )
+        request._feed_state = state
+    return request._feed_state
+
+
+def vendor_feed_etag(request, user_id, token):
+    state = _feed_state(request, user_id, token)
+    if state is None:
+        return None
+    return make_etag(user_id, state['latest'].isoformat() if state['latest'] else '', state['orders'])
+
+
+def vendor_feed_last_modified(request, user_id, token):
+    state = _feed_state(request, user_id, token)
+    return state['latest'] if state else None
+
+
+def vendor_feed_cache_control(request, user_id, token):
+    # The feed lists a vendor's orders and its URL is the credential, so no
+    # shared cache may keep it; readers revalidate every poll and get a 304
+    # from the ETag / Last-Modified until an order arrives.
+    if _feed_state(request, user_id, token) is None:
+        return None
+    return {'private': True, 'no_cache': True}
+
 
+@cache_policy(vendor_feed_cache_control)
+@condition(etag_func=vendor_feed_etag, last_modified_func=vendor_feed_last_modified)
 def vendor_order_feed(request, user_id, token):
     """
     RSS feed for vendor-specific orders.
     Returns an RSS XML feed of orders containing the vendor's products.
     """
-    try:
-        # Verify the signed token
-        data = signing.loads(token, max_age=None)
-        if data.get('user_id') != user_id:
-            return HttpResponse("Invalid token", status=403)
-    except signing.BadSignature:
+    # Verify the signed token
+    state = _feed_state(request, user_id, token)
+    if state is None:
         return HttpResponse("Invalid token", status=403)
     
     # Get the vendor/seller
@@ -464,7 +573,7 @@ def vendor_order_feed(request, user_id, token):
         <title>Orders for {vendor.username}</title>
         <description>New order notifications for vendor {vendor.username}</description>
         <link>{request.build_absolute_uri('/useradmin/dashboard/')}</link>
-        <lastBuildDate>{timezone.now().strftime('%a, %d %b %Y %H:%M:%S +0000')}</lastBuildDate>
+        <lastBuildDate>{(state['latest'] or timezone.now()).strftime('%a, %d %b %Y %H:%M:%S +0000')}</lastBuildDate>
         {"".join(rss_items)}
     </channel>
 </rss>"""
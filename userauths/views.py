@@ -6,6 +6,7 @@ from django.contrib import messages
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from .forms import UpdateUserForm
+from core.cart import merge_guest_cart, write_guest_cart
 
 
 User = get_user_model()
@@ -23,7 +24,11 @@ def Register_View(request):
                                     password=form.cleaned_data['password1']
                                     )
             login(request, new_user)
-            return redirect("core:home")
+            # anything added to the cart while logged out comes along
+            merged = merge_guest_cart(request, new_user)
+            response = redirect("core:cart" if merged else "core:home")
+            write_guest_cart(request, response, {})
+            return response
     else:
         form = UserRegisterForm()
         print("User registration failed")
@@ -56,12 +61,16 @@ def login_view(request):
                 
                 login(request, user)
                 messages.success(request, f"Welcome back, {user.username}!")
+                merged = merge_guest_cart(request, user)
                 
                 # Redirect admins to admin dashboard
                 if user.is_staff or user.is_superuser:
-                    return redirect("useradmin:admin_dashboard")
-                
-                return redirect("core:home")
+                    response = redirect("useradmin:admin_dashboard")
+                else:
+                    # back to the cart they filled while logged out
+                    response = redirect("core:cart" if merged else "core:home")
+                write_guest_cart(request, response, {})
+                return response
             else:
                 messages.warning(request, "Invalid email or password.")
                 return redirect("userauths:login")